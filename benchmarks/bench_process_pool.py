@@ -0,0 +1,55 @@
+"""
+Measures how a range load scales with the number of worker processes (the 'workers'
+setting) against the default threaded pipeline (workers=0).
+
+The archives are downloaded into a temporary archive cache by a warm-up run, and the
+Parquet store is disabled, so every run decompresses, parses and filters all days.
+The URL template may point to a local mirror, e.g. file:///data/gdelt/{DATE}.export.CSV.zip.
+
+Usage:
+    python -m benchmarks.bench_process_pool events URL_TEMPLATE 2024-01-01 2024-01-16 [MAX_WORKERS]
+    python -m benchmarks.bench_process_pool gkg URL_TEMPLATE 2024-01-01 2024-01-16 [MAX_WORKERS]
+"""
+import os
+import sys
+import tempfile
+import time
+from src.dataloaders.EventDataLoader import EventDataLoader
+from src.dataloaders.GraphDataLoader import GraphDataLoader
+from src.dataloaders.LoadReporter import LoadReporter
+
+
+def load(feed, url, start, end, cache_dir, workers):
+    state = {"cache_dir": cache_dir, "store_dir": None, "workers": workers}
+    reporter = LoadReporter(on_progress=lambda *args: None, on_message=lambda *args: None)
+    if feed == "events":
+        state["root_url"] = url
+        state["selected_columns"] = []
+        return EventDataLoader(state, reporter).load_data_range(start, end), reporter
+    state["gkg_url"] = url
+    loader = GraphDataLoader(state, reporter)
+    loader.load_data_range(start, end, [])
+    return loader.get_data(), reporter
+
+
+def main(feed, url, start, end, max_workers=None):
+    max_workers = int(max_workers or os.cpu_count())
+    counts = [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n < max_workers] + [max_workers]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        df, reporter = load(feed, url, start, end, cache_dir, 0)
+        if reporter.errors:
+            print("\n".join(reporter.errors))
+        print(f"{feed} {start}..{end}: {len(df)} rows, {os.cpu_count()} CPUs")
+
+        baseline = None
+        for workers in counts:
+            started = time.perf_counter()
+            df, _ = load(feed, url, start, end, cache_dir, workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            label = "threads" if workers == 0 else f"{workers} workers"
+            print(f"{label:>11}: {elapsed:6.2f} s, {baseline / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,340 @@
+"""
+Repeatable benchmark of the loading and export stages, on synthetic GDELT days (see
+synthetic_gdelt) served over HTTP by a local feed server (see feed_server).
+
+Stages:
+    events.load_data            one event day: download, parse all columns and filter
+    events.load_data_range      all event days of the run through the range pipeline
+    events.parse_data.ENGINE    one full event day parsed by the 'c' or the 'pyarrow' engine
+    gkg.parse_data.ENGINE       one full GKG day parsed by the 'c' or the 'pyarrow' engine
+    events.filter_data          the event filters, as one predicate, over the parsed event days
+    gkg.iterative_filter_data   THEMES keyword filter over the parsed GKG days
+    gkg.parse_tone_column       TONE split into the tone columns over the parsed GKG days
+    export.zip                  the CSV in ZIP export served by download_data_button
+
+Each stage runs in a fresh process, so the peak RSS reported is that of the stage (plus
+the data it is given); its time is the median of --repeat runs. The parse stages also
+report the memory of the parsed frame. Throughput is given in
+rows/s and in MB/s of the stage's input: the uncompressed CSV for the loads, the filtered
+columns for events.filter_data, the THEMES or TONE text for the GKG stages and the CSV
+written for the export. The archive cache,
+the Parquet store, checkpoints, the result cache and spilling are turned off, so every
+run does the full work.
+
+The synthetic days are generated once into --data-dir and reused while the settings stay
+the same. --save writes the results to a JSON baseline; --compare prints the change
+against a baseline and exits with status 1 if a stage got slower or used more memory by
+more than --tolerance.
+
+Usage:
+    python -m benchmarks.bench_suite [--days 3] [--scale 1.0] [--repeat 3] [--save base.json]
+    python -m benchmarks.bench_suite --compare base.json
+"""
+import argparse
+import concurrent.futures
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import pandas as pd
+import pyarrow as pa
+from benchmarks.feed_server import serve
+from benchmarks.synthetic_gdelt import EVENT_ROWS, GKG_ROWS, SyntheticGdelt
+
+KEYWORDS = ["WAR", "TAX_FNCACT_*"]
+# Settings that turn off every shortcut, so each run downloads, parses and filters everything.
+NO_SHORTCUTS = {
+    "cache_dir": None, "store_dir": None, "checkpoint_dir": None, "result_cache_bytes": None, "spill_bytes": None,
+}
+# Filters of events.filter_data: a code filter, a range and a count, as one compiled predicate.
+EVENT_FILTERS = {
+    "actor_1_code_list": ["USA", "GBR", "RUS"], "root_event_code_list": ["01", "04", "19"], "quad_class_list": [1, 4],
+    "goldstein_range": (-8.0, 5.0), "min_num_mentions": 2,
+}
+
+
+def quiet_reporter():
+    from src.dataloaders.LoadReporter import LoadReporter
+    return LoadReporter(on_progress=lambda *args: None, on_message=lambda *args: None)
+
+
+def event_loader(base_url):
+    from src.dataloaders.EventDataLoader import EventDataLoader
+    state = dict(NO_SHORTCUTS, root_url=f"{base_url}/events/{{DATE}}.export.CSV.zip", selected_columns=[])
+    return EventDataLoader(state, quiet_reporter())
+
+
+def gkg_loader(base_url):
+    from src.dataloaders.GraphDataLoader import GraphDataLoader
+    return GraphDataLoader(dict(NO_SHORTCUTS, gkg_url=f"{base_url}/gkg/{{DATE}}.gkg.csv.zip"), quiet_reporter())
+
+
+def peak_rss():
+    # On Linux ru_maxrss carries over the fork and exec that start the stage process, so the
+    # high-water mark of the process image is read instead; ru_maxrss is in bytes on macOS.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def timed(run, repeat, prepare=None):
+    """
+    Times a stage over several runs.
+
+    Parameters:
+        run (callable): Runs the stage on the prepared input; returns (rows, input bytes).
+        repeat (int): Number of runs.
+        prepare (callable, optional): Builds the input of a run, outside the timing.
+
+    Returns:
+        dict: rows, bytes, median and best seconds, rows/s, MB/s and peak RSS of the process.
+    """
+    setup_rss = peak_rss()
+    times = []
+    for _ in range(repeat):
+        data = prepare() if prepare is not None else None
+        started = time.perf_counter()
+        rows, size = run(data)
+        times.append(time.perf_counter() - started)
+        del data
+    seconds = statistics.median(times)
+    return {
+        "rows": rows, "bytes": size, "seconds": seconds, "best_seconds": min(times),
+        "rows_per_s": rows / seconds, "mb_per_s": size / 1e6 / seconds,
+        "peak_rss": peak_rss(), "setup_rss": setup_rss,
+    }
+
+
+def bench_load_data(base_url, manifest, repeat):
+    loader = event_loader(base_url)
+    date = manifest["dates"][0]
+    size = manifest["bytes"][f"events/{date}.export.CSV.zip"]
+    return timed(lambda _: (len(loader.load_data(date)), size), repeat)
+
+
+def bench_load_data_range(base_url, manifest, repeat):
+    loader = event_loader(base_url)
+    dates = manifest["dates"]
+    size = sum(manifest["bytes"][f"events/{date}.export.CSV.zip"] for date in dates)
+    return timed(lambda _: (len(loader.load_data_range(dates[0], dates[-1])), size), repeat)
+
+
+def bench_parse_data(base_url, manifest, repeat, feed, engine):
+    loader = event_loader(base_url) if feed == "events" else gkg_loader(base_url)
+    loader.state["parse_engine"] = engine
+    date = manifest["dates"][0]
+    raw = loader.fetch_data(date)
+    size = manifest["bytes"][f"events/{date}.export.CSV.zip" if feed == "events" else f"gkg/{date}.gkg.csv.zip"]
+    result = timed(lambda _: (len(loader.parse_data(raw)), size), repeat)
+    result["frame_bytes"] = int(loader.parse_data(raw).memory_usage(deep=True).sum())
+    return result
+
+
+def bench_filter_data(base_url, manifest, repeat):
+    loader = event_loader(base_url)
+    frame = pd.concat([loader.load_data(date) for date in manifest["dates"]], ignore_index=True)
+    loader.state.update(EVENT_FILTERS)
+    size = int(frame[loader.filter_columns()].memory_usage(deep=True, index=False).sum())
+
+    def run(_):
+        loader.filter_data(frame)
+        return len(frame), size
+    return timed(run, repeat)
+
+
+def parsed_gkg(base_url, manifest):
+    # Parsed only: load_data would already split the tone the benchmarks below time.
+    loader = gkg_loader(base_url)
+    frames = [loader.parse_data(loader.fetch_data(date)) for date in manifest["dates"]]
+    return loader, pd.concat(frames, ignore_index=True)
+
+
+def bench_iterative_filter_data(base_url, manifest, repeat):
+    loader, frame = parsed_gkg(base_url, manifest)
+    size = int(frame['THEMES'].str.len().sum())
+
+    def run(_):
+        loader.iterative_filter_data(frame, KEYWORDS)
+        return len(frame), size
+    return timed(run, repeat)
+
+
+def bench_parse_tone_column(base_url, manifest, repeat):
+    loader, frame = parsed_gkg(base_url, manifest)
+    size = int(frame['TONE'].str.len().sum())
+
+    def run(data):
+        loader.data = data
+        loader.parse_tone_column()
+        return len(data), size
+    # The split adds columns to the frame, so every run gets a fresh copy.
+    return timed(run, repeat, prepare=frame.copy)
+
+
+def bench_export_zip(base_url, manifest, repeat):
+    import zipfile
+    from src.apps.data_export import DataExporter
+    data = event_loader(base_url).load_data_range(manifest["dates"][0], manifest["dates"][-1])
+    with tempfile.TemporaryDirectory() as export_dir:
+        exporter = DataExporter(export_dir=export_dir)
+        runs = iter(range(repeat))
+
+        def run(_):
+            # A new fingerprint every run, so the export is built rather than reused.
+            path = exporter.build(data, f"bench-{next(runs)}", "zip")
+            with zipfile.ZipFile(path) as archive:
+                size = archive.getinfo("data.csv").file_size
+            os.remove(path)
+            return len(data), size
+        return timed(run, repeat)
+
+
+STAGES = {
+    "events.load_data": bench_load_data,
+    "events.load_data_range": bench_load_data_range,
+    "events.parse_data.c": functools.partial(bench_parse_data, feed="events", engine="c"),
+    "events.parse_data.pyarrow": functools.partial(bench_parse_data, feed="events", engine="pyarrow"),
+    "gkg.parse_data.c": functools.partial(bench_parse_data, feed="gkg", engine="c"),
+    "gkg.parse_data.pyarrow": functools.partial(bench_parse_data, feed="gkg", engine="pyarrow"),
+    "events.filter_data": bench_filter_data,
+    "gkg.iterative_filter_data": bench_iterative_filter_data,
+    "gkg.parse_tone_column": bench_parse_tone_column,
+    "export.zip": bench_export_zip,
+}
+
+
+def prepare_data(data_dir, days, scale):
+    """
+    Returns the manifest of the synthetic days in data_dir, generating them first if they
+    are missing or were generated with other settings.
+
+    Parameters:
+        data_dir (str): Directory of the synthetic archives.
+        days (int): Number of days, from 2024-01-01.
+        scale (float): Fraction of the production row counts per day.
+
+    Returns:
+        dict: The manifest, see SyntheticGdelt.write().
+    """
+    generator = SyntheticGdelt()
+    dates = [date.strftime("%Y%m%d") for date in pd.date_range("2024-01-01", periods=days)]
+    event_rows, gkg_rows = int(EVENT_ROWS * scale), int(GKG_ROWS * scale)
+    try:
+        with open(os.path.join(data_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        if (manifest["seed"], manifest["dates"], manifest["event_rows"], manifest["gkg_rows"]) == \
+                (generator.seed, dates, event_rows, gkg_rows):
+            return manifest
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    print(f"Generating {days} synthetic days ({event_rows} events, {gkg_rows} GKG records each) in {data_dir}...")
+    return generator.write(data_dir, dates, event_rows, gkg_rows)
+
+
+def run_suite(data_dir, days=3, scale=1.0, repeat=3, stages=None):
+    """
+    Runs the benchmark stages, each in a fresh process.
+
+    Parameters:
+        data_dir (str): Directory of the synthetic archives.
+        days (int): Number of days.
+        scale (float): Fraction of the production row counts per day.
+        repeat (int): Runs per stage.
+        stages (list, optional): Names of the stages to run; all if None.
+
+    Returns:
+        dict: 'meta' (settings and versions) and 'stages' (name to result, see timed()).
+    """
+    manifest = prepare_data(data_dir, days, scale)
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with serve(data_dir) as base_url:
+        for name in stages or STAGES:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[name] = pool.submit(STAGES[name], base_url, manifest, repeat).result()
+            print_result(name, results[name])
+    meta = {
+        "days": days, "scale": scale, "repeat": repeat, "event_rows": manifest["event_rows"],
+        "gkg_rows": manifest["gkg_rows"], "python": platform.python_version(), "pandas": pd.__version__,
+        "pyarrow": pa.__version__, "cpus": os.cpu_count(), "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return {"meta": meta, "stages": results}
+
+
+def print_result(name, result):
+    print(
+        f"{name:<27} {result['rows']:>10} rows {result['seconds']:7.2f} s "
+        f"{result['rows_per_s']:>11,.0f} rows/s {result['mb_per_s']:7.1f} MB/s "
+        f"peak {result['peak_rss'] / 2 ** 20:6.0f} MiB"
+        + (f" frame {result['frame_bytes'] / 2 ** 20:6.0f} MiB" if "frame_bytes" in result else "")
+    )
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the change of every stage against a baseline.
+
+    Parameters:
+        results (dict): Output of run_suite().
+        baseline (dict): An earlier output of run_suite().
+        tolerance (float): Allowed relative increase of time and peak RSS, e.g. 0.1.
+
+    Returns:
+        list: Names of the stages that got worse by more than the tolerance.
+    """
+    if baseline["meta"].get("scale") != results["meta"]["scale"] or baseline["meta"].get("days") != results["meta"]["days"]:
+        print("Warning: the baseline was run with other --days or --scale settings.")
+    regressions = []
+    for name, result in results["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            print(f"{name:<27} not in the baseline")
+            continue
+        time_change = result["seconds"] / base["seconds"] - 1
+        rss_change = result["peak_rss"] / base["peak_rss"] - 1
+        worse = time_change > tolerance or rss_change > tolerance
+        if worse:
+            regressions.append(name)
+        print(f"{name:<27} time {time_change:+7.1%}  peak RSS {rss_change:+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_suite", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data-dir", default=".gdelt_bench", help="Directory of the synthetic archives.")
+    parser.add_argument("--days", type=int, default=3, help="Number of synthetic days.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the production row counts per day.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the median time is reported.")
+    parser.add_argument("--stage", nargs="+", choices=list(STAGES), help="Stages to run; all if omitted.")
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare the results with this JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown or memory growth, e.g. 0.1.")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.data_dir, args.days, args.scale, args.repeat, args.stage)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
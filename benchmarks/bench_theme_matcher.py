@@ -0,0 +1,52 @@
+"""
+Compares the precompiled ThemeMatcher with the regex THEMES filter it replaced, on one
+or more daily GKG archives.
+
+The original pattern, (?<=^|_)KEYWORD(?=$|_), is rejected by Python's re module
+(variable-width look-behind), so the regex side uses the closest pattern that compiles
+and treats ';' as a theme boundary.
+
+Usage:
+    python -m benchmarks.bench_theme_matcher "WAR,TAX_FNCACT_*" path/to/20240101.gkg.csv.zip [...]
+"""
+import re
+import sys
+import time
+import pandas as pd
+from src.dataloaders.ThemeMatcher import ThemeMatcher
+
+
+def regex_filter(themes, keywords):
+    parts = []
+    for keyword in keywords:
+        if keyword.endswith("*"):
+            parts.append(fr'(?<![^_;]){re.escape(keyword[:-1])}')
+        else:
+            parts.append(fr'(?<![^_;]){re.escape(keyword)}(?![^_;])')
+    return themes.fillna("").str.contains('|'.join(parts), case=False, na=False, regex=True).to_numpy()
+
+
+def main(keyword_arg, paths):
+    keywords = [keyword.strip() for keyword in keyword_arg.split(",") if keyword.strip()]
+    themes = pd.concat(
+        [pd.read_csv(path, sep='\t', usecols=['THEMES'], dtype=str)['THEMES'] for path in paths],
+        ignore_index=True
+    )
+    print(f"{len(themes)} rows from {len(paths)} file(s), keywords: {keywords}")
+
+    start = time.perf_counter()
+    regex_mask = regex_filter(themes, keywords)
+    print(f"  regex          : {time.perf_counter() - start:.2f} s, {regex_mask.sum()} matches")
+
+    start = time.perf_counter()
+    matcher = ThemeMatcher(keywords)
+    mask = matcher.match(themes)
+    print(f"  matcher (cold) : {time.perf_counter() - start:.2f} s, {mask.sum()} matches")
+
+    start = time.perf_counter()
+    mask = matcher.match(themes)
+    print(f"  matcher (warm) : {time.perf_counter() - start:.2f} s, {mask.sum()} matches")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2:])
@@ -0,0 +1,61 @@
+"""
+Serves a directory of GDELT archives over HTTP with the URL layout of
+data.gdeltproject.org, so the loaders can be pointed at it instead of the real server:
+
+    http://127.0.0.1:PORT/events/YYYYMMDD.export.CSV.zip
+    http://127.0.0.1:PORT/gkg/YYYYMMDD.gkg.csv.zip
+
+Responses carry Content-Length and Last-Modified (conditional GETs get 304), and the
+connections are kept alive, like the real server's.
+
+Usage:
+    python -m benchmarks.feed_server DIRECTORY [PORT]
+"""
+import contextlib
+import functools
+import http.server
+import sys
+import threading
+
+
+class FeedRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve(directory, port=0):
+    """
+    Serves a directory from a background thread for the duration of a with block.
+
+    Parameters:
+        directory (str): Directory holding the 'events' and 'gkg' archives.
+        port (int): Port to listen on; a free port if 0.
+
+    Yields:
+        str: Base URL of the server, e.g. 'http://127.0.0.1:8765'.
+    """
+    handler = functools.partial(FeedRequestHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(directory, port=8765):
+    with serve(directory, int(port)) as url:
+        print(f"Serving {directory} at {url}/events/{{DATE}}.export.CSV.zip and {url}/gkg/{{DATE}}.gkg.csv.zip")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,300 @@
+"""
+Writes synthetic GDELT 1.0 daily archives with the file layout, columns and value shapes
+of the real ones, for benchmarks and offline runs:
+
+    OUT_DIR/events/YYYYMMDD.export.CSV.zip   (tab-separated, no header, 58 columns)
+    OUT_DIR/gkg/YYYYMMDD.gkg.csv.zip         (tab-separated, header line, 11 columns)
+
+Actor countries and event codes are drawn from the CAMEO tables in src/cameo, a few codes
+far more often than the rest, as in the real feed. Row counts default to those of a busy
+2015-2019 day, and the string columns (names, places, URLs, theme lists, locations) have
+roughly production lengths. The output only depends on the seed and the dates.
+
+Usage:
+    python -m benchmarks.synthetic_gdelt OUT_DIR 2024-01-01 2024-01-07 [EVENT_ROWS] [GKG_ROWS]
+"""
+import io
+import json
+import os
+import sys
+import zipfile
+import numpy as np
+import pandas as pd
+from src.cameo.CameoReference import CameoReference
+from src.dataloaders.EventDataLoader import EVENT_SCHEMA
+from src.dataloaders.GraphDataLoader import GKG_SCHEMA
+
+EVENT_ROWS = 200_000
+GKG_ROWS = 150_000
+
+ACTOR_TYPES = [
+    "GOV", "MIL", "BUS", "MED", "CVL", "OPP", "REB", "COP", "JUD", "LEG", "EDU", "REF", "HLH",
+    "ELI", "SPY", "LAB", "AGR", "NGO", "IGO", "CRM", "MOD", "RAD", "IND", "SEP",
+]
+BASE_THEMES = [
+    "WAR", "ARMEDCONFLICT", "MILITARY", "KILL", "PROTEST", "ELECTION", "LEADER", "GENERAL_GOVERNMENT",
+    "GENERAL_HEALTH", "MEDICAL", "TERROR", "SECURITY_SERVICES", "CRISISLEX_CRISISLEXREC", "MEDIA_MSM",
+    "EPU_POLICY", "EPU_ECONOMY", "ECON_INFLATION", "ECON_STOCKMARKET", "ECON_TAXATION", "ECON_BANKRUPTCY",
+    "SOFTWARE", "EDUCATION", "LEGISLATION", "ARREST", "CRIME_VIOLENCE", "REFUGEES", "NEGOTIATIONS",
+    "SANCTIONS", "DEMOCRACY", "CORRUPTION", "FUELPRICES", "NATURAL_DISASTER", "USPEC_POLITICS_GENERAL1",
+    "USPEC_POLICY1", "MANMADE_DISASTER_IMPLIED", "TRIAL", "RELIGION", "DELAY", "TOURISM", "AGRICULTURE",
+]
+THEME_WORDS = [
+    "PRESIDENT", "MINISTER", "POLICE", "SOLDIER", "JOURNALIST", "STUDENT", "FARMER", "DOCTOR", "JUDGE",
+    "TEACHER", "WORKER", "LEADER", "OFFICIAL", "SPOKESMAN", "CITIZEN", "CHILD", "WOMEN", "VICTIM",
+    "GOVERNMENT", "POVERTY", "WATER", "ENERGY", "HEALTH", "FINANCE", "TRADE", "TRANSPORT", "HOUSING",
+    "FOOD", "CLIMATE", "INTERNET", "BORDER", "MIGRATION", "SECURITY", "TAXES", "LABOR", "SPORTS",
+]
+# The most frequent actor countries and event codes of the real feed, in order; the other
+# codes follow in a seeded random order.
+COMMON_COUNTRIES = [
+    "USA", "GBR", "RUS", "CHN", "FRA", "IND", "ISR", "DEU", "AUS", "CAN", "JPN", "TUR", "IRN",
+    "SYR", "PAK", "UKR", "NGA", "ZAF", "AFG", "IRQ", "EGY", "KOR", "PRK", "MEX", "BRA",
+]
+COMMON_EVENT_CODES = [
+    "042", "043", "010", "020", "040", "051", "036", "046", "057", "190", "173", "112",
+    "111", "050", "061", "013", "030", "084", "071", "193",
+]
+SYLLABLES = ["ka", "ro", "mi", "na", "te", "lo", "san", "ber", "dor", "vi", "ta", "len", "mar", "os", "qu", "el"]
+DOMAINS = ["news", "times", "post", "herald", "daily", "tribune", "observer", "gazette", "journal", "courier"]
+
+
+def zipf_order(codes, common, rng):
+    # The common codes first, then the rest in a random order.
+    rest = [code for code in codes if code not in set(common)]
+    rng.shuffle(rest)
+    return [code for code in common if code in set(codes)] + rest
+
+
+def zipf_weights(count, exponent=1.1):
+    # A few frequent values and a long tail.
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def words(rng, count, low=2, high=4):
+    lengths = rng.integers(low, high + 1, count)
+    picks = rng.integers(0, len(SYLLABLES), lengths.sum())
+    out, start = [], 0
+    for length in lengths:
+        out.append("".join(SYLLABLES[i] for i in picks[start:start + length]).capitalize())
+        start += length
+    return out
+
+
+def theme_vocabulary():
+    # About two thousand distinct themes, like the real GKG taxonomy.
+    themes = list(BASE_THEMES)
+    themes += [f"TAX_FNCACT_{word}" for word in THEME_WORDS]
+    themes += [f"TAX_ETHNICITY_{word}" for word in THEME_WORDS[:12]]
+    themes += [f"WB_{1000 + i}_{a}_{b}" for i, (a, b) in enumerate(
+        (a, b) for a in THEME_WORDS for b in THEME_WORDS if a != b
+    )][:1200]
+    themes += [f"CRISISLEX_C{i:02d}_{word}" for i, word in enumerate(THEME_WORDS)]
+    themes += [f"SOC_POINTSOFINTEREST_{word}" for word in THEME_WORDS]
+    themes += [f"TAX_WORLDLANGUAGES_{word}" for word in THEME_WORDS]
+    return themes
+
+
+class SyntheticGdelt:
+    """
+    Generator of synthetic daily GDELT 1.0 event and GKG archives.
+    """
+
+    def __init__(self, seed=2015):
+        """
+        Parameters:
+            seed (int): Seed of the generator; the same seed gives the same archives.
+        """
+        self.seed = seed
+        reference = CameoReference.shared()
+        countries = reference.table("country")
+        rng = np.random.default_rng(seed)
+        self.countries = zipf_order(list(countries), COMMON_COUNTRIES, rng)
+        self.country_names = [countries[code].upper() for code in self.countries]
+        # Event codes have at least 3 digits; the 2-digit table entries are the root codes.
+        self.event_codes = zipf_order([code for code in reference.table("event") if len(code) >= 3], COMMON_EVENT_CODES, rng)
+        self.country_weights = zipf_weights(len(self.countries))
+        self.event_weights = zipf_weights(len(self.event_codes))
+        self.goldstein = dict(zip(self.event_codes, np.round(rng.uniform(-10, 10, len(self.event_codes)), 1)))
+        self.themes = zipf_order(theme_vocabulary(), BASE_THEMES, rng)
+        self.theme_weights = zipf_weights(len(self.themes), exponent=0.9)
+
+    def _rng(self, feed, date):
+        return np.random.default_rng([self.seed, int(date), 0 if feed == "events" else 1])
+
+    def _places(self, rng, count):
+        cities, regions = words(rng, count), words(rng, count)
+        country = rng.choice(len(self.countries), count, p=self.country_weights)
+        names = [f"{city}, {region}, {self.country_names[i].title()}" for city, region, i in zip(cities, regions, country)]
+        fips = [self.countries[i][:2] for i in country]
+        return names, fips, country
+
+    def events(self, date, rows=EVENT_ROWS):
+        """
+        Generates the event export of a day.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            rows (int): Number of events.
+
+        Returns:
+            str: The tab-separated file content.
+        """
+        rng = self._rng("events", date)
+        day = pd.Timestamp(date)
+        # Most events happened on the day; some are reports of older ones.
+        sql_dates = day - pd.to_timedelta(np.where(rng.random(rows) < 0.85, 0, rng.integers(1, 365, rows)), unit="D")
+        columns = {
+            'GLOBALEVENTID': (np.arange(rows) + int(date) * 1000).astype(str),
+            'SQLDATE': sql_dates.strftime("%Y%m%d"),
+            'MonthYear': sql_dates.strftime("%Y%m"),
+            'Year': sql_dates.strftime("%Y"),
+            'FractionDate': [f"{value:.4f}" for value in sql_dates.year + sql_dates.dayofyear / 365],
+        }
+        for actor in ("Actor1", "Actor2"):
+            country = rng.choice(len(self.countries), rows, p=self.country_weights)
+            present = rng.random(rows) > (0.08 if actor == "Actor1" else 0.25)
+            typed = rng.random(rows) < 0.6
+            types = rng.choice(ACTOR_TYPES, rows)
+            columns[f'{actor}Code'] = [
+                (self.countries[c] + (t if y else "")) if p else "" for c, t, y, p in zip(country, types, typed, present)
+            ]
+            columns[f'{actor}Name'] = [self.country_names[c] if p else "" for c, p in zip(country, present)]
+            columns[f'{actor}CountryCode'] = [self.countries[c] if p else "" for c, p in zip(country, present)]
+            columns[f'{actor}KnownGroupCode'] = np.where(rng.random(rows) < 0.02, "UNO", "")
+            columns[f'{actor}EthnicCode'] = np.where(rng.random(rows) < 0.03, "kur", "")
+            columns[f'{actor}Religion1Code'] = np.where(rng.random(rows) < 0.05, rng.choice(["CHR", "MOS", "JEW"], rows), "")
+            columns[f'{actor}Religion2Code'] = np.where(rng.random(rows) < 0.01, "SUN", "")
+            columns[f'{actor}Type1Code'] = [t if y and p else "" for t, y, p in zip(types, typed, present)]
+            columns[f'{actor}Type2Code'] = np.where(rng.random(rows) < 0.03, rng.choice(ACTOR_TYPES, rows), "")
+            columns[f'{actor}Type3Code'] = ""
+
+        codes = rng.choice(self.event_codes, rows, p=self.event_weights)
+        roots = np.array([int(code[:2]) for code in codes])
+        columns.update({
+            'IsRootEvent': rng.integers(0, 2, rows).astype(str),
+            'EventCode': codes,
+            'EventBaseCode': [code[:3] for code in codes],
+            'EventRootCode': [code[:2] for code in codes],
+            'QuadClass': np.select([roots <= 5, roots <= 8, roots <= 13], ["1", "2", "3"], "4"),
+            'GoldsteinScale': [str(self.goldstein[code]) for code in codes],
+        })
+        sources = 1 + rng.geometric(0.5, rows)
+        columns.update({
+            'NumMentions': (sources + rng.geometric(0.3, rows)).astype(str),
+            'NumSources': sources.astype(str),
+            'NumArticles': (sources + rng.geometric(0.4, rows)).astype(str),
+            'AvgTone': [f"{value:.14g}" for value in rng.normal(-2.5, 3.5, rows)],
+        })
+        for geo in ("Actor1Geo", "Actor2Geo", "ActionGeo"):
+            geo_type = rng.choice(["0", "1", "2", "3", "4"], rows, p=[0.1, 0.3, 0.1, 0.2, 0.3])
+            located = geo_type != "0"
+            names, fips, _ = self._places(rng, rows)
+            columns[f'{geo}_Type'] = geo_type
+            columns[f'{geo}_FullName'] = np.where(located, names, "")
+            columns[f'{geo}_CountryCode'] = np.where(located, fips, "")
+            columns[f'{geo}_ADM1Code'] = np.where(located, [f"{code}{i:02d}" for code, i in zip(fips, rng.integers(1, 60, rows))], "")
+            columns[f'{geo}_Lat'] = np.where(located, np.round(rng.uniform(-60, 70, rows), 4).astype(str), "")
+            columns[f'{geo}_Long'] = np.where(located, np.round(rng.uniform(-180, 180, rows), 4).astype(str), "")
+            columns[f'{geo}_FeatureID'] = np.where(located, rng.integers(-3_000_000, 3_000_000, rows).astype(str), "")
+        columns['DATEADDED'] = date
+        slugs = words(rng, rows, 6, 14)
+        domains = rng.choice(DOMAINS, rows)
+        columns['SOURCEURL'] = [
+            f"https://www.{name.lower()[:8]}{domain}.com/{date[:4]}/{date[4:6]}/{date[6:]}/{slug.lower()}-{i}.html"
+            for i, (name, domain, slug) in enumerate(zip(words(rng, rows, 1, 2), domains, slugs))
+        ]
+        frame = pd.DataFrame({column: columns[column] for column in EVENT_SCHEMA}, index=range(rows))
+        return frame.to_csv(sep="\t", header=False, index=False)
+
+    def gkg(self, date, rows=GKG_ROWS):
+        """
+        Generates the GKG file of a day.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            rows (int): Number of GKG records.
+
+        Returns:
+            str: The tab-separated file content, with its header line.
+        """
+        rng = self._rng("gkg", date)
+        theme_counts = rng.integers(3, 40, rows)
+        picks = rng.choice(len(self.themes), theme_counts.sum(), p=self.theme_weights)
+        location_counts = rng.integers(0, 5, rows)
+        names, fips, country = self._places(rng, location_counts.sum())
+        lats, longs = np.round(rng.uniform(-60, 70, len(names)), 4), np.round(rng.uniform(-180, 180, len(names)), 4)
+        people = words(rng, rows * 2, 2, 3)
+        tones = rng.normal(0, 3, (rows, 6))
+        lines = ["\t".join(GKG_SCHEMA)]
+        theme_start = location_start = 0
+        for i in range(rows):
+            themes = ";".join(self.themes[t] for t in picks[theme_start:theme_start + theme_counts[i]]) + ";"
+            theme_start += theme_counts[i]
+            locations = ";".join(
+                f"4#{names[j]}#{fips[j]}#{fips[j]}{j % 60:02d}#{lats[j]}#{longs[j]}#-{j}"
+                for j in range(location_start, location_start + location_counts[i])
+            )
+            location_start += location_counts[i]
+            j = i % max(len(names), 1)
+            count = f"KILL#{i % 17 + 1}##1#{self.country_names[country[j]].title()}#{fips[j]}#{fips[j]}#0#0#{fips[j]};" \
+                if i % 9 == 0 and len(names) else ""
+            tone = tones[i]
+            articles = 1 + i % 5
+            lines.append("\t".join([
+                date, str(articles), count, themes, locations,
+                f"{people[2 * i].lower()} {people[2 * i + 1].lower()};", f"{people[2 * i + 1].lower()} ministry;",
+                "" if i % 97 == 0 else
+                f"{tone[0]:.14g},{abs(tone[1]):.14g},{abs(tone[2]):.14g},{abs(tone[3]):.14g},{abs(tone[4]) * 5:.14g},{abs(tone[5]):.14g}",
+                ",".join(str(int(date) * 1000 + (i * 7 + k) % 100_000) for k in range(i % 4)),
+                ";".join(f"{DOMAINS[(i + k) % len(DOMAINS)]}.com" for k in range(articles)),
+                "<UDIV>".join(f"https://{DOMAINS[(i + k) % len(DOMAINS)]}.com/{date}/story-{i}-{k}.html" for k in range(articles)),
+            ]))
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_dir, dates, event_rows=EVENT_ROWS, gkg_rows=GKG_ROWS):
+        """
+        Writes the event and GKG archives of the given days, and a manifest.json with the
+        settings and the uncompressed size of every file.
+
+        Parameters:
+            out_dir (str): Output directory.
+            dates (list): Dates in 'YYYYMMDD' format.
+            event_rows (int): Events per day.
+            gkg_rows (int): GKG records per day.
+
+        Returns:
+            dict: The manifest.
+        """
+        manifest = {"seed": self.seed, "event_rows": event_rows, "gkg_rows": gkg_rows, "dates": list(dates), "bytes": {}}
+        for feed, name, generate, rows in (
+            ("events", "{DATE}.export.CSV", self.events, event_rows),
+            ("gkg", "{DATE}.gkg.csv", self.gkg, gkg_rows),
+        ):
+            os.makedirs(os.path.join(out_dir, feed), exist_ok=True)
+            for date in dates:
+                member = name.format(DATE=date)
+                text = generate(date, rows).encode("utf-8")
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                    archive.writestr(member, text)
+                path = os.path.join(out_dir, feed, f"{member}.zip")
+                with open(path + ".tmp", "wb") as f:
+                    f.write(buffer.getvalue())
+                os.replace(path + ".tmp", path)
+                manifest["bytes"][f"{feed}/{member}.zip"] = len(text)
+        with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=1)
+        return manifest
+
+
+def main(out_dir, start, end, event_rows=EVENT_ROWS, gkg_rows=GKG_ROWS):
+    dates = [date.strftime("%Y%m%d") for date in pd.date_range(start, end)]
+    manifest = SyntheticGdelt().write(out_dir, dates, int(event_rows), int(gkg_rows))
+    total = sum(manifest["bytes"].values())
+    print(f"Wrote {len(dates)} days of events and GKG to {out_dir} ({total / 2 ** 20:.0f} MiB uncompressed).")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
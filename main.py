@@ -4,6 +4,7 @@ from src.app import APP
 
 def main():
     app = APP()
+    app.serve_metrics()
     app.intro_joke()
     st.markdown("---")
     app.select_app()
@@ -1,6 +1,9 @@
+import os
 import streamlit as st
 from src.apps.eventdata_app import EventData_APP
 from src.apps.graphdata_app import GraphData_APP
+from src.dataloaders.MetricsRegistry import MetricsRegistry
+from src.dataloaders.StageMetrics import StageMetrics
 
 class APP:
     def intro_joke(self):
@@ -35,6 +38,15 @@ class APP:
                 - Processed data can be downloaded as a ZIP file.
                 """
             )
+    def serve_metrics(self):
+        # GDELT_METRICS_PORT serves the stage metrics of all sessions for Prometheus at
+        # :PORT/metrics; GDELT_METRICS_LOG appends them as JSON lines to a file ('-' for stderr).
+        # Both are set up once per process; reruns keep the running server and log handler.
+        if os.environ.get("GDELT_METRICS_PORT"):
+            MetricsRegistry.shared().serve(int(os.environ["GDELT_METRICS_PORT"]))
+        if os.environ.get("GDELT_METRICS_LOG"):
+            StageMetrics.log_to(os.environ["GDELT_METRICS_LOG"])
+
     def select_app(self):
         st.sidebar.title("🦥 LazyLoader-GDELT")
         app_selection = st.sidebar.radio("Select an App", ["Event Data", "Graph Data"])
@@ -57,6 +69,11 @@ class APP:
 
         st.markdown("---")
 
+        st.markdown("# Columns:")
+        app.column_selector()
+
+        st.markdown("---")
+
         st.markdown("# Actor Code Filter:")
 
         with st.expander("🔎 Country Codes Searcher 🌍"):
@@ -92,12 +109,30 @@ class APP:
 
         st.markdown("---")
 
+        st.subheader("More Event Filters")
+        app.more_filter_inputs()
+
+        if st.button("Apply More Filters"):
+            app.more_filter()
+
+        st.markdown("---")
+
 
         if st.button("Load Data"):
             app.load_data()
 
+        if st.button("Fetch Latest Updates"):
+            app.load_updates()
+
+        app.sql_query()
+
         app.download_data_button()
 
+        st.markdown("---")
+
+        st.markdown("# Aggregates (Event Cube):")
+        app.event_cube()
+
     def graph_data_app(self):
         app = GraphData_APP()
 
@@ -109,8 +144,18 @@ class APP:
 
         st.markdown("---")
 
+        st.markdown("# Columns:")
+        app.column_selector()
+
+        st.markdown("---")
+
         if st.button("Load Data", key="graph_data_load"):
             app.load_data()
 
+        if st.button("Fetch Latest Updates", key="graph_data_updates"):
+            app.load_updates()
+
+        app.sql_query()
+
         app.download_data_button()
 
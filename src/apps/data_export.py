@@ -0,0 +1,249 @@
+import hashlib
+import io
+import json
+import os
+import pathlib
+import tempfile
+import time
+import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import streamlit as st
+from src.dataloaders.SpilledFrame import SpilledFrame
+from src.dataloaders.StageMetrics import StageMetrics
+
+
+# Export formats: key -> (label, file name, mime type).
+EXPORT_FORMATS = {
+    "zip": ("CSV in ZIP", "data.zip", "application/zip"),
+    "parquet": ("Parquet", "data.parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC / Feather", "data.arrow", "application/vnd.apache.arrow.file"),
+    "csv.zst": ("CSV, zstd-compressed", "data.csv.zst", "application/zstd"),
+}
+
+
+class DataExporter:
+    """
+    Builds the downloadable export of a loaded dataset once and serves it from disk.
+
+    The export is keyed by a fingerprint of the loaded frame, computed once when the data
+    is loaded. Streamlit reruns the script on every widget click; with the fingerprint as
+    key, those reruns reuse the file on disk instead of serializing and compressing the
+    whole frame again. Every format is written in row chunks, so only one chunk of the
+    serialized data is held in memory at a time.
+
+    Besides the original CSV in ZIP, the data can be exported as Parquet, Arrow IPC
+    (Feather v2) and zstd-compressed CSV. The binary formats keep the column types of the
+    loaded frame (int32/float32 columns and categoricals) instead of turning them into text.
+
+    A dataset spilled to disk by the loader (SpilledFrame) is streamed from its files the
+    same way, one chunk at a time, so it is never read into memory as a whole.
+    """
+
+    def __init__(self, export_dir=None, chunk_rows=100_000, max_age_seconds=24 * 3600):
+        """
+        Parameters:
+            export_dir (str, optional): Directory for export files; a temp directory if None.
+            chunk_rows (int): Number of rows serialized at a time.
+            max_age_seconds (int): Exports older than this are removed when a new one is built.
+        """
+        self.export_dir = export_dir or os.path.join(tempfile.gettempdir(), "lazyloader-gdelt-exports")
+        self.chunk_rows = chunk_rows
+        self.max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def fingerprint(data):
+        """
+        Computes a fingerprint of a DataFrame from its columns, dtypes and row hashes. A
+        SpilledFrame's fingerprint was computed the same way while it was written.
+
+        Parameters:
+            data (pd.DataFrame or SpilledFrame): The loaded data.
+
+        Returns:
+            str: Hex digest identifying this version of the data.
+        """
+        if isinstance(data, SpilledFrame):
+            return data.fingerprint()
+        digest = hashlib.sha256()
+        digest.update(repr(list(zip(data.columns, map(str, data.dtypes)))).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:32]
+
+    def _prune(self):
+        now = time.time()
+        for entry in os.scandir(self.export_dir):
+            try:
+                if now - entry.stat().st_mtime > self.max_age_seconds:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _path(self, fingerprint, fmt):
+        return os.path.join(self.export_dir, f"{fingerprint}.{fmt}")
+
+    def _chunks(self, data):
+        if isinstance(data, SpilledFrame):
+            yield from data.iter_chunks(self.chunk_rows)
+            return
+        for start in range(0, max(len(data), 1), self.chunk_rows):
+            yield data.iloc[start:start + self.chunk_rows]
+
+    def _arrow_schema(self, data):
+        # Inferred from the first chunk; object columns that are empty there are typed as strings,
+        # and so are the values of categoricals without categories (Arrow would make them doubles).
+        first = next(self._chunks(data))
+        schema = pa.Schema.from_pandas(first, preserve_index=False)
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+            elif pa.types.is_dictionary(field.type) and first[field.name].cat.categories.empty:
+                schema = schema.set(i, field.with_type(pa.dictionary(field.type.index_type, pa.string())))
+        return schema
+
+    def _arrow_chunks(self, data, schema):
+        for chunk in self._chunks(data):
+            yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    def _write_zip(self, data, path):
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            with zf.open("data.csv", "w", force_zip64=True) as member:
+                text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+                for i, chunk in enumerate(self._chunks(data)):
+                    chunk.to_csv(text, index=False, header=i == 0)
+                text.flush()
+                text.detach()
+
+    def _write_parquet(self, data, path):
+        schema = self._arrow_schema(data)
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for table in self._arrow_chunks(data, schema):
+                writer.write_table(table)
+
+    def _write_arrow(self, data, path):
+        schema = self._arrow_schema(data)
+        options = ipc.IpcWriteOptions(compression="zstd")
+        with ipc.new_file(path, schema, options=options) as writer:
+            for table in self._arrow_chunks(data, schema):
+                writer.write_table(table)
+
+    def _write_csv_zst(self, data, path):
+        schema = self._arrow_schema(data)
+        with pa.CompressedOutputStream(path, "zstd") as stream:
+            with pa_csv.CSVWriter(stream, schema) as writer:
+                for table in self._arrow_chunks(data, schema):
+                    writer.write_table(table)
+
+    def build(self, data, fingerprint, fmt="zip"):
+        """
+        Returns the path of the export of this dataset version in the given format, writing
+        it first if it does not exist yet. The size and write time of the file are stored
+        next to it, see export_stats().
+
+        Parameters:
+            data (pd.DataFrame or SpilledFrame): The loaded data.
+            fingerprint (str): Fingerprint of the data, see fingerprint().
+            fmt (str): One of the EXPORT_FORMATS keys.
+
+        Returns:
+            str: Path of the export file.
+        """
+        path = self._path(fingerprint, fmt)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._prune()
+
+        writers = {
+            "zip": self._write_zip,
+            "parquet": self._write_parquet,
+            "arrow": self._write_arrow,
+            "csv.zst": self._write_csv_zst,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.export_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            started = time.perf_counter()
+            writers[fmt](data, tmp_path)
+            seconds = time.perf_counter() - started
+            with open(f"{path}.json", "w") as f:
+                json.dump({"bytes": os.path.getsize(tmp_path), "seconds": seconds}, f)
+            os.replace(tmp_path, path)
+            # Logged and counted like the stages of a load, as feed 'export' and the format as stage.
+            metrics = StageMetrics("export")
+            metrics.record(None, fmt, seconds, rows_in=len(data), bytes_out=os.path.getsize(path))
+            metrics.publish()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def build_zip(self, data, fingerprint):
+        """
+        Returns the path of 'data.zip' (containing 'data.csv') for this dataset version,
+        writing it first if it does not exist yet.
+
+        Parameters:
+            data (pd.DataFrame or SpilledFrame): The loaded data.
+            fingerprint (str): Fingerprint of the data, see fingerprint().
+
+        Returns:
+            str: Path of the ZIP file.
+        """
+        return self.build(data, fingerprint, "zip")
+
+    def export_stats(self, fingerprint):
+        """
+        Returns the size and write time of the exports already built for a dataset version.
+
+        Parameters:
+            fingerprint (str): Fingerprint of the data, see fingerprint().
+
+        Returns:
+            dict: Format key to {'bytes': int, 'seconds': float}.
+        """
+        stats = {}
+        for fmt in EXPORT_FORMATS:
+            path = self._path(fingerprint, fmt)
+            try:
+                with open(f"{path}.json") as f:
+                    stats[fmt] = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+        return stats
+
+    def download_button(self, data, fingerprint):
+        """
+        Shows the export format selector and the download button for the chosen format,
+        together with the size and write time of every format built so far. The export is
+        built right away, but only read when the button is clicked, not on every rerun.
+
+        Parameters:
+            data (pd.DataFrame or SpilledFrame): The loaded data.
+            fingerprint (str): Fingerprint of the data, see fingerprint().
+        """
+        fmt = st.selectbox(
+            "Export format",
+            list(EXPORT_FORMATS),
+            format_func=lambda key: EXPORT_FORMATS[key][0],
+            key="export_format",
+        )
+        label, file_name, mime = EXPORT_FORMATS[fmt]
+        self.build(data, fingerprint, fmt)
+        st.download_button(
+            label=f"Download Data as {label}",
+            # Built again on click if it was pruned in the meantime.
+            data=lambda: pathlib.Path(self.build(data, fingerprint, fmt)).read_bytes(),
+            file_name=file_name,
+            mime=mime
+        )
+
+        for key, stats in self.export_stats(fingerprint).items():
+            st.caption(
+                f"{EXPORT_FORMATS[key][0]}: {stats['bytes'] / 1024 ** 2:.1f} MiB, "
+                f"written in {stats['seconds']:.2f} s"
+            )
@@ -1,20 +1,29 @@
 import streamlit as st
+from src.apps.data_export import DataExporter
+from src.apps.streamlit_reporter import StreamlitReporter
+from src.cameo.CameoReference import CameoReference
+from src.dataloaders.DuckDBEngine import DuckDBEngine
+from src.dataloaders.EventCube import CUBE_KEYS, CUBE_PERIODS
 from src.dataloaders.EventDataLoader import EventDataLoader
-import io
-import zipfile
-import pandas as pd
+from src.dataloaders.SpilledFrame import SpilledFrame
+import time
 from datetime import date, timedelta
 
 
+QUAD_CLASSES = {1: "Verbal Cooperation", 2: "Material Cooperation", 3: "Verbal Conflict", 4: "Material Conflict"}
+ROOT_EVENT_OPTIONS = {"All events": None, "Only root events": True, "Only non-root events": False}
+
+
 class EventData_APP:
 
     def __init__(self):
 
-        st.session_state["data_loader"] = EventDataLoader()
+        st.session_state["data_loader"] = EventDataLoader(st.session_state, StreamlitReporter())
 
         st.session_state.setdefault("start_date", None)
         st.session_state.setdefault("end_date", None)
         st.session_state.setdefault("data", None)
+        st.session_state.setdefault("data_fingerprint", None)
         st.session_state.setdefault("actor_code_mask", None)
         st.session_state.setdefault("actor_1_code_list", [])
         st.session_state.setdefault("actor_2_code_list", [])
@@ -31,6 +40,7 @@ class EventData_APP:
             - **Actor Filters:** Narrow down events by specifying Actor 1 and Actor 2 codes.
             - **Event Code Filters:** Filter events by specific Event Codes (entered as strings, so "081" remains "081").
             - **Root Event Code Filters:** Target events under broader categories by using Root Event Codes.
+            - **More Event Filters:** Keep only some quad classes, action countries, root events, a Goldstein scale or tone range, or events with a minimum number of mentions and sources.
             - **Event Code Dictionary:** Browse a hierarchical view of Event Codes and their descriptions to help you decide on filters.
             """
         )
@@ -103,17 +113,27 @@ class EventData_APP:
             - Click the **"Load Data"** button to start retrieving data from GDELT.
             - A progress bar will show the download progress.
             - Once the data is loaded, the application will display the number of records retrieved.
+            - Click **"Fetch Latest Updates"** to append the GDELT 2.0 events published every 15 minutes since the last fetch (the newest slice on the first click), filtered the same way.
             """
         )
 
         st.header("7️⃣ Download Data")
         st.markdown(
             """
-            - After data is loaded and filtered, you can download it by clicking **"Download Data as ZIP"**.
+            - After data is loaded and filtered, choose an **Export format** (CSV in ZIP, Parquet, Arrow IPC / Feather or zstd-compressed CSV) and click the **Download** button.
             - The downloaded file will contain a CSV file (`data.csv`) with the filtered event records.
             """
         )
 
+        st.header("8️⃣ Aggregate Queries")
+        st.markdown(
+            """
+            - Tick **"Build the event cube while loading"** before loading; every loaded day (all of its events, not only the filtered ones) is then summarized in the event cube.
+            - Pick a period, the dimensions to **Group by** and optional country and root code filters, and click **"Run Aggregate Query"**. The counts, mentions, articles and mean Goldstein scale and tone come from the cube, even over several years, without loading the events again.
+            - Days that were never loaded with the cube turned on are listed in a warning and left out.
+            """
+        )
+
         st.markdown("---")
         st.subheader("⚠️ Notes")
         st.markdown(
@@ -122,6 +142,7 @@ class EventData_APP:
             - **Actor filters** refine data based on international actor interactions.
             - **Event Code filters** let you narrow down events by specific codes. Be sure to enter event codes as strings (e.g., "081" remains "081").
             - **Root Event Code filters** allow you to target broader event categories.
+            - Only the columns picked in the **Columns** section are loaded and exported; leave it empty to get all columns.
             - If no date range is selected, **no data will be loaded**.
             - **Errors** may occur if GDELT data is unavailable for certain dates.
             - LazyLoader currently supports data between **2013-04-01** and **yesterday’s date**.
@@ -137,6 +158,13 @@ class EventData_APP:
         st.session_state["start_date"] = st.date_input("Start Date")
         st.session_state["end_date"] = st.date_input("End Date")
 
+    def column_selector(self):
+        st.write(
+            "Choose the columns to load and export. Columns needed by the active filters are read "
+            "automatically, but they are not exported unless selected."
+        )
+        st.multiselect("Columns", options=st.session_state["columns"], key="selected_columns")
+
     def load_data(self):
         start_date = st.session_state.get("start_date")
         end_date = st.session_state.get("end_date")
@@ -157,21 +185,116 @@ class EventData_APP:
             return
 
         st.session_state["data"] = data
+        st.session_state["data_fingerprint"] = DataExporter.fingerprint(data)
         st.write(f"Loaded {len(data)} records.")
 
+    def load_updates(self):
+        data_loader = st.session_state.get("data_loader")
+        try:
+            # GDELT 2.0'ın 15 dakikalık dilimleri; aynı filtreler uygulanır, yalnızca yeni satırlar gelir.
+            updates = data_loader.load_updates()
+        except Exception as e:
+            st.error("An unexpected error occurred while loading the updates.")
+            st.error(str(e))
+            return
+
+        data = st.session_state.get("data")
+        if isinstance(data, SpilledFrame):
+            # Diske taşmış veriye yeni satırlar ayrı bir parça olarak eklenir.
+            if not updates.empty:
+                data.append(updates)
+            updates = data
+        elif data is not None and not data.empty and not updates.empty:
+            updates = data_loader.concat_frames([data, updates], list(data.columns))
+        elif data is not None and not data.empty:
+            updates = data
+        st.session_state["data"] = updates
+        st.session_state["data_fingerprint"] = DataExporter.fingerprint(updates)
+        st.write(f"Dataset now has {len(updates)} records (last update: {st.session_state['events_v2_last_seen']}).")
+
+    def event_cube(self):
+        st.write(
+            "The event cube keeps, per day, the number of events, summed mentions and articles and the "
+            "mean Goldstein scale and tone for every country pair, root event code and quad class. "
+            "Turn it on before loading to add the loaded days to it; aggregate queries are then answered "
+            "from the cube without loading any events."
+        )
+        st.checkbox("Build the event cube while loading", key="build_cube")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            cube_start = st.date_input("From", value=date.today() - timedelta(days=365), key="cube_start")
+        with col2:
+            cube_end = st.date_input("To", value=date.today() - timedelta(days=1), key="cube_end")
+        by = st.multiselect("Group by", options=list(CUBE_PERIODS) + CUBE_KEYS, default=["Year"], key="cube_by")
+        actor_1_countries = st.text_input("Actor 1 country codes (comma-separated)", key="cube_actor1")
+        actor_2_countries = st.text_input("Actor 2 country codes (comma-separated)", key="cube_actor2")
+        root_codes = st.text_input("Root event codes (comma-separated)", key="cube_root_codes")
+
+        if st.button("Run Aggregate Query"):
+            def split(text):
+                return [value.strip() for value in text.split(",") if value.strip()]
+
+            filters = {
+                'Actor1CountryCode': split(actor_1_countries),
+                'Actor2CountryCode': split(actor_2_countries),
+                'EventRootCode': split(root_codes),
+            }
+            started = time.perf_counter()
+            try:
+                result = st.session_state["data_loader"].query_cube(cube_start, cube_end, by, filters)
+            except Exception as e:
+                st.error("An unexpected error occurred while querying the event cube.")
+                st.error(str(e))
+                return
+            st.caption(f"{len(result)} groups in {(time.perf_counter() - started) * 1000:.0f} ms.")
+            st.dataframe(result)
+
+    def sql_query(self):
+        # DuckDB isteğe bağlı ('sql' ekstrası); kurulu değilse SQL bölümü hiç gösterilmez.
+        if not DuckDBEngine.available():
+            return
+        with st.expander("🦆 SQL (DuckDB)"):
+            st.write(
+                "Runs SQL on the days of the selected date range that are in the Parquet store (every loaded "
+                "day is), as the view `events`. The query starts with the active filters as its WHERE clause; "
+                "edit it freely, e.g. to GROUP BY. The result replaces the loaded data, so it can be "
+                "downloaded like it."
+            )
+            start_date = st.session_state.get("start_date")
+            end_date = st.session_state.get("end_date")
+            data_loader = st.session_state["data_loader"]
+            sql = st.text_area("SQL", value=data_loader.default_sql(), height=150)
+
+            if st.button("Run SQL Query"):
+                if start_date is None or end_date is None:
+                    st.warning("Please select both start and end dates!")
+                    return
+                started = time.perf_counter()
+                try:
+                    result = data_loader.query_sql(start_date, end_date, sql)
+                except Exception as e:
+                    st.error("An unexpected error occurred while running the SQL query.")
+                    st.error(str(e))
+                    return
+                st.session_state["data"] = result
+                st.session_state["data_fingerprint"] = DataExporter.fingerprint(result)
+                st.caption(f"{len(result)} rows in {(time.perf_counter() - started) * 1000:.0f} ms.")
+                st.dataframe(result.head(100))
+
     def camoe_code_searcher(self):
-        df = pd.read_csv("src/cameo/CAMEO_country.txt", sep="\t", header=None, names=["CODE", "LABEL"], low_memory=False).loc[1:].reset_index(
-            drop=True).copy()
-
-        if df is not None:
-            country_dict = dict(zip(df["LABEL"], df["CODE"]))
-            search_query = st.text_input("Search for a country:")
-            if search_query:
-                suggestions = [country for country in country_dict.keys() if
-                               country.lower().startswith(search_query.lower())]
-                selected_country = st.selectbox("Select a country:", suggestions, index=0 if suggestions else None)
-                if selected_country:
-                    st.write(f"**Selected Country Code:** {country_dict[selected_country]}")
+        # Ülke tablosu süreç başına bir kez yüklenir; arama trie ve bulanık eşleşme ile yapılır.
+        reference = CameoReference.shared()
+        search_query = st.text_input("Search for a country:")
+        if search_query:
+            suggestions = reference.search("country", search_query)
+            selected_country = st.selectbox(
+                "Select a country:", suggestions, index=0 if suggestions else None,
+                format_func=lambda code: f"{reference.label('country', code)} ({code})"
+            )
+            if selected_country:
+                st.write(f"**Selected Country Code:** {selected_country}")
+
     def actor_buttons(self, actor):
         """
         Tek bir fonksiyon kullanarak, Actor 1 veya Actor 2 için
@@ -307,7 +430,7 @@ class EventData_APP:
         st.write("Event Filters Applied!")
         data_loader = st.session_state.get("data_loader")
         if data_loader:
-            data_loader.set_event_filters(st.session_state["event_code_list"])
+            data_loader.set_eventcode_filters(st.session_state["event_code_list"])
         else:
             st.error("Data loader not available.")
 
@@ -323,88 +446,69 @@ class EventData_APP:
             data_loader.set_root_eventcode_filters(st.session_state["root_event_code_list"])
         else:
             st.error("Data loader not available.")
-    def download_data_button(self):
-        data = st.session_state.get("data")
-        if data is not None:
-            csv_data = data.to_csv(index=False).encode("utf-8")
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                zf.writestr("data.csv", csv_data)
-            zip_buffer.seek(0)
-            st.download_button(
-                label="Download Data as ZIP",
-                data=zip_buffer,
-                file_name="data.zip",
-                mime="application/zip"
-            )
-        else:
-            st.info("No data loaded! Please load the data first.")
-
-    def load_cameo_event_codes(self, file_path):
-        """
-        Loads the CAMEO event codes from a text file.
 
-        Expects the first line to be a header. Each subsequent line should contain
-        the event code and its description separated by a tab or whitespace.
-
-        Parameters:
-            file_path (str): Path to the CAMEO event code text file.
-
-        Returns:
-            dict: A dictionary mapping event code to a node dictionary containing the
-                  code, description, and an empty children dict.
+    def more_filter_inputs(self):
         """
-        codes = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        # Skip the header line
-        for line in lines[1:]:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split('\t')
-            if len(parts) < 2:
-                parts = line.split()
-            code = parts[0]
-            description = " ".join(parts[1:])
-            codes[code] = {'code': code, 'desc': description, 'children': {}}
-
-        return codes
-
-    def build_event_tree(self, codes):
+        Displays the inputs of the quad class, action country, root event, Goldstein scale,
+        tone and mention/source count filters. A slider left at its full range or a minimum
+        of 0 leaves that filter off.
         """
-        Constructs a hierarchical tree of event codes.
-
-        For each code (except top-level 2-digit codes), its parent is determined by
-        finding the longest prefix (with a minimum length of 2) that exists in the codes.
-
-        Parameters:
-            codes (dict): Dictionary of event code nodes.
+        col1, col2 = st.columns(2)
+        with col1:
+            st.multiselect(
+                "Quad Classes", list(QUAD_CLASSES), format_func=lambda quad_class: f"{quad_class}: {QUAD_CLASSES[quad_class]}",
+                key="quad_class_input"
+            )
+            st.text_input("Action Country Codes (comma-separated, e.g. US, UK)", key="action_country_input")
+            st.selectbox("Root Events", list(ROOT_EVENT_OPTIONS), key="root_event_input")
+        with col2:
+            st.slider("Goldstein Scale", -10.0, 10.0, (-10.0, 10.0), step=0.1, key="goldstein_input")
+            st.slider("Average Tone", -100.0, 100.0, (-100.0, 100.0), step=0.5, key="avg_tone_input")
+            st.number_input("Minimum Mentions", min_value=0, value=0, step=1, key="min_mentions_input")
+            st.number_input("Minimum Sources", min_value=0, value=0, step=1, key="min_sources_input")
 
-        Returns:
-            dict: A hierarchical tree of event codes.
+    def more_filter(self):
         """
-        tree = {}
-        # Process codes sorted by length (shorter codes first)
-        for code in sorted(codes.keys(), key=len):
-            node = codes[code]
-            if len(code) == 2:
-                # Top-level code
-                tree[code] = node
-            else:
-                parent_found = False
-                # Look for a parent: try prefixes from len(code)-1 down to 2 characters
-                for i in range(len(code) - 1, 1, -1):
-                    parent_code = code[:i]
-                    if parent_code in codes:
-                        codes[parent_code]['children'][code] = node
-                        parent_found = True
-                        break
-                if not parent_found:
-                    # If no parent is found, add as a top-level code (rare case)
-                    tree[code] = node
-        return tree
+        Applies the filters entered in more_filter_inputs by passing them to the data loader.
+        """
+        def bounds(values, full):
+            # The ends of a slider left at the end of its scale do not filter.
+            bounds = tuple(None if value == limit else value for value, limit in zip(values, full))
+            return None if bounds == (None, None) else bounds
+
+        quad_classes = sorted(st.session_state.get("quad_class_input", []))
+        countries = [
+            code.strip().upper() for code in st.session_state.get("action_country_input", "").split(",") if code.strip()
+        ]
+        is_root_event = ROOT_EVENT_OPTIONS[st.session_state.get("root_event_input", "All events")]
+        goldstein_range = bounds(st.session_state.get("goldstein_input", (-10.0, 10.0)), (-10.0, 10.0))
+        avg_tone_range = bounds(st.session_state.get("avg_tone_input", (-100.0, 100.0)), (-100.0, 100.0))
+        min_num_mentions = st.session_state.get("min_mentions_input", 0) or None
+        min_num_sources = st.session_state.get("min_sources_input", 0) or None
+
+        st.write("Quad Classes:", quad_classes)
+        st.write("Action Country Codes:", countries)
+        st.write("Root Events:", st.session_state.get("root_event_input", "All events"))
+        st.write("Goldstein Scale:", goldstein_range or "any", "Average Tone:", avg_tone_range or "any")
+        st.write("Minimum Mentions:", min_num_mentions or 0, "Minimum Sources:", min_num_sources or 0)
+        st.write("More Filters Applied!")
+        data_loader = st.session_state.get("data_loader")
+        if data_loader:
+            data_loader.set_quadclass_filters(quad_classes)
+            data_loader.set_action_geo_filters(countries)
+            data_loader.set_root_event_filter(is_root_event)
+            data_loader.set_range_filters(goldstein_range, avg_tone_range, min_num_mentions, min_num_sources)
+        else:
+            st.error("Data loader not available.")
+    def download_data_button(self):
+        data = st.session_state.get("data")
+        if data is not None:
+            # Each export format is built once per loaded dataset and reused on every rerun.
+            if st.session_state.get("data_fingerprint") is None:
+                st.session_state["data_fingerprint"] = DataExporter.fingerprint(data)
+            DataExporter().download_button(data, st.session_state["data_fingerprint"])
+        else:
+            st.info("No data loaded! Please load the data first.")
 
     def display_event_tree(self, tree, indent=0):
         """
@@ -431,15 +535,12 @@ class EventData_APP:
 
     def display_cameo_event_code_dictionary(self):
         """
-        Loads the CAMEO event code dictionary from a text file,
-        builds the hierarchical tree, and displays it.
+        Displays the CAMEO event code hierarchy, built once per process by CameoReference.
 
         Note: We do not wrap the entire dictionary in an outer expander,
               so that the top-level expanders are not nested.
         """
-        file_path = "src/cameo/CAMEO_event.txt"  # Update this path as needed
-        codes = self.load_cameo_event_codes(file_path)
-        tree = self.build_event_tree(codes)
+        tree = CameoReference.shared().event_tree()
 
         st.markdown("### CAMEO Event Code Dictionary")
         st.markdown("Browse the hierarchical event codes by clicking on each top-level expander below.")
@@ -1,17 +1,20 @@
 import streamlit as st
-from src.dataloaders.GraphDataLoader import GraphDataLoader
-import io
-import zipfile
+from src.apps.data_export import DataExporter
+from src.apps.streamlit_reporter import StreamlitReporter
+from src.dataloaders.DuckDBEngine import DuckDBEngine
+from src.dataloaders.GraphDataLoader import GraphDataLoader, GKG_SCHEMA
 import pandas as pd
+import time
 from datetime import date, timedelta
 
 
 class GraphData_APP:
     def __init__(self):
-        st.session_state["data_loader"] = GraphDataLoader()
+        st.session_state["data_loader"] = GraphDataLoader(st.session_state, StreamlitReporter())
         st.session_state.setdefault("start_date", None)
         st.session_state.setdefault("end_date", None)
         st.session_state.setdefault("data", None)
+        st.session_state.setdefault("data_fingerprint", None)
         st.session_state.setdefault("keywords", "")
 
     def how_to_use(self):
@@ -35,6 +38,8 @@ class GraphData_APP:
         st.markdown(
             """
             - Enter one or more keywords (separated by commas) to filter the data by the **THEMES** column.
+            - Keywords can be combined with **AND**, **OR**, **NOT** and parentheses, e.g. `WAR AND NOT TAX_FNCACT_*`.
+            - A keyword ending in `*` matches every theme starting with it, e.g. `TAX_FNCACT_*`.
             - If no keywords are entered, the data will include all records.
             """
         )
@@ -45,13 +50,14 @@ class GraphData_APP:
             - Click the **"Load Data"** button to start retrieving data from GDELT.
             - A progress bar will indicate the download progress.
             - Once the data is loaded, the application will display the number of records retrieved.
+            - Click **"Fetch Latest Updates"** to append the GDELT 2.0 GKG records published every 15 minutes since the last fetch (the newest slice on the first click), filtered by the same keywords.
             """
         )
 
         st.header("4️⃣ Download Data")
         st.markdown(
             """
-            - After data is loaded, click **"Download Data as ZIP"** to download the filtered data.
+            - After data is loaded, choose an **Export format** (CSV in ZIP, Parquet, Arrow IPC / Feather or zstd-compressed CSV) and click the **Download** button.
             - The downloaded file will contain a CSV file (`data.csv`) with the processed GKG records.
             """
         )
@@ -62,6 +68,7 @@ class GraphData_APP:
             """
             - The application fetches data from **GDELT in CSV format**.
             - Filtering is performed on the **THEMES** column using the provided keywords.
+            - Only the columns picked in the **Columns** section are loaded and exported; leave it empty to get all columns.
             - If you don’t select a date range, **no data will be loaded**.
             - Errors may occur if GDELT data is unavailable for certain dates.
 
@@ -78,6 +85,13 @@ class GraphData_APP:
         st.session_state["end_date"] = st.date_input("End Date", value=date.today() - timedelta(days=1))
         st.session_state["keywords"] = st.text_input("Enter keywords for filtering (comma-separated)", value="")
 
+    def column_selector(self):
+        st.write(
+            "Choose the GKG columns to load and export. THEMES is read automatically when keywords "
+            "are given, but it is not exported unless selected."
+        )
+        st.multiselect("Columns", options=list(GKG_SCHEMA), key="gkg_selected_columns")
+
     def load_data(self):
         start_date = st.session_state.get("start_date")
         end_date = st.session_state.get("end_date")
@@ -104,21 +118,72 @@ class GraphData_APP:
             return
 
         st.session_state["data"] = data
+        st.session_state["data_fingerprint"] = DataExporter.fingerprint(data)
         st.write(f"Loaded {len(data)} records.")
 
+    def load_updates(self):
+        keywords = st.session_state.get("keywords")
+        data_loader = st.session_state.get("data_loader")
+        keyword_list = [kw.strip() for kw in keywords.split(",") if kw.strip()] if keywords else []
+
+        # Yeni dilimler yüklü verinin sonuna eklenir.
+        data_loader.data = st.session_state.get("data")
+        try:
+            data_loader.load_updates(keyword_list)
+        except Exception as e:
+            st.error("An unexpected error occurred while loading the updates.")
+            st.error(str(e))
+            return
+
+        data = data_loader.get_data()
+        st.session_state["data"] = data
+        st.session_state["data_fingerprint"] = DataExporter.fingerprint(data)
+        st.write(f"Dataset now has {len(data)} records (last update: {st.session_state['gkg_v2_last_seen']}).")
+
+    def sql_query(self):
+        # DuckDB is optional (the 'sql' extra); without it the SQL section is not shown.
+        if not DuckDBEngine.available():
+            return
+        with st.expander("🦆 SQL (DuckDB)"):
+            st.write(
+                "Runs SQL on the days of the selected date range that are in the Parquet store (every loaded "
+                "day is), as the view `gkg`. The query starts with the keywords as its WHERE clause; edit it "
+                "freely, e.g. to GROUP BY. The result replaces the loaded data, so it can be downloaded like it."
+            )
+            start_date = st.session_state.get("start_date")
+            end_date = st.session_state.get("end_date")
+            keywords = st.session_state.get("keywords")
+            keyword_list = [kw.strip() for kw in keywords.split(",") if kw.strip()] if keywords else []
+            data_loader = st.session_state["data_loader"]
+            try:
+                default_sql = data_loader.default_sql(keyword_list)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            sql = st.text_area("SQL", value=default_sql, height=150)
+
+            if st.button("Run SQL Query", key="graph_data_run_sql"):
+                if start_date is None or end_date is None:
+                    st.warning("Please select both start and end dates!")
+                    return
+                started = time.perf_counter()
+                try:
+                    result = data_loader.query_sql(start_date, end_date, sql)
+                except Exception as e:
+                    st.error("An unexpected error occurred while running the SQL query.")
+                    st.error(str(e))
+                    return
+                st.session_state["data"] = result
+                st.session_state["data_fingerprint"] = DataExporter.fingerprint(result)
+                st.caption(f"{len(result)} rows in {(time.perf_counter() - started) * 1000:.0f} ms.")
+                st.dataframe(result.head(100))
+
     def download_data_button(self):
         data = st.session_state.get("data")
         if data is not None and not data.empty:
-            csv_data = data.to_csv(index=False).encode("utf-8")
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                zf.writestr("data.csv", csv_data)
-            zip_buffer.seek(0)
-            st.download_button(
-                label="Download Data as ZIP",
-                data=zip_buffer,
-                file_name="data.zip",
-                mime="application/zip"
-            )
+            # Each export format is built once per loaded dataset and reused on every rerun.
+            if st.session_state.get("data_fingerprint") is None:
+                st.session_state["data_fingerprint"] = DataExporter.fingerprint(data)
+            DataExporter().download_button(data, st.session_state["data_fingerprint"])
         else:
             st.info("No data loaded! Please load the data first.")
@@ -0,0 +1,41 @@
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from src.dataloaders.LoadReporter import LoadReporter
+
+
+class StreamlitReporter(LoadReporter):
+    """
+    Shows the progress and messages of a load in the running Streamlit page.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._ctx = None
+        self._progress_bar = None
+        self._progress_text = None
+
+    def thread_hook(self, thread):
+        # Worker threads need the script run context to read st.session_state.
+        add_script_run_ctx(thread, self._ctx or get_script_run_ctx())
+
+    def start(self, total):
+        self._ctx = get_script_run_ctx()
+        self._progress_bar = st.progress(0)
+        self._progress_text = st.empty()
+
+    def progress(self, done, total, date):
+        self._progress_text.text(f"Loading data for {date}...")
+        self._progress_bar.progress(done / total)
+
+    def finish(self):
+        if self._progress_text is not None:
+            self._progress_text.text("Data loading completed!")
+
+    def metrics(self, metrics):
+        with st.expander("⏱️ Load Metrics"):
+            st.caption("Time, data volume and source of every stage, in total and per day.")
+            st.dataframe(metrics.summary(), hide_index=True)
+            st.dataframe(metrics.to_frame(), hide_index=True)
+
+    def _emit(self, level, message):
+        {"detail": st.caption, "info": st.info, "warning": st.warning, "error": st.error}[level](message)
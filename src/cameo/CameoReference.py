@@ -0,0 +1,201 @@
+import difflib
+import glob
+import os
+import re
+import threading
+from src.cameo.PrefixTrie import PrefixTrie
+
+# The CAMEO tables shipped with the app: 'CAMEO_<table>.txt', a header line followed by
+# tab-separated code and label lines.
+CAMEO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class CameoReference:
+    """
+    The CAMEO code tables (countries, event codes and any other 'CAMEO_<table>.txt' in the
+    cameo directory), loaded once per process.
+
+    Every table gets prefix tries over its codes, over its labels and over every later word
+    of its labels, so 'kor' finds both 'Korea' and 'North Korea'. Lookups stop once they
+    have enough codes, so a one-letter query costs about as much as a long one. search()
+    falls back to fuzzy matching (difflib) when no prefix matches, e.g. for a misspelled
+    name. The event code hierarchy is built once as well. The returned tables and tree are
+    shared; callers must not modify them.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory=CAMEO_DIR):
+        """
+        Parameters:
+            directory (str): Directory holding the 'CAMEO_<table>.txt' files.
+        """
+        self.directory = directory
+        self.tables = {}
+        self._code_tries = {}
+        self._label_tries = {}
+        self._word_tries = {}
+        self._labels = {}
+        for path in sorted(glob.glob(os.path.join(directory, "CAMEO_*.txt"))):
+            name = os.path.basename(path)[len("CAMEO_"):-len(".txt")].lower()
+            self.tables[name] = self.read_table(path)
+            self._index(name)
+        self._event_tree = self.build_event_tree(self.tables.get("event", {}))
+
+    @classmethod
+    def shared(cls, directory=CAMEO_DIR):
+        """
+        Returns the process-wide reference for a directory, so that all Streamlit sessions
+        and reruns share the tables loaded once.
+
+        Parameters:
+            directory (str): Directory holding the 'CAMEO_<table>.txt' files.
+
+        Returns:
+            CameoReference: The shared reference.
+        """
+        key = os.path.abspath(directory)
+        with cls._instances_lock:
+            reference = cls._instances.get(key)
+            if reference is None:
+                reference = cls._instances[key] = cls(directory)
+            return reference
+
+    @staticmethod
+    def read_table(path):
+        """
+        Reads a CAMEO table. The first line is a header; every other line holds a code and
+        its label, separated by a tab or, failing that, whitespace.
+
+        Parameters:
+            path (str): The table file.
+
+        Returns:
+            dict: Code to label, in file order.
+        """
+        table = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        for line in lines[1:]:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split('\t')
+            if len(parts) < 2:
+                parts = line.split()
+            table[parts[0]] = " ".join(parts[1:])
+        return table
+
+    def _index(self, name):
+        code_trie, label_trie, word_trie = PrefixTrie(), PrefixTrie(), PrefixTrie()
+        labels = {}
+        for code, label in self.tables[name].items():
+            code_trie.insert(code.lower(), code)
+            lowered = label.lower()
+            label_trie.insert(lowered, code)
+            for match in re.finditer(r"\w+", lowered):
+                if match.start() > 0:
+                    word_trie.insert(lowered[match.start():], code)
+            labels.setdefault(lowered, []).append(code)
+        self._code_tries[name] = code_trie
+        self._label_tries[name] = label_trie
+        self._word_tries[name] = word_trie
+        self._labels[name] = labels
+
+    def table(self, name):
+        """
+        Returns a CAMEO table.
+
+        Parameters:
+            name (str): Table name, e.g. 'country' or 'event'.
+
+        Returns:
+            dict: Code to label.
+        """
+        return self.tables[name]
+
+    def label(self, name, code):
+        """
+        Returns the label of a code, or None if the table does not have it.
+
+        Parameters:
+            name (str): Table name, e.g. 'country' or 'event'.
+            code (str): The CAMEO code.
+
+        Returns:
+            str or None: The label.
+        """
+        return self.tables[name].get(code)
+
+    def search(self, name, query, limit=20, fuzzy=True):
+        """
+        Finds the codes whose code or label matches a query.
+
+        Labels starting with the query come first, then labels with a word starting with
+        it, then codes starting with it. If nothing matches, e.g. for a misspelled name,
+        the closest labels and codes by difflib's similarity ratio are returned instead.
+
+        Parameters:
+            name (str): Table name, e.g. 'country' or 'event'.
+            query (str): Text typed by the user; case-insensitive.
+            limit (int): Maximum number of codes returned.
+            fuzzy (bool): Fall back to fuzzy matches when no prefix matches.
+
+        Returns:
+            list: Matching codes, best first.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        table = self.tables[name]
+        found = {}
+        # Matches from the start of the label rank above matches of a later word. Each trie
+        # is asked for 'limit' codes: those already found are at most len(found) of them.
+        for trie in (self._label_tries[name], self._word_tries[name], self._code_tries[name]):
+            for code in trie.find(query, limit):
+                found.setdefault(code)
+
+        if fuzzy and not found:
+            labels = self._labels[name]
+            for label in difflib.get_close_matches(query, labels, n=limit, cutoff=0.6):
+                for code in labels[label]:
+                    found.setdefault(code)
+            codes = {code.lower(): code for code in table}
+            for code in difflib.get_close_matches(query, codes, n=limit, cutoff=0.6):
+                found.setdefault(codes[code])
+        return list(found)[:limit]
+
+    @staticmethod
+    def build_event_tree(codes):
+        """
+        Constructs the hierarchy of the event codes. A code's parent is its longest prefix
+        (of at least 2 characters) that is a code itself; codes without one are top level.
+
+        Parameters:
+            codes (dict): Event code to description.
+
+        Returns:
+            dict: Top-level code to node; a node is a dict with 'code', 'desc' and
+                'children' (code to node).
+        """
+        nodes = {code: {'code': code, 'desc': desc, 'children': {}} for code, desc in codes.items()}
+        tree = {}
+        # Shorter codes first, so parents exist before their children are attached.
+        for code in sorted(nodes, key=len):
+            node = nodes[code]
+            parent = next((code[:i] for i in range(len(code) - 1, 1, -1) if code[:i] in nodes), None)
+            if len(code) == 2 or parent is None:
+                tree[code] = node
+            else:
+                nodes[parent]['children'][code] = node
+        return tree
+
+    def event_tree(self):
+        """
+        Returns the event code hierarchy, built once when the reference is loaded.
+
+        Returns:
+            dict: See build_event_tree().
+        """
+        return self._event_tree
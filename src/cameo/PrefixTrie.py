@@ -0,0 +1,79 @@
+class PrefixTrie:
+    """
+    Character trie mapping string keys to values, for prefix lookups.
+
+    A key may carry several values, and the same value may be stored under several keys.
+    Lookups return the values in the order they were first inserted, without duplicates.
+    Every node keeps the first few values stored below it, so a lookup with a small limit
+    reads them from the prefix's node instead of walking its whole subtree.
+    """
+
+    # Number of values kept on every node for limited lookups.
+    FIRST_VALUES = 64
+
+    def __init__(self):
+        self.root = self._node()
+        self.size = 0
+
+    @staticmethod
+    def _node():
+        # 'first' holds the first FIRST_VALUES distinct values of the subtree, in insertion
+        # order (a dict used as an ordered set); 'values' the (insertion number, value)
+        # pairs of the node's own key.
+        return {"children": {}, "values": [], "first": {}}
+
+    def insert(self, key, value):
+        """
+        Stores a value under a key.
+
+        Parameters:
+            key (str): The key.
+            value: The value stored under it; must be hashable.
+        """
+        node = self.root
+        self._keep_first(node, value)
+        for char in key:
+            child = node["children"].get(char)
+            if child is None:
+                child = node["children"][char] = self._node()
+            node = child
+            self._keep_first(node, value)
+        node["values"].append((self.size, value))
+        self.size += 1
+
+    def _keep_first(self, node, value):
+        # Insertions arrive in order, so appending keeps 'first' in insertion order.
+        if len(node["first"]) < self.FIRST_VALUES:
+            node["first"].setdefault(value)
+
+    def find(self, prefix, limit=None):
+        """
+        Returns the values of all keys starting with the prefix.
+
+        Parameters:
+            prefix (str): The prefix; an empty prefix matches every key.
+            limit (int, optional): Return at most this many values.
+
+        Returns:
+            list: The values, in insertion order, without duplicates.
+        """
+        node = self.root
+        for char in prefix:
+            node = node["children"].get(char)
+            if node is None:
+                return []
+
+        first = node["first"]
+        # The kept values are all of the subtree's, or at least the first 'limit' of them.
+        if len(first) < self.FIRST_VALUES or (limit is not None and limit <= len(first)):
+            return list(first)[:limit]
+
+        numbers = {}
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for number, value in node["values"]:
+                if number < numbers.get(value, self.size):
+                    numbers[value] = number
+            stack.extend(node["children"].values())
+        return sorted(numbers, key=numbers.get)[:limit]
@@ -0,0 +1,427 @@
+import argparse
+import contextlib
+import itertools
+import json
+import lzma
+import os
+import sys
+import time
+import zipfile
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from src.dataloaders.EventCube import CUBE_KEYS, CUBE_PERIODS
+from src.dataloaders.EventDataLoader import EventDataLoader
+from src.dataloaders.GraphDataLoader import GraphDataLoader
+from src.dataloaders.LoadReporter import LoadReporter
+from src.dataloaders.MetricsRegistry import MetricsRegistry
+from src.dataloaders.SpilledFrame import SpilledFrame
+from src.dataloaders.StageMetrics import StageMetrics
+
+
+def build_parser():
+    """
+    Builds the argument parser of the batch loader.
+
+    Returns:
+        argparse.ArgumentParser: The parser with the 'events', 'gkg', 'events-updates',
+            'gkg-updates' and 'events-cube' commands.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Loads GDELT data without the Streamlit app and writes it to files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--columns", nargs="*",
+        help="Columns to load and write. Without values, all columns; if omitted, the app's default selection."
+    )
+    common.add_argument("--timeout", type=float, default=60, help="HTTP read timeout in seconds.")
+    common.add_argument("--retries", type=int, default=5, help="Retries of a failed download, with exponential backoff.")
+    common.add_argument("--rate-limit", type=float, help="Maximum HTTP requests per second per host.")
+    common.add_argument("--quiet", action="store_true", help="Only print warnings and errors.")
+    common.add_argument(
+        "--metrics-log", metavar="PATH",
+        help="Append the per-day stage metrics as JSON lines to this file ('-' for stderr)."
+    )
+    common.add_argument(
+        "--metrics-port", type=int,
+        help="Serve Prometheus metrics at http://HOST:PORT/metrics while the command runs, e.g. for the update poller."
+    )
+
+    ranged = argparse.ArgumentParser(add_help=False)
+    ranged.add_argument("--start", required=True, help="First day, e.g. 2024-01-05.")
+    ranged.add_argument("--end", required=True, help="Last day (inclusive), e.g. 2024-01-31.")
+    ranged.add_argument(
+        "--out", required=True,
+        help="Output file. The format follows the extension: .parquet, .feather/.arrow, or .csv "
+             "(optionally compressed, e.g. .csv.gz or .csv.zip)."
+    )
+    ranged.add_argument("--url", help="Archive URL template with a {DATE} placeholder, e.g. for a mirror.")
+    ranged.add_argument("--cache-dir", default=".gdelt_cache", help="Archive cache directory.")
+    ranged.add_argument("--no-cache", action="store_true", help="Do not cache the downloaded archives.")
+    ranged.add_argument(
+        "--revalidate", action="store_true",
+        help="Check cached archives with a conditional GET (ETag/Last-Modified) before using them."
+    )
+    ranged.add_argument("--store-dir", default=".gdelt_store", help="Parquet store directory.")
+    ranged.add_argument("--no-store", action="store_true", help="Do not convert the days into the Parquet store.")
+    ranged.add_argument(
+        "--store-max-mib", type=float, default=4096,
+        help="Size limit of the Parquet store; the least recently used days are removed beyond it. 0 means no limit."
+    )
+    ranged.add_argument(
+        "--checkpoint-dir", default=".gdelt_checkpoints",
+        help="Checkpoint directory; rerunning an interrupted load with the same filters resumes it."
+    )
+    ranged.add_argument("--no-checkpoint", action="store_true", help="Do not checkpoint the range load.")
+    ranged.add_argument(
+        "--checkpoint-max-age-days", type=float, default=7,
+        help="Remove checkpoints of interrupted loads not resumed for this many days. 0 keeps them."
+    )
+    ranged.add_argument("--chunk-size", type=int, help="Parse and filter each archive in chunks of this many rows.")
+    ranged.add_argument(
+        "--parse-engine", choices=["c", "pyarrow"], default="c",
+        help="Parse the archives with pandas' C parser or with pyarrow's multi-threaded CSV reader."
+    )
+    ranged.add_argument(
+        "--workers", type=int, default=0,
+        help="Fetch, parse and filter the days in this many worker processes; 0 uses threads in one process."
+    )
+    ranged.add_argument("--queue-size", type=int, default=1, help="Days buffered between pipeline stages.")
+    ranged.add_argument(
+        "--spill-mib", type=float, default=1024,
+        help="Move the loaded days to temporary files on disk once they take this many MiB of memory; 0 never spills."
+    )
+    ranged.add_argument("--spill-dir", help="Directory for the spilled days; the system temp directory if omitted.")
+
+    updates = argparse.ArgumentParser(add_help=False)
+    updates.add_argument(
+        "--out-dir", required=True,
+        help="Directory the new rows of every poll are written to, as <timestamp of the last slice>.<format>."
+    )
+    updates.add_argument("--format", choices=["parquet", "feather", "csv"], default="parquet", help="Output format.")
+    updates.add_argument(
+        "--base-url", default="http://data.gdeltproject.org/gdeltv2/",
+        help="GDELT 2.0 directory holding lastupdate.txt; may be a file:// URL of a local mirror."
+    )
+    updates.add_argument(
+        "--since", help="Start of the first poll, e.g. 2024-01-05 or 20240105120000; the newest slice if omitted."
+    )
+    updates.add_argument(
+        "--state-file",
+        help="JSON file remembering the last slice loaded; defaults to poll-state.json in --out-dir."
+    )
+    updates.add_argument("--interval", type=float, default=0, help="Poll every this many seconds; 0 polls once.")
+    updates.add_argument(
+        "--master-list", action="store_true",
+        help="List missed slices from masterfilelist.txt instead of deriving them from the 15-minute schedule."
+    )
+
+    event_filters = argparse.ArgumentParser(add_help=False)
+    event_filters.add_argument("--actor1", nargs="+", default=[], help="Actor 1 codes.")
+    event_filters.add_argument("--actor2", nargs="+", default=[], help="Actor 2 codes.")
+    event_filters.add_argument("--event-code", nargs="+", default=[], help="Event codes, e.g. 081.")
+    event_filters.add_argument("--root-event-code", nargs="+", default=[], help="Root event codes, e.g. 14.")
+    event_filters.add_argument(
+        "--quad-class", nargs="+", type=int, default=[], choices=[1, 2, 3, 4],
+        help="Quad classes: 1 verbal cooperation, 2 material cooperation, 3 verbal conflict, 4 material conflict."
+    )
+    event_filters.add_argument(
+        "--action-country", nargs="+", default=[], help="Country codes (FIPS) of the action location, e.g. US."
+    )
+    event_filters.add_argument(
+        "--root-events", choices=["only", "exclude"],
+        help="Keep only the root events of their documents, or only the other events."
+    )
+    event_filters.add_argument("--goldstein-min", type=float, help="Minimum Goldstein scale (-10 to 10).")
+    event_filters.add_argument("--goldstein-max", type=float, help="Maximum Goldstein scale (-10 to 10).")
+    event_filters.add_argument("--tone-min", type=float, help="Minimum average tone.")
+    event_filters.add_argument("--tone-max", type=float, help="Maximum average tone.")
+    event_filters.add_argument("--min-mentions", type=int, help="Minimum number of mentions.")
+    event_filters.add_argument("--min-sources", type=int, help="Minimum number of sources.")
+
+    gkg_filters = argparse.ArgumentParser(add_help=False)
+    gkg_filters.add_argument(
+        "--keywords", nargs="+", default=[],
+        help="THEMES keyword queries, ORed together, e.g. 'WAR AND NOT TAX_FNCACT_*'."
+    )
+
+    events = commands.add_parser("events", parents=[common, ranged, event_filters], help="Load GDELT 1.0 event data.")
+    events.add_argument(
+        "--cube", action="store_true",
+        help="Also roll every loaded day up into the daily event cube, for the events-cube command."
+    )
+    events.add_argument("--cube-dir", default=".gdelt_cube", help="Event cube directory.")
+    commands.add_parser("gkg", parents=[common, ranged, gkg_filters], help="Load GDELT 1.0 GKG data.")
+    commands.add_parser(
+        "events-updates", parents=[common, updates, event_filters],
+        help="Poll the GDELT 2.0 15-minute event feed and write the new rows."
+    )
+    commands.add_parser(
+        "gkg-updates", parents=[common, updates, gkg_filters],
+        help="Poll the GDELT 2.0 15-minute GKG feed and write the new rows."
+    )
+    cube = commands.add_parser(
+        "events-cube",
+        help="Answer an aggregate query from the daily event cube, without loading any events."
+    )
+    cube.add_argument("--start", required=True, help="First day, e.g. 2020-01-01.")
+    cube.add_argument("--end", required=True, help="Last day (inclusive), e.g. 2023-12-31.")
+    cube.add_argument(
+        "--by", nargs="*", default=[], choices=CUBE_KEYS + list(CUBE_PERIODS),
+        help="Dimensions to group by; totals over the range if omitted."
+    )
+    cube.add_argument("--actor1-country", nargs="+", default=[], help="Actor 1 country codes, e.g. USA.")
+    cube.add_argument("--actor2-country", nargs="+", default=[], help="Actor 2 country codes.")
+    cube.add_argument("--root-event-code", nargs="+", default=[], help="Root event codes, e.g. 14.")
+    cube.add_argument("--quad-class", nargs="+", type=int, default=[], help="Quad classes (1-4).")
+    cube.add_argument("--cube-dir", default=".gdelt_cube", help="Event cube directory.")
+    cube.add_argument("--out", help="Output file, like for 'events'; printed as a table if omitted.")
+    cube.add_argument("--quiet", action="store_true", help="Only print warnings and errors.")
+    return parser
+
+
+def loader_state(args):
+    """
+    Translates the command line options into loader settings.
+
+    Parameters:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        dict: The initial loader state.
+    """
+    state = {
+        "http_options": {"timeout": args.timeout, "retries": args.retries, "backoff": 0.5, "rate_limit": args.rate_limit},
+    }
+    if args.command in ("events", "gkg"):
+        state.update({
+            "cache_dir": None if args.no_cache else args.cache_dir,
+            "cache_revalidate": args.revalidate,
+            "store_dir": None if args.no_store else args.store_dir,
+            "store_max_bytes": int(args.store_max_mib * 1024 ** 2) or None,
+            "checkpoint_dir": None if args.no_checkpoint else args.checkpoint_dir,
+            "checkpoint_max_age": args.checkpoint_max_age_days * 24 * 3600 or None,
+            "chunk_size": args.chunk_size,
+            "parse_engine": args.parse_engine,
+            "pipeline_queue_size": args.queue_size,
+            "workers": args.workers,
+            "spill_bytes": int(args.spill_mib * 1024 ** 2) or None,
+            "spill_dir": args.spill_dir,
+            # A single load has no later query to reuse the days for.
+            "result_cache_bytes": None,
+        })
+        if args.command == "events":
+            state.update({"build_cube": args.cube, "cube_dir": args.cube_dir})
+    else:
+        state.update({"v2_base_url": args.base_url, "v2_use_master_list": args.master_list})
+    return state
+
+
+def quiet_message(level, message):
+    # With --quiet only warnings and errors are printed.
+    if level in ("warning", "error"):
+        print(f"{level.upper()}: {message}", file=sys.stderr)
+
+
+def write_spilled(data, path):
+    """
+    Writes a dataset spilled to disk to a file one chunk at a time, choosing the format by
+    the file extension like write_output().
+
+    Parameters:
+        data (SpilledFrame): The loaded data.
+        path (str): Output file.
+    """
+    chunks = data.iter_chunks()
+    if path.endswith((".parquet", ".feather", ".arrow")):
+        first = next(chunks)
+        # Object columns that are empty in the first chunk are typed as strings.
+        schema = pa.Schema.from_pandas(first, preserve_index=False)
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+        if path.endswith(".parquet"):
+            writer = pq.ParquetWriter(path, schema)
+        else:
+            writer = ipc.new_file(path, schema, options=ipc.IpcWriteOptions(compression="lz4"))
+        with writer:
+            for chunk in itertools.chain([first], chunks):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return
+    with contextlib.ExitStack() as stack:
+        if path.endswith(".zip"):
+            # Like pandas, the archive holds one member named after the archive.
+            archive = stack.enter_context(zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED))
+            stream = stack.enter_context(archive.open(os.path.basename(path)[:-len(".zip")], "w", force_zip64=True))
+        elif path.endswith(".xz"):
+            stream = stack.enter_context(lzma.open(path, "wb"))
+        else:
+            # Plain, .gz, .bz2 and .zst CSV.
+            stream = stack.enter_context(pa.output_stream(path, compression="detect"))
+        for i, chunk in enumerate(chunks):
+            stream.write(chunk.to_csv(index=False, header=i == 0).encode("utf-8"))
+
+
+def write_output(df, path):
+    """
+    Writes the loaded data to a file, choosing the format by the file extension.
+
+    Parameters:
+        df (pd.DataFrame or SpilledFrame): The loaded data.
+        path (str): Output file.
+    """
+    if isinstance(df, SpilledFrame):
+        write_spilled(df, path)
+        return
+    df = df.reset_index(drop=True)
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    elif path.endswith((".feather", ".arrow")):
+        df.to_feather(path)
+    else:
+        # pandas infers the compression (gz, zip, bz2, xz, zst) from the extension.
+        df.to_csv(path, index=False)
+
+
+def make_loader(args, reporter):
+    state = loader_state(args)
+    if args.command.startswith("events"):
+        if getattr(args, "url", None):
+            state["root_url"] = args.url
+        loader = EventDataLoader(state, reporter)
+        if args.columns is not None:
+            state["selected_columns"] = args.columns
+        loader.set_actor_filters(args.actor1, args.actor2)
+        loader.set_eventcode_filters(args.event_code)
+        loader.set_root_eventcode_filters(args.root_event_code)
+        loader.set_quadclass_filters(args.quad_class)
+        loader.set_action_geo_filters(args.action_country)
+        loader.set_root_event_filter(None if args.root_events is None else args.root_events == "only")
+        loader.set_range_filters(
+            (args.goldstein_min, args.goldstein_max), (args.tone_min, args.tone_max),
+            args.min_mentions, args.min_sources
+        )
+    else:
+        if getattr(args, "url", None):
+            state["gkg_url"] = args.url
+        loader = GraphDataLoader(state, reporter)
+        if args.columns is not None:
+            state["gkg_selected_columns"] = args.columns
+    return loader
+
+
+def poll_updates(args, loader, reporter):
+    """
+    Polls a GDELT 2.0 feed once, or every --interval seconds, writing the new rows of each
+    poll to --out-dir. The last slice loaded is kept in the state file, so a restarted
+    poller continues where it stopped.
+
+    Parameters:
+        args (argparse.Namespace): The parsed arguments.
+        loader (EventDataLoader or GraphDataLoader): The configured loader.
+        reporter (LoadReporter): Receives progress and errors.
+    """
+    os.makedirs(args.out_dir, exist_ok=True)
+    state_file = args.state_file or os.path.join(args.out_dir, "poll-state.json")
+    key = "events_v2_last_seen" if args.command == "events-updates" else "gkg_v2_last_seen"
+    if os.path.exists(state_file):
+        with open(state_file) as f:
+            loader.state[key] = json.load(f).get("last_seen")
+
+    while True:
+        if args.command == "events-updates":
+            updates = loader.load_updates(since=args.since)
+        else:
+            updates = loader.load_updates(args.keywords, since=args.since)
+            # The poller only writes the new rows; it does not keep the whole dataset.
+            loader.data = None
+        last_seen = loader.state[key]
+        if not updates.empty:
+            path = os.path.join(args.out_dir, f"{last_seen}.{args.format}")
+            write_output(updates, path)
+            reporter.info(f"Wrote {len(updates)} new rows to {path}.")
+        if last_seen is not None:
+            with open(state_file, "w") as f:
+                json.dump({"last_seen": last_seen}, f)
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+def query_cube(args, reporter):
+    """
+    Answers an aggregate query from the event cube and writes or prints the result.
+
+    Parameters:
+        args (argparse.Namespace): The parsed arguments.
+        reporter (LoadReporter): Receives warnings about days missing from the cube.
+
+    Returns:
+        int: Exit status; 1 if the range has no day in the cube.
+    """
+    loader = EventDataLoader({"cube_dir": args.cube_dir}, reporter)
+    filters = {
+        'Actor1CountryCode': args.actor1_country,
+        'Actor2CountryCode': args.actor2_country,
+        'EventRootCode': args.root_event_code,
+        'QuadClass': args.quad_class,
+    }
+    result = loader.query_cube(args.start, args.end, args.by, filters)
+    if args.out:
+        write_output(result, args.out)
+        reporter.info(f"Wrote {len(result)} groups to {args.out}.")
+    else:
+        print(result.to_string(index=False))
+    return 0 if not result.empty else 1
+
+
+def run(args, reporter=None):
+    """
+    Runs one batch load, or the update poller.
+
+    Parameters:
+        args (argparse.Namespace): The parsed arguments.
+        reporter (LoadReporter, optional): Receives progress and errors; prints to stderr if None.
+
+    Returns:
+        int: Exit status; 1 if any day or slice failed to load.
+    """
+    if reporter is None:
+        reporter = LoadReporter(on_message=quiet_message if args.quiet else None)
+    if args.command == "events-cube":
+        return query_cube(args, reporter)
+    if args.metrics_log:
+        StageMetrics.log_to(args.metrics_log)
+    if args.metrics_port:
+        MetricsRegistry.shared().serve(args.metrics_port)
+    loader = make_loader(args, reporter)
+
+    if args.command in ("events-updates", "gkg-updates"):
+        poll_updates(args, loader, reporter)
+        return 1 if reporter.errors else 0
+    if args.command == "events":
+        data = loader.load_data_range(args.start, args.end)
+    else:
+        data = loader.data_pipeline(args.start, args.end, args.keywords)
+
+    write_output(data, args.out)
+    reporter.info(f"Wrote {len(data)} rows to {args.out}.")
+    return 1 if reporter.errors else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    for name in ("goldstein", "tone"):
+        low, high = getattr(args, f"{name}_min", None), getattr(args, f"{name}_max", None)
+        if low is not None and high is not None and low > high:
+            parser.error(f"--{name}-min is larger than --{name}-max.")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
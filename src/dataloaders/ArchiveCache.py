@@ -0,0 +1,213 @@
+import json
+import os
+import tempfile
+import threading
+
+
+class ArchiveCache:
+    """
+    Persistent on-disk cache of the raw daily GDELT archives, keyed by feed and date.
+
+    Entries are stored as '<cache_dir>/<feed>/<date>.zip'. The modification time of an
+    entry doubles as its last access time, so least-recently-used eviction also works
+    across processes sharing the same directory. The ETag and Last-Modified of a
+    downloaded archive are kept next to it in '<date>.zip.json', so the entry can be
+    revalidated with a conditional GET. Archives and validators are written to a temporary
+    file first and moved into place with os.replace, so readers never see a partial file.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Parameters:
+            cache_dir (str): Directory that holds the cached archives.
+            max_bytes (int): Byte budget; the oldest entries are evicted beyond it.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, cache_dir, max_bytes):
+        """
+        Returns the process-wide cache for the given directory, so that both loaders and
+        all Streamlit sessions share the same instance and counters.
+
+        Parameters:
+            cache_dir (str): Directory that holds the cached archives.
+            max_bytes (int): Byte budget of the cache.
+
+        Returns:
+            ArchiveCache: The shared cache instance.
+        """
+        key = os.path.abspath(cache_dir)
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None:
+                cache = cls._instances[key] = cls(cache_dir, max_bytes)
+            cache.max_bytes = max_bytes
+            return cache
+
+    def _path(self, feed, date):
+        return os.path.join(self.cache_dir, feed, f"{date}.zip")
+
+    def get(self, feed, date):
+        """
+        Returns the cached archive for a feed and date, or None on a miss.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            bytes or None: The archive contents.
+        """
+        path = self._path(feed, date)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # Mark the entry as recently used.
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted since it was read; the bytes read are still the archive.
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def validators(self, feed, date):
+        """
+        Returns the HTTP validators stored with a cached archive.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            dict: 'etag' and/or 'last_modified'; empty if none were stored or the file
+                cannot be decoded.
+        """
+        try:
+            with open(f"{self._path(feed, date)}.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def put(self, feed, date, data, validators=None):
+        """
+        Atomically stores an archive and evicts old entries if the budget is exceeded.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            data (bytes): The archive contents.
+            validators (dict, optional): ETag and Last-Modified of the download.
+        """
+        path = self._path(feed, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, data)
+        if validators:
+            self._write(f"{path}.json", json.dumps(validators).encode())
+        else:
+            try:
+                os.remove(f"{path}.json")
+            except FileNotFoundError:
+                pass
+        self.evict()
+
+    @staticmethod
+    def _write(path, data):
+        # Written next to the target and moved into place, so readers see the old file or the new one.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_fetch(self, feed, date, fetch, revalidate=False):
+        """
+        Returns the cached archive, calling `fetch` and caching its result on a miss.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            fetch (callable): Takes the validators of the cached copy (None on a miss) and
+                returns (bytes or None, validators); None means the cached copy is current.
+            revalidate (bool): Also call `fetch` on a hit, to check that the entry is current.
+
+        Returns:
+            bytes: The archive contents.
+        """
+        data = self.get(feed, date)
+        if data is not None and not revalidate:
+            return data
+        body, validators = fetch(self.validators(feed, date) if data is not None else None)
+        if body is None:
+            return data
+        self.put(feed, date, body, validators)
+        return body
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for feed in os.scandir(self.cache_dir):
+            if not feed.is_dir():
+                continue
+            for entry in os.scandir(feed.path):
+                if not entry.name.endswith(".zip"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Removes least-recently-used entries until the cache fits in its byte budget.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, f"{path}.json"):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Returns the hit/miss counters together with the current size of the cache.
+
+        Returns:
+            dict: hits, misses, evictions, entries and bytes.
+        """
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
@@ -0,0 +1,140 @@
+import contextlib
+import os
+import tempfile
+import pandas as pd
+import pyarrow.dataset as ds
+from src.dataloaders.FrameAccumulator import FrameAccumulator
+from src.dataloaders.ParquetStore import ParquetStore
+
+try:
+    import duckdb
+except ImportError:
+    # DuckDB is optional; without it only the SQL engine is unavailable.
+    duckdb = None
+
+
+def sql_literal(value):
+    """
+    Quotes a value as a SQL string literal.
+
+    Parameters:
+        value (str): The value.
+
+    Returns:
+        str: The literal, e.g. 'USA'.
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBEngine:
+    """
+    Runs SQL on the days in the Parquet store with an embedded DuckDB (an optional
+    dependency, the 'sql' extra: poetry install --extras sql).
+
+    A query sees the stored days of a date range as the views 'events' and 'gkg', so WHERE
+    clauses, GROUP BY and joins (e.g. on SQLDATE = DATE) run directly on the Parquet
+    partitions: only the columns and row groups a query needs are read, on all cores unless
+    'threads' is set. When a join or an aggregation needs more
+    than 'memory_limit', DuckDB spills it to 'temp_dir'. The result is fetched in record
+    batches into a FrameAccumulator, so a result larger than the spill budget comes back as
+    a SpilledFrame, like a range load.
+
+    Queries come from the users of the app, so they cannot touch any other file: the views
+    are Arrow scans of the partitions, and DuckDB's own file access is switched off.
+    """
+
+    FEEDS = ("events", "gkg")
+
+    def __init__(self, store_dir, threads=None, memory_limit=None, temp_dir=None, batch_rows=100_000):
+        """
+        Parameters:
+            store_dir (str): Root directory of the Parquet store.
+            threads (int, optional): Number of DuckDB threads; all cores if None.
+            memory_limit (str, optional): DuckDB memory limit, e.g. '4GB'; DuckDB's default
+                (80% of the RAM) if None.
+            temp_dir (str, optional): Where DuckDB spills; a directory in the system temp
+                directory if None.
+            batch_rows (int): Rows fetched from the result at a time.
+        """
+        self.store = ParquetStore(store_dir)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.temp_dir = temp_dir or os.path.join(tempfile.gettempdir(), "lazyloader-gdelt-duckdb")
+        self.batch_rows = batch_rows
+
+    @staticmethod
+    def available():
+        """
+        Checks whether DuckDB is installed.
+
+        Returns:
+            bool: True if the engine can be used.
+        """
+        return duckdb is not None
+
+    def missing_dates(self, feed, dates):
+        """
+        Returns the days that are not in the store, and so not seen by a query.
+
+        Parameters:
+            feed (str): 'events' or 'gkg'.
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Returns:
+            list: The missing dates.
+        """
+        return [date for date in dates if not self.store.has(feed, date)]
+
+    def connect(self, dates):
+        """
+        Opens an in-memory DuckDB database with a view per feed over the stored days among
+        the given dates. A feed without any stored day has no view.
+
+        Parameters:
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Returns:
+            duckdb.DuckDBPyConnection: The connection; the caller closes it.
+        """
+        if duckdb is None:
+            raise ImportError(
+                "The SQL engine needs DuckDB; install it with 'poetry install --extras sql' or 'pip install duckdb'."
+            )
+        config = {"temp_directory": self.temp_dir}
+        if self.threads:
+            config["threads"] = int(self.threads)
+        if self.memory_limit:
+            config["memory_limit"] = str(self.memory_limit)
+        connection = duckdb.connect(config=config)
+        for feed in self.FEEDS:
+            paths = [self.store.partition_path(feed, date) for date in dates if self.store.has(feed, date)]
+            if paths:
+                # Scanned through Arrow, which gets the columns and filters of the query pushed down.
+                connection.register(feed, ds.dataset(paths, format="parquet"))
+        # No file access for the query, and no SET to turn it back on; spilling to temp_directory still works.
+        connection.execute("SET enable_external_access = false")
+        connection.execute("SET lock_configuration = true")
+        return connection
+
+    def query(self, sql, dates, spill_bytes=None, spill_dir=None):
+        """
+        Runs a query on the stored days among the given dates.
+
+        Parameters:
+            sql (str): The query, reading the views 'events' and 'gkg'.
+            dates (list): Dates in 'YYYYMMDD' format.
+            spill_bytes (int, optional): Memory budget of the result, see FrameAccumulator.
+            spill_dir (str, optional): Where a result over the budget is written.
+
+        Returns:
+            pd.DataFrame or SpilledFrame: The result.
+        """
+        with contextlib.closing(self.connect(dates)) as connection:
+            reader = connection.execute(sql).to_arrow_reader(self.batch_rows)
+            accumulator = FrameAccumulator(spill_bytes, spill_dir)
+            for batch in reader:
+                accumulator.append(batch.to_pandas())
+            result = accumulator.result()
+        if result is None:
+            return pd.DataFrame(columns=reader.schema.names)
+        return result
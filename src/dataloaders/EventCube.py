@@ -0,0 +1,234 @@
+import calendar
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.dataloaders.ParquetStore import ParquetStore
+
+# Dimensions of the cube, and the event columns a rollup reads.
+CUBE_KEYS = ['SQLDATE', 'Actor1CountryCode', 'Actor2CountryCode', 'EventRootCode', 'QuadClass']
+CUBE_COLUMNS = CUBE_KEYS + ['NumMentions', 'NumArticles', 'GoldsteinScale', 'AvgTone']
+# Coarser time dimensions a query can group by, derived from SQLDATE.
+CUBE_PERIODS = {'MonthYear': 100, 'Year': 10000}
+
+
+class EventCube:
+    """
+    Materialized daily rollup of the GDELT events, for aggregate queries that do not touch
+    the raw events.
+
+    For every (SQLDATE, Actor1CountryCode, Actor2CountryCode, EventRootCode, QuadClass) of
+    a day, the cube holds the number of events, the summed NumMentions and NumArticles, and
+    the summed GoldsteinScale and AvgTone. Means are only computed when querying, so days
+    and groups can be combined exactly. Each day is a small Parquet partition
+    ('<root>/cube/date=<YYYYMMDD>/part-0.parquet'), written while the day is loaded.
+    Missing country codes are kept as their own group.
+
+    Queries that do not group or filter by SQLDATE read whole months of the range from a
+    monthly rollup instead ('<root>/months/date=<YYYYMM>/part-0.parquet', grouped by the
+    MonthYear of each event's SQLDATE), so a multi-year query reads a few dozen files
+    rather than a thousand. A monthly rollup is built on first use and rebuilt when days
+    were added to its month.
+    """
+
+    SCHEMA = pa.schema([
+        ('SQLDATE', pa.int32()),
+        ('Actor1CountryCode', pa.string()),
+        ('Actor2CountryCode', pa.string()),
+        ('EventRootCode', pa.string()),
+        ('QuadClass', pa.int8()),
+        ('events', pa.int64()),
+        ('NumMentions', pa.int64()),
+        ('NumArticles', pa.int64()),
+        ('GoldsteinScale_sum', pa.float64()),
+        ('AvgTone_sum', pa.float64()),
+    ])
+    SUMS = ['events', 'NumMentions', 'NumArticles', 'GoldsteinScale_sum', 'AvgTone_sum']
+    MONTH_KEYS = ['MonthYear'] + CUBE_KEYS[1:]
+    MONTH_SCHEMA = pa.schema([('MonthYear', pa.int32())] + list(SCHEMA)[1:])
+
+    def __init__(self, root):
+        """
+        Parameters:
+            root (str): Root directory of the cube.
+        """
+        self.store = ParquetStore(root)
+
+    @staticmethod
+    def rollup(df):
+        """
+        Aggregates events (a whole day, or a chunk of it) into cube rows.
+
+        Parameters:
+            df (pd.DataFrame): Events with the CUBE_COLUMNS.
+
+        Returns:
+            pd.DataFrame: One row per key combination.
+        """
+        frame = pd.DataFrame({column: df[column].astype(object) for column in CUBE_KEYS[1:4]})
+        frame['SQLDATE'] = df['SQLDATE']
+        frame['QuadClass'] = df['QuadClass']
+        frame['events'] = 1
+        frame['NumMentions'] = df['NumMentions'].astype('int64')
+        frame['NumArticles'] = df['NumArticles'].astype('int64')
+        frame['GoldsteinScale_sum'] = df['GoldsteinScale'].astype('float64')
+        frame['AvgTone_sum'] = df['AvgTone'].astype('float64')
+        return EventCube.combine([frame])
+
+    @staticmethod
+    def combine(parts):
+        """
+        Merges cube rows, e.g. the rollups of the chunks of one day.
+
+        Parameters:
+            parts (list): Frames returned by rollup().
+
+        Returns:
+            pd.DataFrame: One row per key combination.
+        """
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        return df.groupby(CUBE_KEYS, dropna=False, sort=True)[EventCube.SUMS].sum().reset_index()
+
+    def has(self, date):
+        """
+        Checks whether a day is in the cube.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            bool: True if the day was rolled up.
+        """
+        return self.store.has("cube", date)
+
+    def write(self, date, df):
+        """
+        Atomically stores the rollup of a day.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            df (pd.DataFrame): The day's rollup, see rollup() and combine().
+        """
+        self.store.write("cube", date, df[self.SCHEMA.names], self.SCHEMA)
+
+    def month(self, month, dates):
+        """
+        Returns the monthly rollup of a month, building it if it does not cover exactly
+        the given days.
+
+        Parameters:
+            month (str): Month in 'YYYYMM' format.
+            dates (list): The days of the month that are in the cube, in 'YYYYMMDD' format.
+
+        Returns:
+            str: Path of the monthly partition.
+        """
+        path = self.store.partition_path("months", month)
+        # Rollups written before MonthYear was taken from SQLDATE have no 'month_year' key.
+        metadata = {b"days": ",".join(sorted(dates)).encode(), b"month_year": b"SQLDATE"}
+        if self.store.has("months", month) and all(
+            pq.read_schema(path).metadata.get(key) == value for key, value in metadata.items()
+        ):
+            return path
+        table = ds.dataset(
+            [self.store.partition_path("cube", date) for date in dates], schema=self.SCHEMA, format="parquet"
+        ).to_table()
+        # A day's file also holds events of earlier months, so MonthYear comes from their SQLDATE
+        # (like in the daily path of _read) rather than from the month of the partition.
+        table = table.append_column('MonthYear', pc.divide(table['SQLDATE'], CUBE_PERIODS['MonthYear']))
+        table = table.drop_columns(['SQLDATE']).group_by(self.MONTH_KEYS).aggregate([(column, "sum") for column in self.SUMS])
+        table = table.rename_columns([name[:-len("_sum")] if name[:-len("_sum")] in self.SUMS else name
+                                      for name in table.column_names])
+        schema = self.MONTH_SCHEMA.with_metadata(metadata)
+        self.store.write("months", month, table.select(self.MONTH_SCHEMA.names).to_pandas(), schema)
+        return path
+
+    def _read(self, paths, by, filters, expression, time_column):
+        # Reads the grouped, filtered and summed columns of daily or monthly partitions, and
+        # derives the requested periods from their time column.
+        needed = {column for column in by if column not in CUBE_PERIODS} | set(filters)
+        columns = [column for column in CUBE_KEYS[1:] if column in needed] + self.SUMS
+        if needed & {'SQLDATE'} or set(by) & set(CUBE_PERIODS):
+            columns.insert(0, time_column)
+        # The code columns are read as dictionaries, which keeps decoding and grouping them cheap.
+        parquet_format = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=CUBE_KEYS[1:4]))
+        table = ds.dataset(paths, format=parquet_format).to_table(columns=columns, filter=expression)
+        for period, divisor in CUBE_PERIODS.items():
+            if period not in by:
+                continue
+            if time_column == 'SQLDATE':
+                # Integer division of YYYYMMDD gives YYYYMM and YYYY.
+                table = table.append_column(period, pc.divide(table['SQLDATE'], divisor))
+            elif period == 'MonthYear':
+                continue
+            else:
+                table = table.append_column(period, pc.divide(table['MonthYear'], divisor // 100))
+        if time_column not in by and time_column in table.column_names:
+            table = table.drop_columns([time_column])
+        # Grouping needs the same dictionary in every chunk of a code column.
+        return table.unify_dictionaries().group_by(by).aggregate([(column, "sum") for column in self.SUMS])
+
+    def query(self, dates, by=None, filters=None):
+        """
+        Aggregates the cube over a set of days.
+
+        Parameters:
+            dates (list): Dates in 'YYYYMMDD' format; days not in the cube are left out.
+            by (list, optional): Dimensions to group by: any of CUBE_KEYS, 'MonthYear' or
+                'Year'. Totals over all days if empty.
+            filters (dict, optional): Key column to the list of values to keep, e.g.
+                {'Actor1CountryCode': ['USA'], 'QuadClass': [4]}.
+
+        Returns:
+            tuple: (pd.DataFrame, list) - one row per group with 'events', 'NumMentions',
+                'NumArticles' and the mean 'GoldsteinScale' and 'AvgTone', and the dates
+                that are missing from the cube.
+        """
+        by = list(by or [])
+        filters = {column: values for column, values in (filters or {}).items() if values}
+        result_columns = by + ['events', 'NumMentions', 'NumArticles', 'GoldsteinScale', 'AvgTone']
+        # Whole months can be read from the monthly rollups unless single days matter.
+        use_months = 'SQLDATE' not in by and 'SQLDATE' not in filters
+
+        by_month = {}
+        for date in dates:
+            by_month.setdefault(date[:6], []).append(date)
+        day_paths, month_paths, missing = [], [], []
+        for month, month_dates in by_month.items():
+            present = [date for date in month_dates if self.has(date)]
+            missing += [date for date in month_dates if date not in set(present)]
+            whole = len(set(month_dates)) == calendar.monthrange(int(month[:4]), int(month[4:]))[1]
+            if use_months and whole and present:
+                month_paths.append(self.month(month, present))
+            else:
+                day_paths += [self.store.partition_path("cube", date) for date in present]
+        if not day_paths and not month_paths:
+            return pd.DataFrame(columns=result_columns), missing
+
+        expression = None
+        for column, values in filters.items():
+            condition = ds.field(column).isin(values)
+            expression = condition if expression is None else expression & condition
+        tables = []
+        if day_paths:
+            tables.append(self._read(day_paths, by, filters, expression, 'SQLDATE'))
+        if month_paths:
+            tables.append(self._read(month_paths, by, filters, expression, 'MonthYear'))
+        table = pa.concat_tables([table.select(tables[0].column_names) for table in tables]).unify_dictionaries()
+        if len(tables) > 1:
+            table = table.group_by(by).aggregate([(f"{column}_sum", "sum") for column in self.SUMS])
+            table = table.rename_columns([name[:-len("_sum")] if name.endswith("_sum_sum") else name
+                                          for name in table.column_names])
+
+        # Codes come back as plain strings rather than categoricals, so they sort alphabetically.
+        table = table.cast(pa.schema([
+            field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ]))
+        df = table.to_pandas().rename(columns={f"{column}_sum": column for column in self.SUMS})
+        df['GoldsteinScale'] = df.pop('GoldsteinScale_sum') / df['events']
+        df['AvgTone'] = df.pop('AvgTone_sum') / df['events']
+        if by:
+            df = df.sort_values(by, ignore_index=True)
+        return df[result_columns], missing
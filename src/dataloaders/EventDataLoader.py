@@ -1,117 +1,737 @@
+import contextlib
+import functools
+import io
+import numpy as np
 import pandas as pd
-import streamlit as st
+from src.dataloaders.ArchiveCache import ArchiveCache
+from src.dataloaders.ArrowCsvReader import ArrowCsvReader
+from src.dataloaders.DuckDBEngine import DuckDBEngine
+from src.dataloaders.EventCube import CUBE_COLUMNS, EventCube
+from src.dataloaders.EventFilter import EventFilter
+from src.dataloaders.FrameAccumulator import FrameAccumulator
+from src.dataloaders.HttpTransport import HttpTransport, TransportError
+from src.dataloaders.IncrementalFeed import IncrementalFeed
+from src.dataloaders.LoadReporter import LoadReporter
+from src.dataloaders.ParquetStore import ParquetStore
+from src.dataloaders.PostingIndex import PostingIndex
+from src.dataloaders.ProcessRangePipeline import ProcessRangePipeline
+from src.dataloaders.RangeCheckpoint import RangeCheckpoint
+from src.dataloaders.RangePipeline import RangePipeline
+from src.dataloaders.ResultCache import ResultCache
+from src.dataloaders.SpilledFrame import SpilledFrame
+from src.dataloaders.StageMetrics import StageMetrics
+from src.dataloaders.TimedReader import TimedReader
+
+# GDELT 1.0 event sütunları ve ayrıştırma sırasında kullanılan tipleri.
+# CAMEO kodları string olarak okunur ki "010" gibi değerlerin baştaki sıfırları kaybolmasın.
+CATEGORY = "category"
+EVENT_SCHEMA = {
+    'GLOBALEVENTID': "int64", 'SQLDATE': "int32", 'MonthYear': "int32", 'Year': "int32",
+    'FractionDate': "float32", 'Actor1Code': "str", 'Actor1Name': "str",
+    'Actor1CountryCode': CATEGORY, 'Actor1KnownGroupCode': CATEGORY, 'Actor1EthnicCode': CATEGORY,
+    'Actor1Religion1Code': CATEGORY, 'Actor1Religion2Code': CATEGORY, 'Actor1Type1Code': CATEGORY,
+    'Actor1Type2Code': CATEGORY, 'Actor1Type3Code': CATEGORY, 'Actor2Code': "str",
+    'Actor2Name': "str", 'Actor2CountryCode': CATEGORY, 'Actor2KnownGroupCode': CATEGORY,
+    'Actor2EthnicCode': CATEGORY, 'Actor2Religion1Code': CATEGORY, 'Actor2Religion2Code': CATEGORY,
+    'Actor2Type1Code': CATEGORY, 'Actor2Type2Code': CATEGORY, 'Actor2Type3Code': CATEGORY,
+    'IsRootEvent': "int8", 'EventCode': "str", 'EventBaseCode': "str", 'EventRootCode': "str",
+    'QuadClass': "int8", 'GoldsteinScale': "float32", 'NumMentions': "int32", 'NumSources': "int32",
+    'NumArticles': "int32", 'AvgTone': "float32", 'Actor1Geo_Type': CATEGORY,
+    'Actor1Geo_FullName': "str", 'Actor1Geo_CountryCode': CATEGORY, 'Actor1Geo_ADM1Code': CATEGORY,
+    'Actor1Geo_Lat': "float32", 'Actor1Geo_Long': "float32", 'Actor1Geo_FeatureID': "str",
+    'Actor2Geo_Type': CATEGORY, 'Actor2Geo_FullName': "str", 'Actor2Geo_CountryCode': CATEGORY,
+    'Actor2Geo_ADM1Code': CATEGORY, 'Actor2Geo_Lat': "float32", 'Actor2Geo_Long': "float32",
+    'Actor2Geo_FeatureID': "str", 'ActionGeo_Type': CATEGORY, 'ActionGeo_FullName': "str",
+    'ActionGeo_CountryCode': CATEGORY, 'ActionGeo_ADM1Code': CATEGORY, 'ActionGeo_Lat': "float32",
+    'ActionGeo_Long': "float32", 'ActionGeo_FeatureID': "str", 'DATEADDED': "int32",
+    'SOURCEURL': "str"
+}
+
+# Ayrıştırılmış günün tipleri: fix_event_codes EventRootCode'u düzelttikten sonra kategoriye çevirir.
+# Parquet'ten okunan günler de bu tiplere çevrilir ki her yoldan aynı tipler gelsin.
+PARSED_SCHEMA = dict(EVENT_SCHEMA, EventRootCode=CATEGORY)
+
+# GDELT 2.0 15 dakikalık event dosyalarının sütunları: her coğrafya bloğuna ADM2Code eklenir
+# ve DATEADDED saniyeye kadar zaman damgası (YYYYMMDDHHMMSS) taşır.
+EVENT_SCHEMA_V2 = {}
+for _column, _dtype in EVENT_SCHEMA.items():
+    EVENT_SCHEMA_V2[_column] = "int64" if _column == 'DATEADDED' else _dtype
+    if _column.endswith('Geo_ADM1Code'):
+        EVENT_SCHEMA_V2[_column.replace('ADM1', 'ADM2')] = CATEGORY
+del _column, _dtype
+
+# Parquet'teki her gün için ters indeksi (PostingIndex) tutulan, filtrelerde kullanılan sütunlar.
+INDEXED_COLUMNS = ['Actor1Code', 'Actor2Code', 'EventCode', 'EventRootCode']
+
 
 class EventDataLoader:
-    def __init__(self):
-        st.session_state.setdefault("root_url", "http://data.gdeltproject.org/events/{DATE}.export.CSV.zip")
-        st.session_state.setdefault("columns", [
-            'GLOBALEVENTID', 'SQLDATE', 'MonthYear', 'Year', 'FractionDate', 'Actor1Code', 'Actor1Name',
-            'Actor1CountryCode', 'Actor1KnownGroupCode', 'Actor1EthnicCode', 'Actor1Religion1Code',
-            'Actor1Religion2Code', 'Actor1Type1Code', 'Actor1Type2Code', 'Actor1Type3Code', 'Actor2Code',
-            'Actor2Name', 'Actor2CountryCode', 'Actor2KnownGroupCode', 'Actor2EthnicCode',
-            'Actor2Religion1Code', 'Actor2Religion2Code', 'Actor2Type1Code', 'Actor2Type2Code',
-            'Actor2Type3Code', 'IsRootEvent', 'EventCode', 'EventBaseCode', 'EventRootCode', 'QuadClass',
-            'GoldsteinScale', 'NumMentions', 'NumSources', 'NumArticles', 'AvgTone', 'Actor1Geo_Type',
-            'Actor1Geo_FullName', 'Actor1Geo_CountryCode', 'Actor1Geo_ADM1Code', 'Actor1Geo_Lat',
-            'Actor1Geo_Long', 'Actor1Geo_FeatureID', 'Actor2Geo_Type', 'Actor2Geo_FullName',
-            'Actor2Geo_CountryCode', 'Actor2Geo_ADM1Code', 'Actor2Geo_Lat', 'Actor2Geo_Long',
-            'Actor2Geo_FeatureID', 'ActionGeo_Type', 'ActionGeo_FullName', 'ActionGeo_CountryCode',
-            'ActionGeo_ADM1Code', 'ActionGeo_Lat', 'ActionGeo_Long', 'ActionGeo_FeatureID', 'DATEADDED',
-            'SOURCEURL'
-        ])
-        st.session_state.setdefault("selected_columns", [
+    def __init__(self, state=None, reporter=None):
+        # Ayarlar ve filtre listeleri verilen sözlükte tutulur; Streamlit uygulaması buraya
+        # self.state'i verir, komut satırı ve toplu işler düz bir dict kullanır.
+        self.state = {} if state is None else state
+        # İlerleme, uyarı ve hatalar bu nesneye bildirilir (varsayılan: stderr'e yazar).
+        self.reporter = reporter or LoadReporter()
+        self.state.setdefault("root_url", "http://data.gdeltproject.org/events/{DATE}.export.CSV.zip")
+        self.state.setdefault("columns", list(EVENT_SCHEMA))
+        self.state.setdefault("selected_columns", [
             'SQLDATE', 'Actor1Name', 'Actor1CountryCode', 'Actor2Name', 'Actor2CountryCode',
             'EventCode', 'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_Lat',
             'ActionGeo_Long', 'SOURCEURL'
         ])
-        st.session_state.setdefault("actor_1_code_list", [])
-        st.session_state.setdefault("actor_2_code_list", [])
-        st.session_state.setdefault("event_code_list", [])
-        st.session_state.setdefault("root_event_code_list", [])
+        self.state.setdefault("actor_1_code_list", [])
+        self.state.setdefault("actor_2_code_list", [])
+        self.state.setdefault("event_code_list", [])
+        self.state.setdefault("root_event_code_list", [])
+        # Diğer satır filtreleri; boş liste ya da None filtreyi kapatır. Aralıklar (en az, en çok)
+        # çiftleridir ve uçlardan biri None olabilir. Tüm filtreler get_filter ile tek bir
+        # EventFilter'da birleştirilir.
+        self.state.setdefault("quad_class_list", [])
+        self.state.setdefault("action_geo_country_code_list", [])
+        self.state.setdefault("is_root_event", None)
+        self.state.setdefault("goldstein_range", None)
+        self.state.setdefault("avg_tone_range", None)
+        self.state.setdefault("min_num_mentions", None)
+        self.state.setdefault("min_num_sources", None)
+        # Range pipeline'ında iki aşama arasında bekleyebilecek en fazla gün sayısı.
+        self.state.setdefault("pipeline_queue_size", 1)
+        # Ham arşivlerin disk önbelleği (GraphDataLoader ile ortak); None önbelleği kapatır.
+        self.state.setdefault("cache_dir", ".gdelt_cache")
+        self.state.setdefault("cache_max_bytes", 2 * 1024 ** 3)
+        # True ise önbellekteki arşivler koşullu GET (ETag/Last-Modified) ile yeniden doğrulanır.
+        self.state.setdefault("cache_revalidate", False)
+        # HttpTransport ayarları: zaman aşımları, yeniden deneme/bekleme ve host başına
+        # saniyedeki en fazla istek sayısı (rate_limit).
+        self.state.setdefault("http_options", {"timeout": 60, "retries": 5, "backoff": 0.5, "rate_limit": None})
+        # Ayrıştırılmış günlerin tarihe göre bölümlenmiş Parquet kopyası; None kapatır.
+        self.state.setdefault("store_dir", ".gdelt_store")
+        # Deponun bayt cinsinden üst sınırı (GraphDataLoader ile ortak); her yazmadan sonra en uzun
+        # süredir kullanılmayan günler silinir. None sınırsız bırakır.
+        self.state.setdefault("store_max_bytes", 4 * 1024 ** 3)
+        # Arşivi bu kadar satırlık parçalar halinde ayrıştırıp her parçayı hemen filtreler;
+        # None tüm dosyayı tek seferde okur.
+        self.state.setdefault("chunk_size", None)
+        # Arşivleri ayrıştıran motor: "c" pandas'ın tek thread'li C ayrıştırıcısı, "pyarrow" ise
+        # pyarrow'un çok thread'li CSV okuyucusu (string sütunlar Arrow bellekte, string[pyarrow] olarak kalır).
+        self.state.setdefault("parse_engine", "c")
+        # Aralık yüklemelerinin kontrol noktaları: biten her gün buraya yazılır, yarıda kalan
+        # bir yükleme aynı sorguyla tekrar çalıştırıldığında kaldığı yerden devam eder; None kapatır.
+        self.state.setdefault("checkpoint_dir", ".gdelt_checkpoints")
+        # Kontrol noktası aralık hatasız bitince silinir; yarıda bırakılıp bu kadar saniyedir
+        # devam ettirilmeyenler de temizlenir. None eski kontrol noktalarını tutar.
+        self.state.setdefault("checkpoint_max_age", 7 * 24 * 3600)
+        # Günlük olay küpü: yüklenen her günün ülke çifti, kök kod ve QuadClass bazında özeti;
+        # build_cube açıksa yükleme sırasında cube_dir'e yazılır.
+        self.state.setdefault("cube_dir", ".gdelt_cube")
+        self.state.setdefault("build_cube", False)
+        # Filtrelenmiş günlük sonuçların süreç içi LRU önbelleği (tüm oturumlarla ortak), bayt
+        # cinsinden üst sınır; aynı sorgunun günleri yeniden hesaplanmaz. None ya da 0 kapatır.
+        self.state.setdefault("result_cache_bytes", 512 * 1024 ** 2)
+        # Aralık yüklemesinin sonucu bellekte bu kadar baytı aşınca günler spill_dir altındaki
+        # geçici Arrow dosyalarına taşınır ve sonuç bir SpilledFrame olarak döner; None ya da 0 kapatır.
+        self.state.setdefault("spill_bytes", 1024 ** 3)
+        self.state.setdefault("spill_dir", None)
+        # DuckDB SQL motorunun thread sayısı (None: tüm çekirdekler) ve bellek sınırı (ör. '4GB';
+        # None: DuckDB varsayılanı). Sınırı aşan sorgular spill_dir'e (ya da sistemin geçici dizinine) taşar.
+        self.state.setdefault("sql_threads", None)
+        self.state.setdefault("sql_memory_limit", None)
+        # GDELT 2.0 15 dakikalık akışı: dizin adresi, en son yüklenen dilimin zaman damgası ve
+        # aradaki dilimlerin masterfilelist.txt'den mi listeleneceği.
+        self.state.setdefault("v2_base_url", "http://data.gdeltproject.org/gdeltv2/")
+        self.state.setdefault("events_v2_last_seen", None)
+        self.state.setdefault("v2_use_master_list", False)
+        # 0'dan büyükse her gün bu sayıda süreçten oluşan bir havuzda indirilip ayrıştırılır
+        # ve filtrelenir; 0 her şeyi bu süreçteki thread'lerde çalıştırır.
+        self.state.setdefault("workers", 0)
+        # Son yüklemenin gün ve aşama bazında süre, bayt ve satır ölçümleri; her yükleme yenisini başlatır.
+        self.metrics = StageMetrics("events")
+
+    def worker_state(self):
+        # Çalışan süreçlere gönderilen ayarlar; session_state'in geri kalanı (yüklenmiş veri,
+        # widget'lar) gönderilmez.
+        keys = (
+            "root_url", "columns", "selected_columns", "actor_1_code_list", "actor_2_code_list",
+            "event_code_list", "root_event_code_list", "quad_class_list", "action_geo_country_code_list",
+            "is_root_event", "goldstein_range", "avg_tone_range", "min_num_mentions", "min_num_sources",
+            "cache_dir", "cache_max_bytes",
+            "cache_revalidate", "http_options", "store_dir", "store_max_bytes", "chunk_size", "parse_engine", "cube_dir", "build_cube",
+        )
+        return {key: self.state[key] for key in keys}
 
-        print("EventDataLoader initialized.")
+    def load_day(self, date):
+        return self.filter_day(self.parse_data(self.fetch_data(date), date), date)
+
+    def filter_day(self, df, date=None):
+        # Parçalı ayrıştırma satırları parça parça filtreleyip sütunları seçtiyse gün olduğu gibi geçer.
+        if df.attrs.pop("filtered", False):
+            return df
+        with self.metrics.measure(date, "filter", rows_in=len(df)) as fields:
+            df = self.project(self.filter_data(df))
+            fields["rows_out"] = len(df)
+        return df
 
     def set_actor_filters(self, actor_1_list, actor_2_list):
-        st.session_state["actor_1_code_list"] = actor_1_list
-        st.session_state["actor_2_code_list"] = actor_2_list
+        self.state["actor_1_code_list"] = actor_1_list
+        self.state["actor_2_code_list"] = actor_2_list
 
     def set_eventcode_filters(self, event_code_list):
-        st.session_state["event_code_list"] = event_code_list
+        self.state["event_code_list"] = event_code_list
 
     def set_root_eventcode_filters(self, root_event_code_list):
-        st.session_state["root_event_code_list"] = root_event_code_list
+        self.state["root_event_code_list"] = root_event_code_list
 
-    def fix_event_code(self, row):
-        if len(row['EventRootCode']) == 1:
-            row['EventCode'] = f"0{row['EventCode']}"
-            row['EventRootCode'] = f"0{row['EventRootCode']}"
-        return row
+    def set_quadclass_filters(self, quad_class_list):
+        self.state["quad_class_list"] = quad_class_list
 
-    def load_data(self, date):
-        url = st.session_state["root_url"].format(DATE=date)
-        try:
-            df = pd.read_csv(url, sep='\t', header=None, low_memory=False)
-        except Exception as e:
-            st.error(f"Error loading data for {date}: {e}")
-            return pd.DataFrame()
-        df.columns = st.session_state["columns"]
+    def set_action_geo_filters(self, country_code_list):
+        self.state["action_geo_country_code_list"] = country_code_list
+
+    def set_root_event_filter(self, is_root_event):
+        # True yalnızca kök olayları, False yalnızca diğerlerini tutar; None filtreyi kapatır.
+        self.state["is_root_event"] = is_root_event
+
+    def set_range_filters(self, goldstein_range=None, avg_tone_range=None, min_num_mentions=None, min_num_sources=None):
+        self.state["goldstein_range"] = goldstein_range
+        self.state["avg_tone_range"] = avg_tone_range
+        self.state["min_num_mentions"] = min_num_mentions
+        self.state["min_num_sources"] = min_num_sources
+
+    def get_filter(self):
+        # Durumdaki tüm satır filtreleri tek bir koşul olarak. Aynı filtreler hangi sırayla
+        # girilirse girilsin eşit (ve aynı hash'e sahip) bir EventFilter verir.
+        return EventFilter(
+            self.state["actor_1_code_list"], self.state["actor_2_code_list"],
+            self.state["event_code_list"], self.state["root_event_code_list"],
+            quad_classes=self.state["quad_class_list"],
+            action_geo_country_codes=self.state["action_geo_country_code_list"],
+            is_root_event=self.state["is_root_event"],
+            goldstein_range=self.state["goldstein_range"], avg_tone_range=self.state["avg_tone_range"],
+            min_num_mentions=self.state["min_num_mentions"], min_num_sources=self.state["min_num_sources"],
+        )
+
+    def fix_event_codes(self, df):
+        # Tek haneli kök kodlar ("1" gibi) baştaki sıfırını kaybetmiştir; aynı satırlardaki
+        # EventCode, EventBaseCode ve EventRootCode değerlerine tek seferde "0" ekliyoruz.
+        if 'EventRootCode' not in df.columns:
+            return df
+        # string[pyarrow] sütunlarda eksik değerlerin uzunluğu NA'dır; maske bool kalmalı.
+        short = (df['EventRootCode'].str.len() == 1).fillna(False)
+        if short.any():
+            for column in ('EventCode', 'EventBaseCode', 'EventRootCode'):
+                if column in df.columns:
+                    df.loc[short, column] = "0" + df.loc[short, column]
+        root = df['EventRootCode']
+        if isinstance(root.dtype, pd.StringDtype):
+            # Diğer kategorik sütunlarda olduğu gibi kategoriler string[pyarrow] değil, Python str olmalı.
+            root = root.astype(object)
+        df['EventRootCode'] = root.astype(CATEGORY)
+        return df
 
-        df['EventCode'] = df['EventCode'].astype(str)
-        df['EventRootCode'] = df['EventRootCode'].astype(str)
-        df = df.apply(self.fix_event_code, axis=1)
+    def filter_columns(self):
+        # Etkin filtrelerin baktığı sütunlar.
+        return self.get_filter().columns()
 
-        actor_1_codes = st.session_state["actor_1_code_list"]
-        actor_2_codes = st.session_state["actor_2_code_list"]
-        event_codes = st.session_state["event_code_list"]
-        root_event_codes = st.session_state["root_event_code_list"]
+    def required_columns(self, columns=None):
+        # Seçili sütunlar ile etkin filtrelerin ihtiyaç duyduğu sütunlar, şemadaki sırayla.
+        # columns verilmezse 1.0 sütunları kullanılır.
+        columns = self.state["columns"] if columns is None else columns
+        needed = set(self.state["selected_columns"] or columns) | set(self.filter_columns())
+        if needed & {'EventCode', 'EventBaseCode'}:
+            # fix_event_codes hangi satırların düzeltileceğini EventRootCode'a bakarak bulur.
+            needed.add('EventRootCode')
+        return [column for column in columns if column in needed]
 
-        if event_codes:
-            mask = df['EventCode'].isin(event_codes)
-            df = df[mask].copy()
+    def project(self, df, columns=None):
+        # Yalnızca filtre için okunan sütunları sonuçtan çıkarır. Kategorilerde yalnızca kalan
+        # satırlardaki değerler bırakılır; böylece günün tipleri, parçalı okuma ya da indeks gibi
+        # hangi yoldan geldiğine bağlı olmaz.
+        selected = set(self.state["selected_columns"] or (self.state["columns"] if columns is None else columns))
+        return pd.DataFrame({
+            column: df[column].cat.remove_unused_categories()
+            if isinstance(df[column].dtype, pd.CategoricalDtype) else df[column]
+            for column in df.columns if column in selected
+        }, index=df.index)
 
-        if root_event_codes:
-            mask = df['EventRootCode'].isin(root_event_codes)
-            df = df[mask].copy()
+    def get_transport(self):
+        # Tüm oturumlar aynı bağlantı havuzunu ve hız sınırını paylaşır.
+        return HttpTransport.shared(**self.state["http_options"])
 
-        if actor_1_codes and actor_2_codes:
-            mask = (
-                ((df['Actor1Code'].isin(actor_1_codes)) & (df['Actor2Code'].isin(actor_2_codes))) |
-                ((df['Actor1Code'].isin(actor_2_codes)) & (df['Actor2Code'].isin(actor_1_codes)))
+    def download(self, url):
+        return self.get_transport().get(url)
+
+    def get_cache(self):
+        cache_dir = self.state["cache_dir"]
+        if cache_dir is None:
+            return None
+        return ArchiveCache.shared(cache_dir, self.state["cache_max_bytes"])
+
+    def get_store(self):
+        store_dir = self.state["store_dir"]
+        if store_dir is None:
+            return None
+        return ParquetStore(store_dir, self.state["store_max_bytes"])
+
+    def get_index(self, store, date):
+        # Yalnızca etkin kod filtrelerinin sütunlarının listeleri yüklenir. Günün indeksi yoksa
+        # indekslenen sütunlar Parquet'ten bir kereliğine okunup oluşturulur.
+        path = store.index_path("events", date)
+        index = PostingIndex.load(path, self.get_filter().code_columns())
+        if index is None:
+            index = PostingIndex.build(store.read("events", date, columns=INDEXED_COLUMNS), INDEXED_COLUMNS)
+            index.save(path)
+        return index
+
+    def get_cube(self):
+        if not self.state["build_cube"]:
+            return None
+        return EventCube(self.state["cube_dir"])
+
+    def query_cube(self, start_date, end_date, by=None, filters=None):
+        # Ham olaylara dokunmadan küpten toplu sonuç döndürür; küpte olmayan günler bildirilir.
+        dates = [date.strftime("%Y%m%d") for date in pd.date_range(start=start_date, end=end_date)]
+        df, missing = EventCube(self.state["cube_dir"]).query(dates, by, filters)
+        if missing:
+            self.reporter.warning(
+                f"{len(missing)} of {len(dates)} days are not in the event cube yet "
+                f"(first missing: {missing[0]}); load them with the cube enabled to include them."
             )
-            df = df[mask].copy()
-        elif actor_1_codes:
-            mask = (df['Actor1Code'].isin(actor_1_codes)) | (df['Actor2Code'].isin(actor_1_codes))
-            df = df[mask].copy()
-        elif actor_2_codes:
-            mask = (df['Actor1Code'].isin(actor_2_codes)) | (df['Actor2Code'].isin(actor_2_codes))
-            df = df[mask].copy()
+        return df
+
+    def get_sql_engine(self):
+        if self.state["store_dir"] is None:
+            raise ValueError("The SQL engine queries the Parquet store, which is disabled (store_dir is None).")
+        return DuckDBEngine(
+            self.state["store_dir"], self.state["sql_threads"], self.state["sql_memory_limit"], self.state["spill_dir"]
+        )
+
+    def filter_sql(self):
+        # filter_expression ile aynı koşullar, DuckDB motoru için bir WHERE koşulu olarak; filtre yoksa None.
+        return self.get_filter().to_sql()
+
+    def default_sql(self):
+        # Bir aralık yüklemesinin verdiği satır ve sütunları döndüren sorgu; SQL alanının başlangıç metni.
+        columns = self.state["selected_columns"] or self.state["columns"]
+        quoted = ", ".join('"' + column + '"' for column in columns)
+        sql = f"SELECT {quoted}\nFROM events"
+        where = self.filter_sql()
+        return f"{sql}\nWHERE {where}" if where else sql
+
+    def query_sql(self, start_date, end_date, sql=None):
+        # Parquet deposundaki günler üzerinde DuckDB ile SQL çalıştırır (varsayılan: default_sql).
+        # Depoda olmayan günler sorguya girmez ve bildirilir; büyük sonuçlar SpilledFrame olarak döner.
+        dates = [date.strftime("%Y%m%d") for date in pd.date_range(start=start_date, end=end_date)]
+        engine = self.get_sql_engine()
+        missing = engine.missing_dates("events", dates)
+        if missing:
+            self.reporter.warning(
+                f"{len(missing)} of {len(dates)} days are not in the Parquet store yet "
+                f"(first missing: {missing[0]}); load them to include them in SQL queries."
+            )
+        return engine.query(sql or self.default_sql(), dates, self.state["spill_bytes"], self.state["spill_dir"])
+
+    def range_query(self):
+        # Bir günün hangi satır ve sütunları vereceğini belirleyen ayarlar. Listeler sıralanıp
+        # tekrarlardan arındırılır; iki aktör listesi simetrik eşleştiği için sırası da önemsizdir.
+        # Böylece aynı filtrelerin farklı sırayla girilmesi aynı sorgu sayılır.
+        # Yalnızca kod filtreleri olan sorgular diğer filtreler eklenmeden önceki anahtarı verir.
+        return {
+            "root_url": self.state["root_url"],
+            "columns": self.state["columns"],
+            "selected_columns": sorted(set(self.state["selected_columns"] or [])),
+            **self.get_filter().query(),
+        }
+
+    def get_checkpoint(self):
+        checkpoint_dir = self.state["checkpoint_dir"]
+        if checkpoint_dir is None:
+            return None
+        RangeCheckpoint.prune(checkpoint_dir, self.state["checkpoint_max_age"])
+        return RangeCheckpoint(
+            checkpoint_dir, "events", self.range_query(),
+            dtypes=PARSED_SCHEMA, arrow_strings=self.arrow_strings()
+        )
+
+    def get_results(self):
+        if not self.state["result_cache_bytes"]:
+            return None
+        return ResultCache.shared(self.state["result_cache_bytes"])
+
+    def fetch_data(self, date):
+        # Parquet'e dönüştürülmüş günlerin arşivini tekrar indirmeye gerek yok.
+        store = self.get_store()
+        if store is not None and store.has("events", date):
+            self.metrics.record(date, "fetch", source="store")
+            return None
+        return self.fetch_archive(date)
+
+    def fetch_archive(self, date):
+        # Günün arşivini arşiv önbelleğinden ya da sunucudan alır.
+        url = self.state["root_url"].format(DATE=date)
+        with self.metrics.measure(date, "fetch") as fields:
+            cache = self.get_cache()
+            if cache is None:
+                raw = self.download(url)
+                fields["source"] = "download"
+            else:
+                # fetch yalnızca önbellekte olmayan (ya da yeniden doğrulanan) arşivler için çağrılır.
+                fields["source"] = "archive_cache"
+
+                def fetch(validators):
+                    body, validators = self.get_transport().fetch(url, validators)
+                    fields["source"] = "download" if body is not None else "revalidated"
+                    return body, validators
+                raw = cache.get_or_fetch("events", date, fetch, revalidate=self.state["cache_revalidate"])
+            fields["bytes_out"] = len(raw)
+        return raw
 
+    def read_stored(self, store, date, cube=None):
+        # Gün zaten Parquet'te: yalnızca gereken sütunlar okunur. Gün depoda yoksa FileNotFoundError.
+        required = self.required_columns()
+        if cube is not None:
+            with self.metrics.measure(date, "cube"):
+                cube.write(date, EventCube.rollup(store.read("events", date, columns=CUBE_COLUMNS)))
+        event_filter = self.get_filter()
+        # Okunan sütunlar ayrıştırılmış günün tiplerine çevrilir.
+        dtypes = dict(dtypes=PARSED_SCHEMA, arrow_strings=self.arrow_strings())
+        with self.metrics.measure(date, "store_read") as fields:
+            if not event_filter:
+                df = store.read("events", date, columns=required, **dtypes)
+            elif not event_filter.code_columns():
+                # Yalnızca indekslenmeyen filtreler varsa koşul Parquet okuyucusuna verilir.
+                df = store.read("events", date, columns=required, filter=event_filter.expression(), **dtypes)
+            else:
+                # Kod filtresi varsa eşleşen satırlar indeksten bulunur ve yalnızca onlar okunur
+                # (diğer filtreler filter_day'de uygulanır); hiç eşleşme yoksa Parquet dosyası hiç açılmaz.
+                rows = event_filter.index_rows(self.get_index(store, date))
+                if not len(rows):
+                    df = ParquetStore.to_pandas(ParquetStore.arrow_schema(EVENT_SCHEMA, required).empty_table(), **dtypes)
+                else:
+                    df = store.take("events", date, rows, columns=required, **dtypes)
+            fields["rows_out"] = len(df)
         return df
 
-    def load_data_range(self, start_date, end_date):
+    def parse_data(self, raw, date=None):
+        store = self.get_store()
+        # Küp açıksa ve gün henüz küpte değilse, günün filtrelenmemiş hali burada özetlenir.
+        cube = self.get_cube() if date is not None else None
+        if cube is not None and cube.has(date):
+            cube = None
+        if raw is None:
+            try:
+                return self.read_stored(store, date, cube)
+            except FileNotFoundError:
+                # Gün fetch_data'dan sonra depodan silinmiş (ör. başka bir oturumun bütçe budamasıyla):
+                # arşiv indirilip yeniden ayrıştırılır.
+                raw = self.fetch_archive(date)
+
+        columns = self.state["columns"]
+        required = self.required_columns()
+        # Parquet'e dönüştürülecek gün bir kereliğine tüm sütunlarla ayrıştırılır; aksi halde
+        # yalnızca gereken sütunlar (ve küp için gerekenler) okunur.
+        convert = store is not None and date is not None
+        usecols = required
+        if cube is not None:
+            usecols = [column for column in columns if column in set(required) | set(CUBE_COLUMNS)]
+        options = dict(
+            sep='\t', header=None, names=columns, usecols=None if convert else usecols,
+            dtype={column: EVENT_SCHEMA[column] for column in columns if column in EVENT_SCHEMA}
+        )
+        schema = ParquetStore.arrow_schema(EVENT_SCHEMA, columns)
+        arrow = self.arrow_reader(options["dtype"], options["usecols"])
+        chunk_size = self.state["chunk_size"]
+        # Arşiv açılırken geçen süre ve açılmış bayt sayısı ölçülür; ayrıştırma süresinden düşülür.
+        stream = TimedReader.open_zip(raw)
+        if not chunk_size:
+            with stream, self.metrics.measure(date, "parse") as fields:
+                df = arrow.read(stream) if arrow is not None else pd.read_csv(stream, **options)
+                fields.update(seconds=-stream.seconds, bytes_in=stream.bytes, rows_out=len(df))
+            self.metrics.record(date, "unzip", stream.seconds, bytes_in=len(raw), bytes_out=stream.bytes)
+            with self.metrics.measure(date, "fix_event_codes", rows_in=len(df)):
+                df = self.fix_event_codes(df)
+            if convert:
+                with self.metrics.measure(date, "store_write", rows_in=len(df)):
+                    store.write("events", date, df, schema)
+                    PostingIndex.build(df, INDEXED_COLUMNS).save(store.index_path("events", date))
+            if cube is not None:
+                with self.metrics.measure(date, "cube", rows_in=len(df)):
+                    cube.write(date, EventCube.rollup(df))
+            return df[required] if convert or cube is not None else df
+
+        # Parçalı mod: her parça Parquet'e yazılır ve hemen filtrelenip sütunları seçilir, böylece
+        # bellekte yalnızca o anki parça ile filtreden geçen satırlar tutulur.
+        kept = []
+        rollups = []
+        with contextlib.ExitStack() as stack:
+            write = None
+            if convert:
+                write = stack.enter_context(store.writer("events", date, schema))
+            stack.enter_context(stream)
+            if arrow is not None:
+                reader = arrow.read_chunks(stream, chunk_size)
+            else:
+                reader = stack.enter_context(pd.read_csv(stream, chunksize=chunk_size, **options))
+            # Parçaların aşamaları ayrı ölçülür ve ayrıştırma süresinden düşülür (parent).
+            parse = stack.enter_context(self.metrics.measure(date, "parse", rows_out=0))
+            for chunk in reader:
+                parse["rows_out"] += len(chunk)
+                with self.metrics.measure(date, "fix_event_codes", parent=parse, rows_in=len(chunk)):
+                    chunk = self.fix_event_codes(chunk)
+                if write is not None:
+                    with self.metrics.measure(date, "store_write", parent=parse, rows_in=len(chunk)):
+                        write(chunk)
+                if cube is not None:
+                    with self.metrics.measure(date, "cube", parent=parse, rows_in=len(chunk)):
+                        rollups.append(EventCube.rollup(chunk))
+                with self.metrics.measure(date, "chunk_filter", parent=parse, rows_in=len(chunk)) as fields:
+                    kept.append(self.project(self.filter_data(chunk[required])))
+                    fields["rows_out"] = len(kept[-1])
+            parse.update(seconds=parse["seconds"] - stream.seconds, bytes_in=stream.bytes)
+        self.metrics.record(date, "unzip", stream.seconds, bytes_in=len(raw), bytes_out=stream.bytes)
+        if cube is not None:
+            with self.metrics.measure(date, "cube"):
+                cube.write(date, EventCube.combine(rollups))
+        df = self.concat_frames(kept, required) if kept else self.project(pd.DataFrame(columns=required))
+        # filter_day aynı filtreyi ikinci kez uygulamasın.
+        df.attrs["filtered"] = True
+        return df
+
+    def arrow_reader(self, dtypes, usecols=None):
+        # parse_engine "pyarrow" ise arşivleri okuyacak ArrowCsvReader, "c" ise None (pd.read_csv).
+        engine = self.state["parse_engine"]
+        if engine not in ("c", "pyarrow"):
+            raise ValueError(f"Unknown parse engine '{engine}'; use 'c' or 'pyarrow'.")
+        if engine == "c":
+            return None
+        return ArrowCsvReader(dtypes, usecols=usecols)
+
+    def arrow_strings(self):
+        # parse_engine "pyarrow" ise metin sütunları string[pyarrow] tipindedir; Parquet'ten
+        # okunan günler de aynı tipe çevrilir.
+        return self.state["parse_engine"] == "pyarrow"
+
+    def parse_slice(self, raw):
+        # GDELT 2.0 dilimi: 2.0 şemasıyla, yalnızca gereken sütunlar okunur.
+        columns = list(EVENT_SCHEMA_V2)
+        df = pd.read_csv(
+            io.BytesIO(raw), sep='\t', header=None, compression='zip', names=columns,
+            usecols=self.required_columns(columns), dtype=EVENT_SCHEMA_V2, encoding_errors='replace'
+        )
+        return self.fix_event_codes(df)
+
+    def get_feed(self):
+        return IncrementalFeed(
+            self.state["v2_base_url"], "events", self.download, use_master_list=self.state["v2_use_master_list"]
+        )
+
+    def load_updates(self, since=None):
+        # GDELT 2.0'da en son yüklenen dilimden sonra yayımlanan 15 dakikalık dilimleri indirir,
+        # aynı filtrelerden geçirir ve yalnızca yeni satırları döndürür. Yüklenen her dilim
+        # events_v2_last_seen'e yazılır; bir sonraki çağrı oradan devam eder.
+        feed = self.get_feed()
+        entries = feed.pending(self.state["events_v2_last_seen"], since)
+        columns = list(EVENT_SCHEMA_V2)
+        self.reporter.start(len(entries))
         data_frames = []
+        for i, entry in enumerate(entries):
+            try:
+                df = self.project(self.filter_data(self.parse_slice(feed.fetch(entry))), columns)
+            except TransportError as e:
+                if e.status != 404:
+                    # Geçici olmayan bir hata: bu dilim bir sonraki yoklamada tekrar denenir.
+                    self.reporter.error(f"Error loading the update {entry['timestamp']}: {e}")
+                    break
+                # GDELT bazı dilimleri hiç yayımlamaz; bunlar atlanır.
+                self.reporter.warning(f"The update {entry['timestamp']} was not published; skipping it.")
+            except Exception as e:
+                self.reporter.error(f"Error loading the update {entry['timestamp']}: {e}")
+                break
+            else:
+                if not df.empty:
+                    data_frames.append(df)
+            self.state["events_v2_last_seen"] = entry["timestamp"]
+            self.reporter.progress(i + 1, len(entries), entry["timestamp"])
+        self.reporter.finish()
+        selected = self.state["selected_columns"] or columns
+        return self.concat_frames(data_frames, [column for column in columns if column in selected])
+
+    def concat_frames(self, chunks, columns):
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        # Boş parçalar concat'e verilmez (sonucun tiplerini değiştirirler); hepsi boşsa biri şema olarak kalır.
+        frames = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+        # Parçaların (ya da günlerin) kategorileri farklı olduğunda concat object'e döner ve tümü boş
+        # parçalar sonucun tipine karışır. Her parçaya bütün kategoriler verilir; tipler aynı olunca
+        # sütun kategorik kalır.
+        dtypes = {}
+        for column in frames[0].columns:
+            if CATEGORY not in (PARSED_SCHEMA.get(column), EVENT_SCHEMA_V2.get(column)):
+                continue
+            if all(frame[column].dtype == frames[0][column].dtype == CATEGORY for frame in frames):
+                continue
+            categories = pd.Index(np.concatenate([
+                frame[column].cat.categories.to_numpy(object) if frame[column].dtype == CATEGORY
+                else frame[column].dropna().unique().astype(object)
+                for frame in frames
+            ])).unique()
+            dtypes[column] = pd.CategoricalDtype(categories.sort_values())
+        frames = [frame.astype({column: dtype for column, dtype in dtypes.items() if frame[column].dtype != dtype})
+                  for frame in frames]
+        return pd.concat(frames, ignore_index=True)
+
+    def filter_expression(self):
+        # Etkin filtreler Parquet okuyucusu için tek bir koşul olarak; filtre yoksa None.
+        return self.get_filter().expression()
+
+    def filter_data(self, df):
+        # Tüm filtreler tek seferde bir maske olarak hesaplanır ve satırlar bir kez kopyalanır.
+        event_filter = self.get_filter()
+        if not event_filter:
+            return df
+        return df.take(np.flatnonzero(event_filter.mask(df)))
+
+    def load_data(self, date):
+        self.metrics = StageMetrics("events")
+        try:
+            df = self.parse_data(self.fetch_data(date), date)
+        except Exception as e:
+            self.reporter.error(f"Error loading data for {date}: {e}")
+            self.metrics.publish(days=1, errors=1)
+            return pd.DataFrame()
+        df = self.filter_day(df, date)
+        self.metrics.publish(days=1)
+        return df
+
+    def load_data_range(self, start_date, end_date):
         # Belirtilen tarih aralığındaki tüm tarihleri "YYYYMMDD" formatında elde ediyoruz.
         date_range = [date.strftime("%Y%m%d") for date in pd.date_range(start=start_date, end=end_date)]
 
-        # Progress bar ve mesaj göstermek için alan oluşturuyoruz.
-        progress_bar = st.progress(0)
-        progress_text = st.empty()  # İlerleme mesajlarını göstermek için boş bir alan.
-
         total_dates = len(date_range)
+        self.reporter.start(total_dates)
+        self.metrics = StageMetrics("events")
+        errors = 0
+
+        # Aynı sorgu için bellekte sonucu olan günler (başka bir oturumda yüklenmiş olsalar da)
+        # doğrudan alınır; aralık genişletildiğinde yalnızca yeni günler hesaplanır.
+        # Önbellekteki günler dönüştürülmeden verilir; ayrıştırma motoru metin sütunlarının
+        # tipini belirlediği için anahtara girer.
+        results = self.get_results()
+        query_key = ResultCache.query_key(dict(self.range_query(), parse_engine=self.state["parse_engine"]))
+        cached, rest = results.split("events", query_key, date_range) if results is not None else ({}, date_range)
+        # Kontrol noktasında tamamlanmış görünen günler atlanır; daha önce hata veren günler
+        # yeniden denenir.
+        checkpoint = self.get_checkpoint()
+        done, pending = checkpoint.split(rest) if checkpoint is not None else ([], rest)
+        cube = self.get_cube()
+        if cube is not None and (cached or done):
+            # Küpe henüz girmemiş günler, özetlenebilmeleri için yeniden yüklenir.
+            cached = {date: df for date, df in cached.items() if cube.has(date)}
+            done = [date for date in done if cube.has(date)]
+            skipped = set(cached) | set(done)
+            pending = [date for date in date_range if date not in skipped]
+        if cached:
+            self.reporter.info(
+                f"Reusing {len(cached)} of {total_dates} days from the result cache; "
+                f"{total_dates - len(cached)} to load."
+            )
+        if checkpoint is not None and (done or checkpoint.failed(pending)):
+            self.reporter.info(
+                f"Resuming from checkpoint: {len(done)} of {total_dates} days already loaded, "
+                f"{len(pending)} to load ({len(checkpoint.failed(pending))} retried after an error)."
+            )
+
+        # İndirme, ayrıştırma ve filtreleme aşamaları eşzamanlı çalışır; sonuçlar tarih sırasıyla gelir.
+        if self.state["workers"]:
+            # Süreç havuzu: her gün ayrı bir süreçte işlenir, sonuçlar Arrow ile paylaşılan bellekten gelir.
+            pipeline = ProcessRangePipeline(
+                functools.partial(load_event_day, self.worker_state()),
+                self.state["workers"], queue_size=self.state["pipeline_queue_size"],
+                to_pandas=functools.partial(ParquetStore.to_pandas, dtypes=PARSED_SCHEMA, arrow_strings=self.arrow_strings())
+            )
+        else:
+            pipeline = RangePipeline(
+                self.fetch_data, self.parse_data, self.filter_day,
+                queue_size=self.state["pipeline_queue_size"],
+                thread_hook=self.reporter.thread_hook
+            )
+        # Günler tarih sırasıyla, geldikleri anda biriktirilir: tamamlanmış günler önbellekten ya da
+        # kontrol noktasından okunur, diğerleri pipeline'dan alınır. Bellek sınırı aşılınca veri diske taşar.
+        accumulator = FrameAccumulator(
+            self.state["spill_bytes"], self.state["spill_dir"],
+            lambda frames: self.concat_frames(frames, self.state["columns"])
+        )
+        loaded = pipeline.run(pending)
         for i, date in enumerate(date_range):
-            # İlerleme mesajını güncelleyelim.
-            progress_text.text(f"Loading data for {date}...")
-            df = self.load_data(date)
-            if not df.empty:
-                data_frames.append(df)
-            # Progress bar'ı güncelle.
-            progress_bar.progress((i + 1) / total_dates)
-
-        progress_text.text("Data loading completed!")
-
-        if data_frames:
-            return pd.concat(data_frames, ignore_index=True)
+            df = None
+            if date in cached:
+                df = cached[date]
+                self.metrics.record(date, "result_cache", source="result_cache", rows_out=len(df))
+            elif date in done:
+                if checkpoint.rows(date):
+                    with self.metrics.measure(date, "checkpoint", source="checkpoint") as fields:
+                        df = checkpoint.read(date)
+                        fields["rows_out"] = len(df)
+                    if results is not None:
+                        results.put("events", query_key, date, df)
+            else:
+                date, df, error = next(loaded)
+                if error is not None:
+                    errors += 1
+                    self.reporter.error(f"Error loading data for {date}: {error}")
+                    if checkpoint is not None:
+                        checkpoint.record_failure(date, error)
+                else:
+                    # Çalışan süreçlerin aşama ölçümleri Arrow meta verisiyle gelir.
+                    self.metrics.merge(df.attrs.pop("stage_metrics", []))
+                    if checkpoint is not None:
+                        checkpoint.record(date, df)
+                    if results is not None:
+                        # Boş günler de saklanır ki eşleşmeyen günler tekrar taranmasın.
+                        results.put("events", query_key, date, df)
+            if df is not None:
+                with self.metrics.measure(date, "collect", rows_in=len(df)):
+                    accumulator.append(df)
+            # İlerlemeyi bildir.
+            self.reporter.progress(i + 1, total_dates, date)
+
+        self.reporter.finish()
+        # Tüm günler yüklendi: devam ettirilecek bir şey kalmadığından kontrol noktası silinir.
+        if checkpoint is not None and not errors:
+            checkpoint.remove()
+
+        cache = self.get_cache()
+        if cache is not None:
+            stats = cache.stats()
+            self.reporter.detail(
+                f"Archive cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} files ({stats['bytes'] / 1024 ** 2:.0f} MiB) on disk."
+            )
+        if results is not None:
+            stats = results.stats()
+            self.reporter.detail(
+                f"Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} days ({stats['bytes'] / 1024 ** 2:.0f} MiB) in memory."
+            )
+
+        with self.metrics.measure(None, "concat") as fields:
+            data = accumulator.result()
+            fields["rows_out"] = 0 if data is None else len(data)
+        if isinstance(data, SpilledFrame):
+            self.reporter.detail(
+                f"Spilled {len(data)} rows ({data.bytes / 1024 ** 2:.0f} MiB) to disk after "
+                f"{self.state['spill_bytes'] / 1024 ** 2:.0f} MiB in memory."
+            )
+        self.metrics.publish(days=total_dates, errors=errors)
+        self.reporter.metrics(self.metrics)
+        if data is not None:
+            return data
         else:
-            st.warning("No data loaded for the given date range.")
+            self.reporter.warning("No data loaded for the given date range.")
             return pd.DataFrame()
 
+
+def load_event_day(state, date):
+    # ProcessRangePipeline çalışanlarında çağrılır: bir günü indirir, ayrıştırır ve filtreler.
+    # Aşama ölçümleri günün attrs'ına eklenir; Arrow meta verisiyle ana sürece taşınır.
+    loader = EventDataLoader(state)
+    df = loader.load_day(date)
+    df.attrs["stage_metrics"] = loader.metrics.sorted_records()
+    return df
@@ -0,0 +1,307 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+from src.dataloaders.DuckDBEngine import sql_literal
+from src.dataloaders.ParquetStore import ParquetStore
+
+
+class EventFilter:
+    """
+    The row filters of an event load, compiled into one predicate.
+
+    Conditions:
+        actor codes          Actor1Code/Actor2Code; with two lists the pair matches either way
+                             round, with one list either actor matches
+        event codes          EventCode, EventRootCode
+        quad classes         QuadClass
+        action countries     ActionGeo_CountryCode
+        root events          IsRootEvent (True: root events only, False: the others)
+        ranges               GoldsteinScale and AvgTone between a minimum and a maximum
+                             (either may be None), compared as float32 like the columns
+        minimum counts       NumMentions, NumSources
+
+    All active conditions are ANDed; missing values never match. mask() evaluates them at
+    once into a single boolean array, so a frame is sliced only once; expression(),
+    to_sql() and index_rows() give the same conditions to the Parquet reader, DuckDB and a
+    day's PostingIndex.
+
+    A filter is immutable. The lists are sorted and deduplicated (and the two actor lists
+    ordered, as they match symmetrically), so filters entered in any order are equal and
+    hash alike, and a filter can be used as a cache key.
+    """
+
+    CODE_COLUMNS = ['Actor1Code', 'Actor2Code', 'EventCode', 'EventRootCode']
+    # Types of the range columns in the event schema; bounds are compared in these types.
+    RANGE_TYPES = {'GoldsteinScale': "float32", 'AvgTone': "float32", 'NumMentions': "int32", 'NumSources': "int32"}
+    SQL_TYPES = {"float32": "FLOAT", "int32": "INTEGER"}
+
+    def __init__(self, actor_1_codes=(), actor_2_codes=(), event_codes=(), root_event_codes=(),
+                 quad_classes=(), action_geo_country_codes=(), is_root_event=None, goldstein_range=None,
+                 avg_tone_range=None, min_num_mentions=None, min_num_sources=None):
+        """
+        Parameters:
+            actor_1_codes (list): Actor 1 codes.
+            actor_2_codes (list): Actor 2 codes.
+            event_codes (list): Event codes, e.g. '081'.
+            root_event_codes (list): Root event codes, e.g. '14'.
+            quad_classes (list): Quad classes (1-4).
+            action_geo_country_codes (list): Action location country codes (FIPS), e.g. 'US'.
+            is_root_event (bool, optional): Keep only root events (True) or only the others (False).
+            goldstein_range (tuple, optional): (minimum, maximum) Goldstein scale; either may be None.
+            avg_tone_range (tuple, optional): (minimum, maximum) average tone; either may be None.
+            min_num_mentions (int, optional): Minimum number of mentions.
+            min_num_sources (int, optional): Minimum number of sources.
+        """
+        self.actor_1_codes, self.actor_2_codes = sorted([self._codes(actor_1_codes), self._codes(actor_2_codes)])
+        self.event_codes = self._codes(event_codes)
+        self.root_event_codes = self._codes(root_event_codes)
+        self.quad_classes = tuple(sorted({int(value) for value in quad_classes or ()}))
+        self.action_geo_country_codes = self._codes(action_geo_country_codes)
+        self.is_root_event = None if is_root_event is None else bool(is_root_event)
+        self.goldstein_range = self._range(goldstein_range, "Goldstein scale")
+        self.avg_tone_range = self._range(avg_tone_range, "average tone")
+        self.min_num_mentions = None if min_num_mentions is None else int(min_num_mentions)
+        self.min_num_sources = None if min_num_sources is None else int(min_num_sources)
+        self.key = (
+            self.actor_1_codes, self.actor_2_codes, self.event_codes, self.root_event_codes, self.quad_classes,
+            self.action_geo_country_codes, self.is_root_event, self.goldstein_range, self.avg_tone_range,
+            self.min_num_mentions, self.min_num_sources,
+        )
+
+    @staticmethod
+    def _codes(values):
+        return tuple(sorted({str(value) for value in values or ()}))
+
+    @staticmethod
+    def _range(bounds, name):
+        if bounds is None:
+            return None
+        low, high = (None if bound is None else float(bound) for bound in bounds)
+        if low is None and high is None:
+            return None
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"The minimum {name} {low} is larger than the maximum {high}.")
+        return low, high
+
+    def __eq__(self, other):
+        return isinstance(other, EventFilter) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"EventFilter({self.query()})"
+
+    def __bool__(self):
+        return bool(self.columns())
+
+    def _ranges(self):
+        # (column, minimum, maximum) of the active ranges and minimum counts.
+        ranges = []
+        for column, bounds in (('GoldsteinScale', self.goldstein_range), ('AvgTone', self.avg_tone_range)):
+            if bounds is not None:
+                ranges.append((column,) + bounds)
+        for column, minimum in (('NumMentions', self.min_num_mentions), ('NumSources', self.min_num_sources)):
+            if minimum is not None:
+                ranges.append((column, minimum, None))
+        return ranges
+
+    def columns(self):
+        """
+        Returns the columns the active conditions look at.
+
+        Returns:
+            list: Column names.
+        """
+        columns = []
+        if self.actor_1_codes or self.actor_2_codes:
+            columns += ['Actor1Code', 'Actor2Code']
+        if self.event_codes:
+            columns.append('EventCode')
+        if self.root_event_codes:
+            columns.append('EventRootCode')
+        if self.quad_classes:
+            columns.append('QuadClass')
+        if self.action_geo_country_codes:
+            columns.append('ActionGeo_CountryCode')
+        if self.is_root_event is not None:
+            columns.append('IsRootEvent')
+        return columns + [column for column, _, _ in self._ranges()]
+
+    def code_columns(self):
+        """
+        Returns the columns of the active code conditions, the ones a PostingIndex covers.
+
+        Returns:
+            list: Column names.
+        """
+        return [column for column in self.columns() if column in self.CODE_COLUMNS]
+
+    def query(self):
+        """
+        Returns the active conditions as JSON-serializable settings, for the keys of the
+        result cache and of checkpoints. Filters on codes only give the same settings as
+        before the other conditions existed, so their checkpoints stay valid.
+
+        Returns:
+            dict: The settings.
+        """
+        query = {
+            "actor_code_lists": [list(self.actor_1_codes), list(self.actor_2_codes)],
+            "event_code_list": list(self.event_codes),
+            "root_event_code_list": list(self.root_event_codes),
+        }
+        extra = {
+            "quad_class_list": list(self.quad_classes) or None,
+            "action_geo_country_code_list": list(self.action_geo_country_codes) or None,
+            "is_root_event": self.is_root_event,
+            "goldstein_range": self.goldstein_range and list(self.goldstein_range),
+            "avg_tone_range": self.avg_tone_range and list(self.avg_tone_range),
+            "min_num_mentions": self.min_num_mentions,
+            "min_num_sources": self.min_num_sources,
+        }
+        query.update({name: value for name, value in extra.items() if value is not None})
+        return query
+
+    def mask(self, df):
+        """
+        Evaluates all active conditions on a frame at once.
+
+        Parameters:
+            df (pd.DataFrame): Event rows holding the columns().
+
+        Returns:
+            np.ndarray: Boolean mask, one entry per row.
+        """
+        def isin(column, values):
+            return df[column].isin(values).to_numpy(dtype=bool)
+
+        mask = np.ones(len(df), dtype=bool)
+        if self.event_codes:
+            mask &= isin('EventCode', self.event_codes)
+        if self.root_event_codes:
+            mask &= isin('EventRootCode', self.root_event_codes)
+        if self.actor_1_codes:
+            # Sorted, so only the second list can be the single one.
+            mask &= (isin('Actor1Code', self.actor_1_codes) & isin('Actor2Code', self.actor_2_codes)) | \
+                (isin('Actor1Code', self.actor_2_codes) & isin('Actor2Code', self.actor_1_codes))
+        elif self.actor_2_codes:
+            mask &= isin('Actor1Code', self.actor_2_codes) | isin('Actor2Code', self.actor_2_codes)
+        if self.quad_classes:
+            mask &= isin('QuadClass', self.quad_classes)
+        if self.action_geo_country_codes:
+            mask &= isin('ActionGeo_CountryCode', self.action_geo_country_codes)
+        if self.is_root_event is not None:
+            mask &= df['IsRootEvent'].to_numpy() == int(self.is_root_event)
+        for column, low, high in self._ranges():
+            # Bounds take the column's type, so float32 columns are compared as float32.
+            values = df[column].to_numpy()
+            if low is not None:
+                mask &= values >= values.dtype.type(low)
+            if high is not None:
+                mask &= values <= values.dtype.type(high)
+        return mask
+
+    def expression(self):
+        """
+        Returns the active conditions as a predicate for the Parquet reader.
+
+        Returns:
+            pyarrow.dataset.Expression or None: The predicate, or None without conditions.
+        """
+        field = ds.field
+        conditions = []
+        if self.event_codes:
+            conditions.append(field('EventCode').isin(self.event_codes))
+        if self.root_event_codes:
+            conditions.append(field('EventRootCode').isin(self.root_event_codes))
+        if self.actor_1_codes:
+            conditions.append(
+                (field('Actor1Code').isin(self.actor_1_codes) & field('Actor2Code').isin(self.actor_2_codes)) |
+                (field('Actor1Code').isin(self.actor_2_codes) & field('Actor2Code').isin(self.actor_1_codes))
+            )
+        elif self.actor_2_codes:
+            conditions.append(field('Actor1Code').isin(self.actor_2_codes) | field('Actor2Code').isin(self.actor_2_codes))
+        if self.quad_classes:
+            conditions.append(field('QuadClass').isin(pa.array(self.quad_classes, pa.int8())))
+        if self.action_geo_country_codes:
+            conditions.append(field('ActionGeo_CountryCode').isin(self.action_geo_country_codes))
+        if self.is_root_event is not None:
+            conditions.append(field('IsRootEvent') == pa.scalar(int(self.is_root_event), pa.int8()))
+        for column, low, high in self._ranges():
+            arrow_type = ParquetStore.ARROW_TYPES[self.RANGE_TYPES[column]]
+            if low is not None:
+                conditions.append(field(column) >= pa.scalar(low, arrow_type))
+            if high is not None:
+                conditions.append(field(column) <= pa.scalar(high, arrow_type))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def to_sql(self):
+        """
+        Returns the active conditions as a SQL condition on the 'events' view of the DuckDB
+        engine.
+
+        Returns:
+            str or None: The condition, or None without conditions.
+        """
+        def isin(column, values):
+            return f'"{column}" IN ({", ".join(sql_literal(value) for value in values)})'
+
+        conditions = []
+        if self.event_codes:
+            conditions.append(isin('EventCode', self.event_codes))
+        if self.root_event_codes:
+            conditions.append(isin('EventRootCode', self.root_event_codes))
+        if self.actor_1_codes:
+            conditions.append(
+                f"(({isin('Actor1Code', self.actor_1_codes)} AND {isin('Actor2Code', self.actor_2_codes)}) OR "
+                f"({isin('Actor1Code', self.actor_2_codes)} AND {isin('Actor2Code', self.actor_1_codes)}))"
+            )
+        elif self.actor_2_codes:
+            conditions.append(f"({isin('Actor1Code', self.actor_2_codes)} OR {isin('Actor2Code', self.actor_2_codes)})")
+        if self.quad_classes:
+            conditions.append(f'"QuadClass" IN ({", ".join(str(value) for value in self.quad_classes)})')
+        if self.action_geo_country_codes:
+            conditions.append(isin('ActionGeo_CountryCode', self.action_geo_country_codes))
+        if self.is_root_event is not None:
+            conditions.append(f'"IsRootEvent" = {int(self.is_root_event)}')
+        for column, low, high in self._ranges():
+            sql_type = self.SQL_TYPES[self.RANGE_TYPES[column]]
+            for operator, bound in ((">=", low), ("<=", high)):
+                if bound is not None:
+                    conditions.append(f'"{column}" {operator} CAST({bound!r} AS {sql_type})')
+        return " AND ".join(conditions) or None
+
+    def index_rows(self, index):
+        """
+        Finds the rows of a day that match the code conditions, from its PostingIndex. The
+        other conditions are not covered by the index; the rows still have to be masked.
+
+        Parameters:
+            index (PostingIndex): The day's index, holding the code_columns().
+
+        Returns:
+            np.ndarray or None: Sorted row offsets, or None without code conditions.
+        """
+        row_sets = []
+        if self.event_codes:
+            row_sets.append(index.lookup('EventCode', self.event_codes))
+        if self.root_event_codes:
+            row_sets.append(index.lookup('EventRootCode', self.root_event_codes))
+        if self.actor_1_codes:
+            row_sets.append(np.union1d(
+                np.intersect1d(index.lookup('Actor1Code', self.actor_1_codes), index.lookup('Actor2Code', self.actor_2_codes)),
+                np.intersect1d(index.lookup('Actor1Code', self.actor_2_codes), index.lookup('Actor2Code', self.actor_1_codes))
+            ))
+        elif self.actor_2_codes:
+            row_sets.append(np.union1d(index.lookup('Actor1Code', self.actor_2_codes), index.lookup('Actor2Code', self.actor_2_codes)))
+        if not row_sets:
+            return None
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
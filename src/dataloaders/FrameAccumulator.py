@@ -0,0 +1,64 @@
+import pandas as pd
+from src.dataloaders.SpilledFrame import SpilledFrame
+
+
+class FrameAccumulator:
+    """
+    Collects the daily frames of a range load in date order within a memory budget.
+
+    Frames are kept in memory until their total size (deep memory usage) exceeds max_bytes.
+    From then on, the frames collected so far and every later one are written to a
+    SpilledFrame on disk, so a long unfiltered range never has to fit in memory at once.
+    """
+
+    def __init__(self, max_bytes=None, spill_dir=None, concat=None):
+        """
+        Parameters:
+            max_bytes (int, optional): Memory budget of the collected frames; never spills if
+                None or 0.
+            spill_dir (str, optional): Where the spilled data is written, see SpilledFrame.
+            concat (callable, optional): Combines the in-memory frames into the result;
+                pd.concat with a fresh index if None.
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.concat = concat or (lambda frames: pd.concat(frames, ignore_index=True))
+        self.frames = []
+        self.bytes = 0
+        self.spilled = None
+
+    def append(self, df):
+        """
+        Adds the next frame; empty frames are skipped.
+
+        Parameters:
+            df (pd.DataFrame): The frame.
+        """
+        if df.empty:
+            return
+        if self.spilled is not None:
+            self.spilled.append(df)
+            return
+        self.frames.append(df)
+        if not self.max_bytes:
+            return
+        self.bytes += int(df.memory_usage(index=True, deep=True).sum())
+        if self.bytes > self.max_bytes:
+            self.spilled = SpilledFrame(self.spill_dir)
+            for frame in self.frames:
+                self.spilled.append(frame)
+            self.frames = []
+
+    def result(self):
+        """
+        Returns the collected rows.
+
+        Returns:
+            pd.DataFrame, SpilledFrame or None: The concatenated frames if they stayed within
+                the budget, the spilled dataset otherwise, or None if nothing was added.
+        """
+        if self.spilled is not None:
+            return self.spilled
+        if not self.frames:
+            return None
+        return self.concat(self.frames)
@@ -1,19 +1,524 @@
-import re
+import contextlib
+import functools
+import io
+import numpy as np
 import pandas as pd
-import streamlit as st
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.dataloaders.ArchiveCache import ArchiveCache
+from src.dataloaders.ArrowCsvReader import ArrowCsvReader
+from src.dataloaders.DuckDBEngine import DuckDBEngine
+from src.dataloaders.FrameAccumulator import FrameAccumulator
+from src.dataloaders.HttpTransport import HttpTransport, TransportError
+from src.dataloaders.IncrementalFeed import IncrementalFeed
+from src.dataloaders.LoadReporter import LoadReporter
+from src.dataloaders.ParquetStore import ParquetStore
+from src.dataloaders.ProcessRangePipeline import ProcessRangePipeline
+from src.dataloaders.RangeCheckpoint import RangeCheckpoint
+from src.dataloaders.RangePipeline import RangePipeline
+from src.dataloaders.ResultCache import ResultCache
+from src.dataloaders.SpilledFrame import SpilledFrame
+from src.dataloaders.StageMetrics import StageMetrics
+from src.dataloaders.ThemeMatcher import ThemeMatcher
+from src.dataloaders.TimedReader import TimedReader
+
+
+# Columns of the GDELT 1.0 GKG files and the dtypes used while parsing them.
+GKG_SCHEMA = {
+    'DATE': "int32", 'NUMARTS': "int32", 'COUNTS': "str", 'THEMES': "str", 'LOCATIONS': "str",
+    'PERSONS': "str", 'ORGANIZATIONS': "str", 'TONE': "str", 'CAMEOEVENTIDS': "str",
+    'SOURCES': "str", 'SOURCEURLS': "str"
+}
+
+
+# Columns of the GDELT 2.0 (GKG 2.1) 15-minute files, which have no header. Columns that also
+# exist in GKG 1.0 use the 1.0 names, so the filters and the column selection apply to both;
+# V2Tone is read as TONE.
+GKG_V2_SCHEMA = {
+    'GKGRECORDID': "str", 'DATE': "int64", 'SOURCECOLLECTIONIDENTIFIER': "str", 'SOURCECOMMONNAME': "str",
+    'DOCUMENTIDENTIFIER': "str", 'COUNTS': "str", 'V2COUNTS': "str", 'THEMES': "str", 'V2THEMES': "str",
+    'LOCATIONS': "str", 'V2LOCATIONS': "str", 'PERSONS': "str", 'V2PERSONS': "str",
+    'ORGANIZATIONS': "str", 'V2ORGANIZATIONS': "str", 'TONE': "str", 'DATES': "str", 'GCAM': "str",
+    'SHARINGIMAGE': "str", 'RELATEDIMAGES': "str", 'SOCIALIMAGEEMBEDS': "str", 'SOCIALVIDEOEMBEDS': "str",
+    'QUOTATIONS': "str", 'ALLNAMES': "str", 'AMOUNTS': "str", 'TRANSLATIONINFO': "str", 'EXTRAS': "str"
+}
+
+
+# Components of the GKG TONE field, in order. The first keeps its historical name.
+TONE_COLUMNS = [
+    'parsed_tone', 'positive_score', 'negative_score', 'polarity',
+    'activity_reference_density', 'self_group_reference_density'
+]
+TONE_NUMBER = r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'
 
 
 class GraphDataLoader:
-    def __init__(self):
-        # Set the default URL in Streamlit's session_state. The URL accepts a date placeholder.
-        st.session_state.setdefault("gkg_url", "http://data.gdeltproject.org/gkg/{DATE}.gkg.csv.zip")
+    def __init__(self, state=None, reporter=None):
+        """
+        Parameters:
+            state (dict-like, optional): Holds the loader settings; the Streamlit app passes
+                self.state, batch jobs a plain dict. A new dict if None.
+            reporter (LoadReporter, optional): Receives progress, warnings and errors;
+                prints them to stderr if None.
+        """
+        self.state = {} if state is None else state
+        self.reporter = reporter or LoadReporter()
+        # Set the default URL. The URL accepts a date placeholder.
+        self.state.setdefault("gkg_url", "http://data.gdeltproject.org/gkg/{DATE}.gkg.csv.zip")
+        # Maximum number of days waiting between two stages of the range pipeline.
+        self.state.setdefault("pipeline_queue_size", 1)
+        # On-disk cache of raw archives, shared with EventDataLoader. None disables it.
+        self.state.setdefault("cache_dir", ".gdelt_cache")
+        self.state.setdefault("cache_max_bytes", 2 * 1024 ** 3)
+        # Revalidate cached archives with a conditional GET (ETag/Last-Modified) before use.
+        self.state.setdefault("cache_revalidate", False)
+        # HttpTransport settings: timeouts, retries with backoff and requests per second per host.
+        self.state.setdefault("http_options", {"timeout": 60, "retries": 5, "backoff": 0.5, "rate_limit": None})
+        # Date-partitioned Parquet copy of parsed days, shared with EventDataLoader. None disables it.
+        self.state.setdefault("store_dir", ".gdelt_store")
+        # Byte budget of the store, shared with EventDataLoader: after every write the least
+        # recently used days are removed beyond it. None leaves it unbounded.
+        self.state.setdefault("store_max_bytes", 4 * 1024 ** 3)
+        # Number of rows parsed and filtered at a time. None parses each file in one go.
+        self.state.setdefault("chunk_size", None)
+        # Engine that parses the archives: "c" is pandas' single-threaded C parser, "pyarrow" the
+        # multi-threaded pyarrow CSV reader, which keeps string columns in Arrow memory (string[pyarrow]).
+        self.state.setdefault("parse_engine", "c")
+        # Checkpoints of range loads: every finished day is saved there, so rerunning a load
+        # that stopped half way resumes from the first missing day. None disables them.
+        self.state.setdefault("checkpoint_dir", ".gdelt_checkpoints")
+        # A checkpoint is removed once its range loaded without a failed day, and checkpoints of
+        # loads abandoned for longer than this many seconds are pruned. None keeps them.
+        self.state.setdefault("checkpoint_max_age", 7 * 24 * 3600)
+        # In-memory LRU cache of filtered days, shared by all sessions of the process, so the
+        # days of a repeated query are not loaded again. Its budget in bytes; None or 0 disables it.
+        self.state.setdefault("result_cache_bytes", 512 * 1024 ** 2)
+        # Memory budget of a range load's result: past it, the days are moved to temporary Arrow
+        # files under 'spill_dir' (the system temp directory if None). None or 0 never spills.
+        self.state.setdefault("spill_bytes", 1024 ** 3)
+        self.state.setdefault("spill_dir", None)
+        # Threads (all cores if None) and memory limit (e.g. '4GB'; DuckDB's default if None) of
+        # the DuckDB SQL engine. Queries over the limit spill to 'spill_dir' or the system temp directory.
+        self.state.setdefault("sql_threads", None)
+        self.state.setdefault("sql_memory_limit", None)
+        # GDELT 2.0 15-minute feed: index directory, timestamp of the last slice loaded, and
+        # whether missed slices are listed from masterfilelist.txt instead of being derived.
+        self.state.setdefault("v2_base_url", "http://data.gdeltproject.org/gdeltv2/")
+        self.state.setdefault("gkg_v2_last_seen", None)
+        self.state.setdefault("v2_use_master_list", False)
+        # Number of worker processes that fetch, parse and filter the days of a range load.
+        # 0 runs everything in this process, with one thread per pipeline stage.
+        self.state.setdefault("workers", 0)
+        # GKG columns to load and export. Columns needed only for filtering are read but dropped.
+        self.state.setdefault("gkg_selected_columns", list(GKG_SCHEMA))
         self.data = None
-        print("GraphDataLoader has been initialized successfully.")
+        # Durations, bytes and rows per day and stage of the last load; every load starts anew.
+        self.metrics = StageMetrics("gkg")
+
+    def get_transport(self):
+        """
+        Returns the shared HTTP transport for the configured 'http_options'.
+
+        Returns:
+            HttpTransport: The transport with pooled connections, retries and rate limit.
+        """
+        return HttpTransport.shared(**self.state["http_options"])
+
+    def download(self, url):
+        """
+        Downloads the given URL and returns its body, retrying transient failures.
+
+        Parameters:
+            url (str): The URL to download.
+
+        Returns:
+            bytes: The response body.
+        """
+        return self.get_transport().get(url)
+
+    def get_cache(self):
+        """
+        Returns the shared on-disk archive cache, or None if caching is disabled.
+
+        Returns:
+            ArchiveCache or None: The archive cache.
+        """
+        cache_dir = self.state["cache_dir"]
+        if cache_dir is None:
+            return None
+        return ArchiveCache.shared(cache_dir, self.state["cache_max_bytes"])
+
+    def get_store(self):
+        """
+        Returns the Parquet store of parsed days, or None if it is disabled.
+
+        Returns:
+            ParquetStore or None: The Parquet store.
+        """
+        store_dir = self.state["store_dir"]
+        if store_dir is None:
+            return None
+        return ParquetStore(store_dir, self.state["store_max_bytes"])
+
+    def get_sql_engine(self):
+        """
+        Returns the DuckDB engine over the Parquet store.
+
+        Returns:
+            DuckDBEngine: The engine.
+
+        Raises:
+            ValueError: If the Parquet store is disabled.
+        """
+        if self.state["store_dir"] is None:
+            raise ValueError("The SQL engine queries the Parquet store, which is disabled (store_dir is None).")
+        return DuckDBEngine(
+            self.state["store_dir"], self.state["sql_threads"], self.state["sql_memory_limit"], self.state["spill_dir"]
+        )
+
+    def filter_sql(self, keywords):
+        """
+        Returns the keyword filter as a SQL condition on the 'gkg' view (see ThemeMatcher.to_sql).
+
+        Parameters:
+            keywords (list): Keyword queries to OR together.
+
+        Returns:
+            str or None: The condition, or None without keywords.
+        """
+        if not keywords:
+            return None
+        return ThemeMatcher.for_keywords(keywords).to_sql()
+
+    def default_sql(self, keywords):
+        """
+        Returns a query for the rows and selected columns a range load with these keywords
+        would give, before the TONE and DATE columns are processed. The SQL editor of the app
+        starts with it.
+
+        Parameters:
+            keywords (list): Keyword queries to OR together.
+
+        Returns:
+            str: The query.
+        """
+        columns = self.state["gkg_selected_columns"] or list(GKG_SCHEMA)
+        quoted = ", ".join('"' + column + '"' for column in columns)
+        sql = f"SELECT {quoted}\nFROM gkg"
+        where = self.filter_sql(keywords)
+        return f"{sql}\nWHERE {where}" if where else sql
+
+    def query_sql(self, start_date, end_date, sql=None, keywords=None):
+        """
+        Runs SQL with DuckDB on the days of the range that are in the Parquet store. Days
+        that are not stored yet are left out and reported.
+
+        Parameters:
+            start_date (str or datetime): The start date.
+            end_date (str or datetime): The end date.
+            sql (str, optional): The query; default_sql(keywords) if None.
+            keywords (list, optional): Keywords for the default query.
+
+        Returns:
+            pd.DataFrame or SpilledFrame: The result, spilled to disk past 'spill_bytes'.
+        """
+        dates = [date.strftime("%Y%m%d") for date in pd.date_range(start=start_date, end=end_date)]
+        engine = self.get_sql_engine()
+        missing = engine.missing_dates("gkg", dates)
+        if missing:
+            self.reporter.warning(
+                f"{len(missing)} of {len(dates)} days are not in the Parquet store yet "
+                f"(first missing: {missing[0]}); load them to include them in SQL queries."
+            )
+        return engine.query(sql or self.default_sql(keywords), dates, self.state["spill_bytes"], self.state["spill_dir"])
+
+    def required_columns(self, keywords=None):
+        """
+        Returns the selected GKG columns plus the columns the active filter needs,
+        in file order.
+
+        Parameters:
+            keywords (list, optional): Keywords for filtering the 'THEMES' column.
+
+        Returns:
+            list: Column names to parse.
+        """
+        needed = set(self.state["gkg_selected_columns"] or GKG_SCHEMA)
+        if keywords:
+            needed.add('THEMES')
+        return [column for column in GKG_SCHEMA if column in needed]
+
+    def range_query(self, keywords):
+        """
+        Returns the settings that determine the rows and columns of a loaded day. The
+        keywords are ORed and the columns are kept in file order, so both are sorted and
+        deduplicated: the same query entered in another order gives the same result.
+
+        Parameters:
+            keywords (list): List of keywords to filter the 'THEMES' column.
+
+        Returns:
+            dict: The normalized query.
+        """
+        return {
+            "gkg_url": self.state["gkg_url"],
+            "gkg_selected_columns": sorted(set(self.state["gkg_selected_columns"] or [])),
+            "keywords": sorted(set(keywords or [])),
+        }
+
+    def get_checkpoint(self, keywords):
+        """
+        Returns the checkpoint of range loads with these keywords and the selected columns,
+        or None if checkpoints are disabled. Checkpoints abandoned for longer than
+        'checkpoint_max_age' are pruned first.
+
+        Parameters:
+            keywords (list): List of keywords to filter the 'THEMES' column.
+
+        Returns:
+            RangeCheckpoint or None: The checkpoint.
+        """
+        checkpoint_dir = self.state["checkpoint_dir"]
+        if checkpoint_dir is None:
+            return None
+        RangeCheckpoint.prune(checkpoint_dir, self.state["checkpoint_max_age"])
+        return RangeCheckpoint(
+            checkpoint_dir, "gkg", self.range_query(keywords),
+            dtypes=GKG_SCHEMA, arrow_strings=self.arrow_strings()
+        )
+
+    def get_results(self):
+        """
+        Returns the shared in-memory cache of filtered days, or None if it is disabled.
+
+        Returns:
+            ResultCache or None: The result cache.
+        """
+        if not self.state["result_cache_bytes"]:
+            return None
+        return ResultCache.shared(self.state["result_cache_bytes"])
+
+    def fetch_data(self, date):
+        """
+        Returns the raw zipped GKG archive for the specified date, downloading it
+        only if it is not in the archive cache yet. Days already converted to the
+        Parquet store are not fetched at all.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            bytes or None: The zipped archive, or None if the day is in the Parquet store.
+        """
+        store = self.get_store()
+        if store is not None and store.has("gkg", date):
+            self.metrics.record(date, "fetch", source="store")
+            return None
+        return self.fetch_archive(date)
+
+    def fetch_archive(self, date):
+        """
+        Returns the raw zipped GKG archive for the specified date, from the archive cache
+        or downloaded.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            bytes: The zipped archive.
+        """
+        url = self.state["gkg_url"].format(DATE=date)
+        with self.metrics.measure(date, "fetch") as fields:
+            cache = self.get_cache()
+            if cache is None:
+                raw = self.download(url)
+                fields["source"] = "download"
+            else:
+                # The cache only calls fetch for archives it does not have or has to revalidate.
+                fields["source"] = "archive_cache"
+
+                def fetch(validators):
+                    body, validators = self.get_transport().fetch(url, validators)
+                    fields["source"] = "download" if body is not None else "revalidated"
+                    return body, validators
+                raw = cache.get_or_fetch("gkg", date, fetch, revalidate=self.state["cache_revalidate"])
+            fields["bytes_out"] = len(raw)
+        return raw
+
+    def parse_data(self, raw, date=None, keywords=None):
+        """
+        Parses a zipped GKG archive into a DataFrame and converts it into the Parquet
+        store. If the day is already stored, it is read from the store instead; should it
+        have been removed from the store since fetch_data, its archive is fetched after all.
+
+        When 'chunk_size' is set, the archive is parsed in chunks of that many rows and
+        each chunk is filtered by the keywords and has its tone split before it is kept, so
+        memory use depends on the chunk size and the surviving rows rather than on the size
+        of the file. Such a day is marked with attrs['filtered'], and filter_day() passes it
+        through instead of filtering it again.
+
+        Only the selected columns (plus 'THEMES' when filtering) are returned. They are also
+        the only ones parsed, unless the day still has to be converted into the Parquet store.
+
+        Parameters:
+            raw (bytes or None): The zipped archive returned by fetch_data.
+            date (str, optional): Date in 'YYYYMMDD' format, used as the store partition.
+            keywords (list, optional): Keywords for filtering each chunk; None keeps all rows.
+
+        Returns:
+            pd.DataFrame: The parsed data.
+        """
+        store = self.get_store()
+        required = self.required_columns(keywords)
+        if raw is None:
+            try:
+                with self.metrics.measure(date, "store_read") as fields:
+                    df = store.read("gkg", date, columns=required, dtypes=GKG_SCHEMA, arrow_strings=self.arrow_strings())
+                    fields["rows_out"] = len(df)
+                return df
+            except FileNotFoundError:
+                # The day left the store after fetch_data, e.g. pruned by another session: it is
+                # downloaded and parsed again.
+                raw = self.fetch_archive(date)
+
+        # A day that still has to be converted is parsed once with all columns.
+        convert = store is not None and date is not None
+        options = dict(
+            sep='\t', header=0, names=list(GKG_SCHEMA), usecols=None if convert else required,
+            dtype=GKG_SCHEMA
+        )
+        schema = ParquetStore.arrow_schema(GKG_SCHEMA)
+        arrow = self.arrow_reader(options["usecols"])
+        chunk_size = self.state["chunk_size"]
+        # The archive is inflated through a reader that times it, so unzipping and parsing are
+        # recorded as separate stages.
+        stream = TimedReader.open_zip(raw)
+        if not chunk_size:
+            with stream, self.metrics.measure(date, "parse") as fields:
+                df = arrow.read(stream) if arrow is not None else pd.read_csv(stream, **options)
+                fields.update(seconds=-stream.seconds, bytes_in=stream.bytes, rows_out=len(df))
+            self.metrics.record(date, "unzip", stream.seconds, bytes_in=len(raw), bytes_out=stream.bytes)
+            if convert:
+                with self.metrics.measure(date, "store_write", rows_in=len(df)):
+                    store.write("gkg", date, df, schema)
+                df = df[required]
+            return df
+
+        kept = []
+        with contextlib.ExitStack() as stack:
+            write = None
+            if convert:
+                write = stack.enter_context(store.writer("gkg", date, schema))
+            stack.enter_context(stream)
+            if arrow is not None:
+                reader = arrow.read_chunks(stream, chunk_size)
+            else:
+                reader = stack.enter_context(pd.read_csv(stream, chunksize=chunk_size, **options))
+            # The stages of every chunk are recorded on their own and taken out of the parse time.
+            parse = stack.enter_context(self.metrics.measure(date, "parse", rows_out=0))
+            for chunk in reader:
+                parse["rows_out"] += len(chunk)
+                if write is not None:
+                    with self.metrics.measure(date, "store_write", parent=parse, rows_in=len(chunk)):
+                        write(chunk)
+                chunk = chunk[required]
+                if keywords is not None:
+                    with self.metrics.measure(date, "chunk_filter", parent=parse, rows_in=len(chunk)) as fields:
+                        chunk = self.iterative_filter_data(chunk, keywords)
+                        fields["rows_out"] = len(chunk)
+                with self.metrics.measure(date, "chunk_tone", parent=parse, rows_in=len(chunk)):
+                    kept.append(self.decompose_tone(chunk))
+            parse.update(seconds=parse["seconds"] - stream.seconds, bytes_in=stream.bytes)
+        self.metrics.record(date, "unzip", stream.seconds, bytes_in=len(raw), bytes_out=stream.bytes)
+        df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=required)
+        df.attrs["filtered"] = True
+        return df
+
+    def arrow_reader(self, usecols=None):
+        """
+        Returns the reader of the 'pyarrow' parse engine, or None for the 'c' engine, which
+        parses with pd.read_csv.
+
+        Parameters:
+            usecols (list, optional): Columns to parse; all of them if None.
+
+        Returns:
+            ArrowCsvReader or None: The reader.
+
+        Raises:
+            ValueError: If 'parse_engine' is neither 'c' nor 'pyarrow'.
+        """
+        engine = self.state["parse_engine"]
+        if engine not in ("c", "pyarrow"):
+            raise ValueError(f"Unknown parse engine '{engine}'; use 'c' or 'pyarrow'.")
+        if engine == "c":
+            return None
+        return ArrowCsvReader(GKG_SCHEMA, header=True, usecols=usecols)
+
+    def arrow_strings(self):
+        """
+        Tells whether the parsed text columns are Arrow-backed 'string[pyarrow]', as with the
+        'pyarrow' parse engine, so that days read from the store are converted the same way.
+
+        Returns:
+            bool: True for the 'pyarrow' parse engine.
+        """
+        return self.state["parse_engine"] == "pyarrow"
+
+    def worker_state(self):
+        """
+        Returns the settings a worker process needs to load a day. The rest of the state,
+        such as the loaded data and widget values in the Streamlit app, is left out.
+
+        Returns:
+            dict: Picklable loader settings.
+        """
+        keys = (
+            "gkg_url", "cache_dir", "cache_max_bytes", "cache_revalidate", "http_options", "store_dir",
+            "store_max_bytes", "chunk_size", "parse_engine", "gkg_selected_columns",
+        )
+        return {key: self.state[key] for key in keys}
+
+    def load_day(self, date, keywords):
+        """
+        Fetches, parses and filters one day and splits its TONE column, raising on errors.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            keywords (list): List of keywords to filter the 'THEMES' column.
+
+        Returns:
+            pd.DataFrame: The filtered day.
+        """
+        return self.filter_day(self.parse_data(self.fetch_data(date), date, keywords), date, keywords)
+
+    def filter_day(self, df, date=None, keywords=None):
+        """
+        Filters a parsed day by the keywords and splits its TONE column, recording both
+        stages in self.metrics. A day that a chunked parse_data() already filtered and split
+        is returned as is.
+
+        Parameters:
+            df (pd.DataFrame): The parsed day.
+            date (str, optional): Date in 'YYYYMMDD' format.
+            keywords (list, optional): List of keywords to filter the 'THEMES' column.
+
+        Returns:
+            pd.DataFrame: The filtered day, indexed from 0.
+        """
+        if df.attrs.pop("filtered", False):
+            return df
+        with self.metrics.measure(date, "filter", rows_in=len(df)) as fields:
+            df = self.iterative_filter_data(df.reset_index(drop=True), keywords).reset_index(drop=True)
+            fields["rows_out"] = len(df)
+        with self.metrics.measure(date, "tone", rows_in=len(df)):
+            return self.decompose_tone(df)
 
     def load_data(self, date):
         """
         Loads data for the specified date from the URL and returns it as a DataFrame.
-        If an error occurs, an error message is displayed via Streamlit.
+        The day has its TONE column split and is finished by prepare_frame(), whether it
+        was parsed in chunks or at once. If an error occurs, it is passed to the reporter.
 
         Parameters:
             date (str): Date in 'YYYYMMDD' format.
@@ -21,83 +526,289 @@ class GraphDataLoader:
         Returns:
             pd.DataFrame: The loaded data or an empty DataFrame if an error occurred.
         """
-        url = st.session_state["gkg_url"].format(DATE=date)
+        self.metrics = StageMetrics("gkg")
         try:
-            df = pd.read_csv(url, sep='\t', low_memory=False)
+            df = self.parse_data(self.fetch_data(date), date)
         except Exception as e:
-            st.error(f"Error while loading data for {date}: {e}")
+            self.reporter.error(f"Error while loading data for {date}: {e}")
+            self.metrics.publish(days=1, errors=1)
             return pd.DataFrame()
+        df = self.prepare_frame(self.filter_day(df, date))
+        self.metrics.publish(days=1)
         return df
 
-    def load_data_range(self, start_date, end_date, keywords):
+    def load_data_range(self, start_date, end_date, keywords, transform=None):
         """
         Downloads and processes data for a range of dates.
-        Progress is displayed via a Streamlit progress bar and status messages.
+        Downloading, parsing and filtering run as overlapping pipeline stages, or in a pool of
+        'workers' processes when that setting is above 0, while the results are still
+        collected in date order.
+        Every finished day is saved to the checkpoint of the query, so a rerun after an
+        interruption only loads the days that are missing or failed before; the checkpoint is
+        removed once the range loaded without a failed day. Every day is also kept in the
+        shared result cache, so a repeated or widened query in any session only loads the
+        days that are not in memory yet.
+        Once the collected days take more than 'spill_bytes' of memory, they are moved to
+        disk and self.data becomes a SpilledFrame, which is read back a chunk at a time.
+        Progress, errors, the archive cache statistics and the stage metrics of the load (see
+        StageMetrics) are passed to the reporter.
 
         Parameters:
             start_date (str or datetime): The start date.
             end_date (str or datetime): The end date.
             keywords (list): List of keywords to filter the 'THEMES' column.
+            transform (callable, optional): Applied to the frame of every day before it is
+                collected, e.g. prepare_frame().
         """
-        data_frames = []
+        # Compile the keyword query up front so a malformed query fails before any download.
+        ThemeMatcher.for_keywords(keywords)
         # Create a list of dates in 'YYYYMMDD' format within the specified range.
         date_range = [date.strftime("%Y%m%d") for date in pd.date_range(start=start_date, end=end_date)]
 
-        progress_bar = st.progress(0)
-        progress_text = st.empty()
         total_dates = len(date_range)
+        self.reporter.start(total_dates)
+        self.metrics = StageMetrics("gkg")
+        errors = 0
+
+        # Days of the same query still in memory, from any session, are taken as they are.
+        # They are not converted, so the parse engine, which sets the string dtypes, is part
+        # of the key.
+        results = self.get_results()
+        query_key = ResultCache.query_key(dict(self.range_query(keywords), parse_engine=self.state["parse_engine"]))
+        cached, rest = results.split("gkg", query_key, date_range) if results is not None else ({}, date_range)
+        if cached:
+            self.reporter.info(
+                f"Reusing {len(cached)} of {total_dates} days from the result cache; "
+                f"{total_dates - len(cached)} to load."
+            )
+        # Days completed by an earlier run are skipped; days that failed are tried again.
+        checkpoint = self.get_checkpoint(keywords)
+        done, pending = checkpoint.split(rest) if checkpoint is not None else ([], rest)
+        if checkpoint is not None and (done or checkpoint.failed(pending)):
+            self.reporter.info(
+                f"Resuming from checkpoint: {len(done)} of {total_dates} days already loaded, "
+                f"{len(pending)} to load ({len(checkpoint.failed(pending))} retried after an error)."
+            )
 
+        if self.state["workers"]:
+            # Each day runs in a worker process; results come back as Arrow data in shared memory.
+            pipeline = ProcessRangePipeline(
+                functools.partial(load_gkg_day, self.worker_state(), keywords),
+                self.state["workers"], queue_size=self.state["pipeline_queue_size"],
+                to_pandas=functools.partial(ParquetStore.to_pandas, dtypes=GKG_SCHEMA, arrow_strings=self.arrow_strings())
+            )
+        else:
+            pipeline = RangePipeline(
+                self.fetch_data,
+                lambda raw, date: self.parse_data(raw, date, keywords),
+                lambda df, date: self.filter_day(df, date, keywords),
+                queue_size=self.state["pipeline_queue_size"],
+                thread_hook=self.reporter.thread_hook
+            )
+        # Collect the days in date order as they finish, taking the completed ones from the
+        # result cache or the checkpoint. Past the memory budget they are spilled to disk.
+        accumulator = FrameAccumulator(self.state["spill_bytes"], self.state["spill_dir"])
+        transform = transform or (lambda df: df)
+        loaded = pipeline.run(pending)
         for i, date in enumerate(date_range):
-            progress_text.text(f"Loading data for date: {date}...")
-            df = self.load_data(date).reset_index(drop=True)
-            df = self.iterative_filter_data(df, keywords).reset_index(drop=True)
-            if not df.empty:
-                data_frames.append(df)
-            progress_bar.progress((i + 1) / total_dates)
+            df = None
+            if date in cached:
+                df = cached[date]
+                self.metrics.record(date, "result_cache", source="result_cache", rows_out=len(df))
+            elif date in done:
+                if checkpoint.rows(date):
+                    with self.metrics.measure(date, "checkpoint", source="checkpoint") as fields:
+                        df = checkpoint.read(date)
+                        fields["rows_out"] = len(df)
+                    if results is not None:
+                        results.put("gkg", query_key, date, df)
+            else:
+                date, df, error = next(loaded)
+                if error is not None:
+                    errors += 1
+                    self.reporter.error(f"Error while loading data for {date}: {error}")
+                    if checkpoint is not None:
+                        checkpoint.record_failure(date, error)
+                else:
+                    # The stage records of a worker process come with the frame's Arrow metadata.
+                    self.metrics.merge(df.attrs.pop("stage_metrics", []))
+                    if checkpoint is not None:
+                        checkpoint.record(date, df)
+                    if results is not None:
+                        # Empty days are cached too, so days without a match are not scanned again.
+                        results.put("gkg", query_key, date, df)
+            if df is not None:
+                with self.metrics.measure(date, "transform", rows_in=len(df)) as fields:
+                    df = transform(df)
+                    fields["rows_out"] = len(df)
+                with self.metrics.measure(date, "collect", rows_in=len(df)):
+                    accumulator.append(df)
+            self.reporter.progress(i + 1, total_dates, date)
+
+        self.reporter.finish()
+        # Nothing is left to resume once every day loaded.
+        if checkpoint is not None and not errors:
+            checkpoint.remove()
+
+        cache = self.get_cache()
+        if cache is not None:
+            stats = cache.stats()
+            self.reporter.detail(
+                f"Archive cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} files ({stats['bytes'] / 1024 ** 2:.0f} MiB) on disk."
+            )
+        if results is not None:
+            stats = results.stats()
+            self.reporter.detail(
+                f"Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} days ({stats['bytes'] / 1024 ** 2:.0f} MiB) in memory."
+            )
 
-        progress_text.text("Data loading completed successfully!")
+        with self.metrics.measure(None, "concat") as fields:
+            self.data = accumulator.result()
+            fields["rows_out"] = 0 if self.data is None else len(self.data)
+        if isinstance(self.data, SpilledFrame):
+            self.reporter.detail(
+                f"Spilled {len(self.data)} rows ({self.data.bytes / 1024 ** 2:.0f} MiB) to disk after "
+                f"{self.state['spill_bytes'] / 1024 ** 2:.0f} MiB in memory."
+            )
+        self.metrics.publish(days=total_dates, errors=errors)
+        self.reporter.metrics(self.metrics)
+        if self.data is None:
+            self.reporter.warning("No data was loaded; the resulting dataset is empty!")
+            self.data = pd.DataFrame()
+
+    def slice_columns(self, keywords=None):
+        """
+        Returns the columns read from a GDELT 2.0 GKG slice: the selected columns that exist
+        in GKG 2.1 (plus 'THEMES' when filtering), or all of them.
+
+        Parameters:
+            keywords (list, optional): Keywords for filtering the 'THEMES' column.
+
+        Returns:
+            list: Column names, in file order.
+        """
+        needed = set(self.required_columns(keywords))
+        return [column for column in GKG_V2_SCHEMA if column in needed] or list(GKG_V2_SCHEMA)
+
+    def parse_slice(self, raw, keywords=None):
+        """
+        Parses a zipped GDELT 2.0 GKG slice, reading only the columns of slice_columns().
+
+        Parameters:
+            raw (bytes): The zipped slice.
+            keywords (list, optional): Keywords for filtering the 'THEMES' column.
+
+        Returns:
+            pd.DataFrame: The parsed slice.
+        """
+        return pd.read_csv(
+            io.BytesIO(raw), sep='\t', header=None, names=list(GKG_V2_SCHEMA), usecols=self.slice_columns(keywords),
+            dtype=GKG_V2_SCHEMA, compression='zip', quoting=3, encoding_errors='replace'
+        )
+
+    def load_updates(self, keywords, since=None):
+        """
+        Loads the GDELT 2.0 GKG slices published after the last one loaded, filters them
+        like a range load, and appends their rows to the loaded dataset. The timestamp of
+        every slice loaded is kept in 'gkg_v2_last_seen', so the next call continues there.
+        Slices GDELT never published are skipped; on any other error the loading stops and
+        the failed slice is tried again by the next call.
+
+        Parameters:
+            keywords (list): List of keywords to filter the 'THEMES' column.
+            since (str, date or datetime, optional): Where to start if no slice was loaded yet;
+                only the newest slice if None.
+
+        Returns:
+            pd.DataFrame: The new rows; empty, with the columns of a slice, if there were none.
+                The loaded dataset is set even then, so get_data() returns a frame.
+        """
+        feed = IncrementalFeed(
+            self.state["v2_base_url"], "gkg", self.download, use_master_list=self.state["v2_use_master_list"]
+        )
+        ThemeMatcher.for_keywords(keywords)
+        entries = feed.pending(self.state["gkg_v2_last_seen"], since)
+        self.reporter.start(len(entries))
+        data_frames = []
+        for i, entry in enumerate(entries):
+            try:
+                df = self.parse_slice(feed.fetch(entry), keywords)
+                df = self.decompose_tone(self.iterative_filter_data(df, keywords).reset_index(drop=True))
+            except TransportError as e:
+                if e.status != 404:
+                    self.reporter.error(f"Error while loading the update {entry['timestamp']}: {e}")
+                    break
+                self.reporter.warning(f"The update {entry['timestamp']} was not published; skipping it.")
+            except Exception as e:
+                self.reporter.error(f"Error while loading the update {entry['timestamp']}: {e}")
+                break
+            else:
+                if not df.empty:
+                    data_frames.append(df)
+            self.state["gkg_v2_last_seen"] = entry["timestamp"]
+            self.reporter.progress(i + 1, len(entries), entry["timestamp"])
+        self.reporter.finish()
 
         if data_frames:
-            self.data = pd.concat(data_frames, ignore_index=True).reset_index(drop=True)
+            updates = pd.concat(data_frames, ignore_index=True)
         else:
-            st.warning("No data was loaded; the resulting dataset is empty!")
-            self.data = pd.DataFrame()
+            # Nothing new (or every slice failed): no rows, but the columns of a loaded slice.
+            columns = self.slice_columns(keywords)
+            updates = self.decompose_tone(pd.DataFrame({column: pd.Series(dtype=GKG_V2_SCHEMA[column]) for column in columns}))
+        updates = self.project(updates)
+        if 'DATE' in updates.columns:
+            # 2.0 dates carry the time of day; keep the date part like the daily files.
+            dates = pd.to_datetime(updates['DATE'].astype(str), format='%Y%m%d%H%M%S', errors='coerce')
+            updates = updates[dates.notna()].copy()
+            updates['DATE'] = dates[dates.notna()].dt.date
+        if isinstance(self.data, SpilledFrame):
+            if not updates.empty:
+                self.data.append(updates)
+            return updates
+        frames = [frame for frame in (self.data, updates) if frame is not None and not frame.empty]
+        if frames:
+            self.data = pd.concat(frames, ignore_index=True)
+        elif self.data is None:
+            self.data = updates
+        return updates
 
     def get_data_info(self):
         """
-        Displays the number of rows and columns in the loaded dataset via Streamlit.
+        Reports the number of rows and columns in the loaded dataset.
         """
         if self.data is not None:
             rows, columns = self.data.shape
-            st.write(f"Data has {rows} rows and {columns} columns.")
+            self.reporter.info(f"Data has {rows} rows and {columns} columns.")
         else:
-            st.write("Data has not been loaded yet.")
+            self.reporter.info("Data has not been loaded yet.")
 
     def filter_data(self, keywords):
         """
         Filters the loaded dataset to include only rows where the 'THEMES' column
-        contains any of the specified keywords as separate tokens.
+        matches the keyword query (see ThemeMatcher).
 
         For example, if 'WAR' is provided as a keyword, it will match entries like
         'WAR_THEME' (where 'WAR' appears as a distinct token) but not 'SOFTWARE'.
 
         Parameters:
-            keywords (list): List of keywords to filter by.
+            keywords (list): List of keyword queries to filter by; they are ORed together.
         """
+        if not keywords:
+            # Without keywords every row is kept, so THEMES is not needed.
+            return
         if self.data is not None and 'THEMES' in self.data.columns:
-            # Build regex patterns for each keyword to match as a distinct token
-            regex_parts = [fr'(?<=^|_){re.escape(keyword)}(?=$|_)' for keyword in keywords]
-            pattern = '|'.join(regex_parts)
-
-            mask = self.data['THEMES'].fillna("").str.contains(pattern, case=False, na=False, regex=True)
+            mask = ThemeMatcher.for_keywords(keywords).match(self.data['THEMES'])
             self.data = self.data[mask].copy()
         else:
-            st.warning("Data has not been loaded or the 'THEMES' column is missing.")
+            self.reporter.warning("Data has not been loaded or the 'THEMES' column is missing.")
 
     def iterative_filter_data(self, df, keywords):
         """
         Filters the given DataFrame to include only rows where the 'THEMES' column
-        contains any of the specified keywords as separate tokens.
+        matches the keyword query (see ThemeMatcher). Keywords may be combined with
+        AND, OR and NOT, and a trailing '*' matches a prefix such as 'TAX_FNCACT_*'.
 
         For example, if 'WAR' is provided as a keyword, it will accept entries like
         'WAR_THEME' (where 'WAR' appears as a distinct token) but will not match
@@ -105,69 +816,136 @@ class GraphDataLoader:
 
         Parameters:
             df (pd.DataFrame): The DataFrame to filter.
-            keywords (list): List of keywords to filter by.
+            keywords (list): List of keyword queries to filter by; they are ORed together.
 
         Returns:
             pd.DataFrame: The filtered DataFrame.
         """
+        if df is not None and not keywords:
+            # Without keywords every row is kept, so THEMES is not needed.
+            return df
         if df is not None and 'THEMES' in df.columns:
-            # Build a regex pattern that matches each keyword only if it appears as a separate token.
-            # The pattern uses lookbehind and lookahead to ensure the keyword is either at the start/end
-            # of the string or preceded/followed by an underscore.
-            regex_parts = [fr'(?<=^|_){re.escape(keyword)}(?=$|_)' for keyword in keywords]
-            pattern = '|'.join(regex_parts)
-            mask = df['THEMES'].fillna("").str.contains(pattern, case=False, na=False, regex=True)
+            # The matcher is compiled once per query and caches the result for every theme it has seen.
+            mask = ThemeMatcher.for_keywords(keywords).match(df['THEMES'])
             return df[mask].copy()
         else:
-            st.warning("Data is not loaded or the 'THEMES' column is missing.")
+            self.reporter.warning("Data is not loaded or the 'THEMES' column is missing.")
             return pd.DataFrame()
 
-    def parse_tone(self, tone_str):
+    def decompose_tone(self, df):
         """
-        Parses the value in the TONE column by splitting the string and returning the first value as a float.
+        Splits the comma-separated TONE column into its six components as float32 columns:
+        'parsed_tone' (the average tone), 'positive_score', 'negative_score', 'polarity',
+        'activity_reference_density' and 'self_group_reference_density'. The seventh field
+        of the GKG 2.1 V2Tone value (the word count) is ignored.
+
+        The split is vectorized over the whole column. Missing or malformed values become
+        NaN instead of raising, and frames that were already decomposed are returned as is,
+        so it can run on every chunk of a streaming load.
 
         Parameters:
-            tone_str (str): The string from the TONE column.
+            df (pd.DataFrame): A GKG frame with a TONE column.
 
         Returns:
-            float or None: The first tone value as a float, or None if parsing fails.
+            pd.DataFrame: The frame with the tone component columns added.
         """
-        try:
-            return float(tone_str.split(',')[0])
-        except Exception:
-            return None
+        if 'TONE' not in df.columns or TONE_COLUMNS[0] in df.columns:
+            return df
+        # Split every value at once in Arrow, blank out the parts that are not numbers, then
+        # scatter the parts into a (rows x 6) float32 matrix by their position in the value.
+        lists = pc.split_pattern(
+            pa.array(df['TONE'].astype(object), type=pa.string(), from_pandas=True), ',',
+            max_splits=len(TONE_COLUMNS)
+        )
+        parts = pc.list_flatten(lists)
+        numbers = pc.if_else(pc.match_substring_regex(parts, TONE_NUMBER), parts, pa.scalar(None, pa.string()))
+        values = pc.cast(numbers, pa.float32()).to_numpy(zero_copy_only=False)
+        rows = pc.list_parent_indices(lists).to_numpy()
+        positions = np.arange(len(rows)) - lists.offsets.to_numpy()[rows]
+
+        tone = np.full((len(df), len(TONE_COLUMNS)), np.nan, dtype="float32")
+        keep = positions < len(TONE_COLUMNS)
+        tone[rows[keep], positions[keep]] = values[keep]
+        for i, column in enumerate(TONE_COLUMNS):
+            df[column] = tone[:, i]
+        return df
 
     def parse_tone_column(self):
         """
-        Processes the TONE column by extracting the first tone value from each entry
-        and creating a new column named 'parsed_tone'.
+        Processes the TONE column of the loaded dataset into the tone component columns
+        (see decompose_tone).
         """
-        st.info("Processing the TONE column to extract tone values into 'parsed_tone'.")
+        self.reporter.info("Processing the TONE column to extract tone values into 'parsed_tone' and the other tone columns.")
         if self.data is not None and 'TONE' in self.data.columns:
-            self.data['parsed_tone'] = self.data['TONE'].apply(self.parse_tone)
+            self.data = self.decompose_tone(self.data)
         else:
-            st.warning("Data has not been loaded or the 'TONE' column is missing.")
+            self.reporter.warning("Data has not been loaded or the 'TONE' column is missing.")
 
     def fix_date_column(self):
         """
-        Converts the DATE column to datetime objects using the '%Y%m%d' format.
-        Invalid dates are removed, and the DATE column is updated to only contain the date part.
+        Converts the DATE column of the loaded dataset to dates (see fix_dates).
         """
-        st.info("Processing the DATE column to convert entries to proper datetime objects.")
+        self.reporter.info("Processing the DATE column to convert entries to proper datetime objects.")
         if self.data is not None and 'DATE' in self.data.columns:
-            # Convert DATE column to datetime, setting errors to NaT for invalid dates.
-            self.data['datetime'] = pd.to_datetime(
-                self.data['DATE'].astype(str),
-                format='%Y%m%d',
-                errors='coerce'
-            )
-            # Remove rows with invalid dates.
-            self.data = self.data.dropna(subset=['datetime'])
-            # Update the DATE column to contain only the date (without time).
-            self.data['DATE'] = self.data['datetime'].dt.date
-            self.data.drop(columns=['datetime'], inplace=True)
+            self.data = self.fix_dates(self.data)
         else:
-            st.warning("Data has not been loaded or the 'DATE' column is missing.")
+            self.reporter.warning("Data has not been loaded or the 'DATE' column is missing.")
+
+    @staticmethod
+    def fix_dates(df):
+        """
+        Converts the DATE column of a frame to datetime objects using the '%Y%m%d' format.
+        Invalid dates are removed, and the DATE column is updated to only contain the date part.
+
+        Parameters:
+            df (pd.DataFrame): A GKG frame with a 'DATE' column.
+
+        Returns:
+            pd.DataFrame: The frame with valid dates only.
+        """
+        # Convert DATE column to datetime, setting errors to NaT for invalid dates.
+        dates = pd.to_datetime(df['DATE'].astype(str), format='%Y%m%d', errors='coerce')
+        # Remove rows with invalid dates, and keep only the date (without time).
+        df = df[dates.notna()].copy()
+        df['DATE'] = dates[dates.notna()].dt.date
+        return df
+
+    def prepare_frame(self, df):
+        """
+        Finishes a loaded day for the dataset: converts its DATE column (if selected) and
+        drops the columns that were only read for filtering.
+
+        Parameters:
+            df (pd.DataFrame): A filtered GKG day.
+
+        Returns:
+            pd.DataFrame: The finished day.
+        """
+        selected = self.state["gkg_selected_columns"] or list(GKG_SCHEMA)
+        if 'DATE' in selected and 'DATE' in df.columns:
+            df = self.fix_dates(df)
+        return self.project(df)
+
+    def project_columns(self):
+        """
+        Drops the GKG columns that were only read for filtering. Derived columns such as
+        'parsed_tone' are kept.
+        """
+        if self.data is not None:
+            self.data = self.project(self.data)
+
+    def project(self, df):
+        """
+        Drops the GKG columns of a frame that were only read for filtering.
+
+        Parameters:
+            df (pd.DataFrame): A GKG frame.
+
+        Returns:
+            pd.DataFrame: The frame with the selected and derived columns.
+        """
+        selected = set(self.state["gkg_selected_columns"] or GKG_SCHEMA)
+        return df[[column for column in df.columns if column in selected or column not in GKG_SCHEMA]]
 
     def get_data(self):
         """
@@ -180,11 +958,13 @@ class GraphDataLoader:
 
     def data_pipeline(self, start_date, end_date, keywords):
         """
-        Executes the full data processing pipeline:
-            1. Downloads data for the specified date range.
-            2. Filters the data based on keywords in the 'THEMES' column.
-            3. Processes the TONE column to extract tone values.
-            4. Converts and cleans the DATE column.
+        Executes the full data processing pipeline. For every day of the range, as it is loaded:
+            1. Downloads the data, filters it by the keywords in the 'THEMES' column and
+               splits its TONE column.
+            2. Converts and cleans the DATE column (if selected).
+            3. Drops the columns that were only needed for filtering.
+        The days are collected one by one, so the dataset is not copied again after the
+        load, and a dataset larger than 'spill_bytes' is returned as a SpilledFrame.
 
         Parameters:
             start_date (str or datetime): The start date for data loading.
@@ -192,10 +972,26 @@ class GraphDataLoader:
             keywords (list): List of keywords for filtering the 'THEMES' column.
 
         Returns:
-            pd.DataFrame: The fully processed data.
+            pd.DataFrame or SpilledFrame: The fully processed data.
         """
-        self.load_data_range(start_date, end_date, keywords)
-        self.filter_data(keywords)
-        self.parse_tone_column()
-        self.fix_date_column()
+        self.load_data_range(start_date, end_date, keywords, transform=self.prepare_frame)
         return self.get_data()
+
+
+def load_gkg_day(state, keywords, date):
+    """
+    Loads one filtered GKG day in a ProcessRangePipeline worker.
+
+    Parameters:
+        state (dict): Loader settings, see GraphDataLoader.worker_state().
+        keywords (list): List of keywords to filter the 'THEMES' column.
+        date (str): Date in 'YYYYMMDD' format.
+
+    Returns:
+        pd.DataFrame: The filtered day, with its stage records in attrs['stage_metrics'];
+            they reach the parent process with the frame's Arrow metadata.
+    """
+    loader = GraphDataLoader(state)
+    df = loader.load_day(date, keywords)
+    df.attrs["stage_metrics"] = loader.metrics.sorted_records()
+    return df
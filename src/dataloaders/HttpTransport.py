@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import urllib3
+
+
+class TransportError(Exception):
+    """
+    Raised when a download fails for good: a non-retryable HTTP status such as 404, or a
+    retryable failure that persisted through all retries.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        # The HTTP status of the last answer; None if no answer was received.
+        self.status = status
+
+
+class HttpTransport:
+    """
+    Downloads the GDELT archives over a pool of keep-alive connections.
+
+    Transient failures (connection errors, timeouts and the statuses in RETRY_STATUSES) are
+    retried with exponential backoff and full jitter, honouring a Retry-After header. An
+    optional rate limit spaces the requests to the same host, so a long range load does not
+    hammer data.gdeltproject.org. fetch() can send a conditional GET with the ETag and
+    Last-Modified of a cached copy, and returns None for the body on '304 Not Modified'.
+
+    URLs that are not http(s), e.g. file:// URLs of a local mirror, are read with urllib.
+    The rate limit applies per process.
+    """
+
+    RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, timeout=60, connect_timeout=10, retries=5, backoff=0.5, max_backoff=30,
+                 rate_limit=None, pool_size=4):
+        """
+        Parameters:
+            timeout (float): Read timeout in seconds.
+            connect_timeout (float): Connect timeout in seconds.
+            retries (int): Number of retries after the first attempt.
+            backoff (float): Base delay in seconds; attempt n waits up to backoff * 2 ** n.
+            max_backoff (float): Upper bound of a single delay in seconds.
+            rate_limit (float, optional): Maximum requests per second per host; unlimited if None.
+            pool_size (int): Number of keep-alive connections kept per host.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limit = rate_limit
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=timeout)
+        self.pool = urllib3.PoolManager(num_pools=8, maxsize=pool_size, block=False, retries=False)
+        self.requests = 0
+        self.retried = 0
+        self.not_modified = 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, **settings):
+        """
+        Returns the process-wide transport for the given settings, so that both loaders and
+        all Streamlit sessions reuse the same connections and rate limit.
+
+        Parameters:
+            **settings: Keyword arguments of HttpTransport.
+
+        Returns:
+            HttpTransport: The shared transport.
+        """
+        key = tuple(sorted(settings.items()))
+        with cls._instances_lock:
+            transport = cls._instances.get(key)
+            if transport is None:
+                transport = cls._instances[key] = cls(**settings)
+            return transport
+
+    def _wait_for_slot(self, host):
+        if not self.rate_limit:
+            return
+        # Every request reserves the next free slot of its host; slots are 1 / rate_limit apart.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1.0 / self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(self.max_backoff, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    def _request(self, url, headers):
+        host = urllib.parse.urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self._wait_for_slot(host)
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.pool.request("GET", url, headers=headers, timeout=self.timeout)
+            except urllib3.exceptions.HTTPError as e:
+                if attempt == self.retries:
+                    raise TransportError(f"Downloading {url} failed after {attempt + 1} attempts: {e}") from None
+                delay = self._delay(attempt)
+            else:
+                if response.status not in self.RETRY_STATUSES:
+                    return response
+                if attempt == self.retries:
+                    raise TransportError(
+                        f"HTTP {response.status} from {url} after {attempt + 1} attempts", response.status
+                    )
+                delay = self._delay(attempt, response.headers.get("Retry-After"))
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
+
+    def fetch(self, url, validators=None):
+        """
+        Downloads a URL, as a conditional GET if validators of a cached copy are given.
+
+        Parameters:
+            url (str): The URL to download.
+            validators (dict, optional): 'etag' and/or 'last_modified' of the cached copy.
+
+        Returns:
+            tuple: (bytes or None, dict) - the body, or None if the cached copy is still
+                current, and the validators of the response.
+        """
+        if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+            try:
+                with urllib.request.urlopen(url) as response:
+                    return response.read(), {}
+            except urllib.error.URLError as e:
+                if isinstance(e.reason, FileNotFoundError):
+                    # A missing file of a local mirror is reported like a missing remote file.
+                    raise TransportError(f"{url} not found", 404) from None
+                raise
+
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        response = self._request(url, headers)
+        if response.status == 304:
+            with self._lock:
+                self.not_modified += 1
+            return None, validators
+        if response.status != 200:
+            raise TransportError(f"HTTP {response.status} from {url}", response.status)
+        received = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return response.data, {key: value for key, value in received.items() if value}
+
+    def get(self, url):
+        """
+        Downloads a URL and returns its body.
+
+        Parameters:
+            url (str): The URL to download.
+
+        Returns:
+            bytes: The response body.
+        """
+        return self.fetch(url)[0]
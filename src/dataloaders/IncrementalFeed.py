@@ -0,0 +1,155 @@
+import hashlib
+import posixpath
+import urllib.parse
+from datetime import datetime, timedelta
+
+
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+SLICE_INTERVAL = timedelta(minutes=15)
+
+
+class IncrementalFeed:
+    """
+    Finds the GDELT 2.0 15-minute slices of one feed that have not been loaded yet.
+
+    GDELT 2.0 publishes a new slice every 15 minutes, named after its timestamp, e.g.
+    '20240105121500.export.CSV.zip', and lists the newest slice of every feed in
+    'lastupdate.txt' (lines of '<size> <md5> <url>'). Each poll reads that small index and
+    returns the slices between the last one seen and the newest one. The slices in between
+    are derived from the 15-minute naming scheme, since the complete 'masterfilelist.txt'
+    index is well over 100 MB; it is only read when use_master_list is set.
+
+    base_url may also point to a local directory with the same layout, e.g. file:///data/gdeltv2/.
+    """
+
+    SUFFIXES = {
+        "events": ".export.CSV.zip",
+        "mentions": ".mentions.CSV.zip",
+        "gkg": ".gkg.csv.zip",
+    }
+
+    def __init__(self, base_url, feed, download, use_master_list=False):
+        """
+        Parameters:
+            base_url (str): Directory URL of the feed, e.g. 'http://data.gdeltproject.org/gdeltv2/'.
+            feed (str): 'events', 'mentions' or 'gkg'.
+            download (callable): Takes a URL and returns its body as bytes.
+            use_master_list (bool): List the slices to catch up on from 'masterfilelist.txt'.
+        """
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.feed = feed
+        self.suffix = self.SUFFIXES[feed]
+        self.download = download
+        self.use_master_list = use_master_list
+
+    def _entry(self, timestamp, size=None, md5=None):
+        return {
+            "timestamp": timestamp,
+            "url": urllib.parse.urljoin(self.base_url, timestamp + self.suffix),
+            "size": size,
+            "md5": md5,
+        }
+
+    def read_index(self, name="lastupdate.txt"):
+        """
+        Reads an index file and returns the slices of this feed listed in it.
+
+        Parameters:
+            name (str): 'lastupdate.txt' or 'masterfilelist.txt'.
+
+        Returns:
+            list: Slice entries (dicts with timestamp, url, size and md5), oldest first, one
+                per timestamp.
+        """
+        text = self.download(urllib.parse.urljoin(self.base_url, name)).decode("utf-8", errors="replace")
+        # A slice listed more than once (the master list has such lines) is loaded only once.
+        entries = {}
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) != 3:
+                continue
+            size, md5, url = parts
+            file_name = posixpath.basename(urllib.parse.urlsplit(url).path)
+            if not file_name.endswith(self.suffix):
+                continue
+            timestamp = file_name[:-len(self.suffix)]
+            if len(timestamp) != 14 or not timestamp.isdigit():
+                continue
+            entries[timestamp] = self._entry(timestamp, int(size) if size.isdigit() else None, md5)
+        return [entries[timestamp] for timestamp in sorted(entries)]
+
+    @staticmethod
+    def slice_timestamp(value):
+        """
+        Rounds a date or time down to the start of its 15-minute slice.
+
+        Parameters:
+            value (str, date or datetime): E.g. '2024-01-05', '20240105' or '20240105121733'.
+
+        Returns:
+            str: The slice timestamp in 'YYYYMMDDHHMMSS' format.
+        """
+        if isinstance(value, str) and len(value) == 14 and value.isdigit():
+            value = datetime.strptime(value, TIMESTAMP_FORMAT)
+        elif isinstance(value, str):
+            value = datetime.fromisoformat(value) if "-" in value else datetime.strptime(value, "%Y%m%d")
+        elif not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        value = value.replace(minute=value.minute - value.minute % 15, second=0, microsecond=0)
+        return value.strftime(TIMESTAMP_FORMAT)
+
+    def pending(self, last_seen=None, since=None):
+        """
+        Returns the slices newer than the last one seen, up to the newest published slice.
+
+        Parameters:
+            last_seen (str, optional): Timestamp of the last slice already loaded.
+            since (str, date or datetime, optional): Where to start when nothing was seen yet;
+                only the newest slice if None.
+
+        Returns:
+            list: Slice entries, oldest first.
+        """
+        latest = self.read_index("lastupdate.txt")
+        if not latest:
+            return []
+        newest = latest[-1]
+        if last_seen is not None:
+            start = datetime.strptime(last_seen, TIMESTAMP_FORMAT) + SLICE_INTERVAL
+        elif since is not None:
+            start = datetime.strptime(self.slice_timestamp(since), TIMESTAMP_FORMAT)
+        else:
+            return [newest]
+        start_timestamp = start.strftime(TIMESTAMP_FORMAT)
+        if start_timestamp > newest["timestamp"]:
+            return []
+
+        if self.use_master_list:
+            return [
+                entry for entry in self.read_index("masterfilelist.txt")
+                if start_timestamp <= entry["timestamp"] <= newest["timestamp"]
+            ]
+        entries = []
+        end = datetime.strptime(newest["timestamp"], TIMESTAMP_FORMAT)
+        while start < end:
+            entries.append(self._entry(start.strftime(TIMESTAMP_FORMAT)))
+            start += SLICE_INTERVAL
+        entries.append(newest)
+        return entries
+
+    def fetch(self, entry):
+        """
+        Downloads a slice, checking its size and MD5 checksum when the index listed them.
+
+        Parameters:
+            entry (dict): A slice entry returned by pending().
+
+        Returns:
+            bytes: The zipped slice.
+        """
+        data = self.download(entry["url"])
+        if entry["size"] is not None and len(data) != entry["size"]:
+            raise ValueError(f"{entry['url']} has {len(data)} bytes, the index lists {entry['size']}.")
+        if entry["md5"] is not None and hashlib.md5(data).hexdigest() != entry["md5"]:
+            raise ValueError(f"{entry['url']} does not match the MD5 checksum in the index.")
+        return data
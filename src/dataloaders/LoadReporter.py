@@ -0,0 +1,92 @@
+import sys
+
+
+class LoadReporter:
+    """
+    Receives the progress, status messages and errors of a load.
+
+    The loaders report only through a reporter, so the same loading code runs in the
+    Streamlit app, in a batch job or in a worker process. By default everything is printed
+    to stderr; callbacks can route it elsewhere, and the Streamlit app uses a subclass that
+    draws a progress bar instead.
+    """
+
+    def __init__(self, on_progress=None, on_message=None, stream=None):
+        """
+        Parameters:
+            on_progress (callable, optional): Called as on_progress(done, total, date) after each day.
+            on_message (callable, optional): Called as on_message(level, message), where level is
+                'detail', 'info', 'warning' or 'error'.
+            stream (file, optional): Stream messages are printed to without callbacks; stderr if None.
+        """
+        self.on_progress = on_progress
+        self.on_message = on_message
+        self.stream = stream
+        self.errors = []
+
+    def _emit(self, level, message):
+        if self.on_message is not None:
+            self.on_message(level, message)
+        else:
+            print(f"{level.upper()}: {message}" if level in ("warning", "error") else message,
+                  file=self.stream or sys.stderr)
+
+    def thread_hook(self, thread):
+        """
+        Called with every worker thread a load starts, before it runs.
+
+        Parameters:
+            thread (threading.Thread): The worker thread.
+        """
+
+    def start(self, total):
+        """
+        Called before a range load starts.
+
+        Parameters:
+            total (int): Number of days in the range.
+        """
+
+    def progress(self, done, total, date):
+        """
+        Called after each day of a range load, in date order.
+
+        Parameters:
+            done (int): Number of days finished so far.
+            total (int): Number of days in the range.
+            date (str): The day just finished, in 'YYYYMMDD' format.
+        """
+        if self.on_progress is not None:
+            self.on_progress(done, total, date)
+        else:
+            self._emit("detail", f"[{done}/{total}] {date}")
+
+    def finish(self):
+        """
+        Called when a range load has gone through all days.
+        """
+        self._emit("detail", "Data loading completed!")
+
+    def metrics(self, metrics):
+        """
+        Called after a range load with the durations and volumes of its stages.
+
+        Parameters:
+            metrics (StageMetrics): The stage records of the load.
+        """
+        summary = metrics.summary()
+        if not summary.empty:
+            self._emit("detail", f"Stage metrics:\n{summary.to_string(index=False)}")
+
+    def detail(self, message):
+        self._emit("detail", message)
+
+    def info(self, message):
+        self._emit("info", message)
+
+    def warning(self, message):
+        self._emit("warning", message)
+
+    def error(self, message):
+        self.errors.append(message)
+        self._emit("error", message)
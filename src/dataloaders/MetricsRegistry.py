@@ -0,0 +1,155 @@
+import collections
+import http.server
+import threading
+
+
+# Prometheus counters of the stage records: metric name, help text and record field.
+STAGE_COUNTERS = [
+    ("gdelt_stage_seconds_total", "Time spent in each load stage.", "seconds"),
+    ("gdelt_stage_runs_total", "Days (or whole loads, for range-level stages) that went through each stage.", None),
+    ("gdelt_stage_bytes_in_total", "Bytes taken in by each load stage.", "bytes_in"),
+    ("gdelt_stage_bytes_out_total", "Bytes put out by each load stage.", "bytes_out"),
+    ("gdelt_stage_rows_in_total", "Rows taken in by each load stage.", "rows_in"),
+    ("gdelt_stage_rows_out_total", "Rows put out by each load stage.", "rows_out"),
+]
+
+
+class MetricsRegistry:
+    """
+    Process-wide totals of the stage metrics of every load, in the Prometheus text format.
+
+    Loads add their per-day stage records when they finish (see StageMetrics.publish), so
+    the totals cover all Streamlit sessions and batch loads of the process. serve() exposes
+    them on an HTTP endpoint for scraping.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.stages = collections.defaultdict(lambda: collections.Counter())
+        self.sources = collections.Counter()
+        self.loads = collections.defaultdict(lambda: collections.Counter())
+        self.servers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns the process-wide registry.
+
+        Returns:
+            MetricsRegistry: The shared registry.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def observe(self, record):
+        """
+        Adds a stage record to the totals.
+
+        Parameters:
+            record (dict): A record of StageMetrics.records.
+        """
+        with self._lock:
+            totals = self.stages[(record["feed"], record["stage"])]
+            totals["runs"] += 1
+            for _, _, field in STAGE_COUNTERS:
+                if field is not None and record.get(field) is not None:
+                    totals[field] += record[field]
+            if record.get("source") is not None:
+                self.sources[(record["feed"], record["source"])] += 1
+
+    def observe_load(self, feed, seconds, days, errors):
+        """
+        Adds a finished load to the totals.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            seconds (float): Wall time of the load.
+            days (int): Number of days in the load.
+            errors (int): Number of days that failed.
+        """
+        with self._lock:
+            totals = self.loads[feed]
+            totals["loads"] += 1
+            totals["seconds"] += seconds
+            totals["days"] += days
+            totals["errors"] += errors
+
+    def render(self):
+        """
+        Returns the totals in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        lines = []
+
+        def counter(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                label_text = ",".join(f'{label}="{text}"' for label, text in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for name, help_text, field in STAGE_COUNTERS:
+                # Volumes a stage never reports (e.g. bytes of the filter) are left out.
+                counter(name, help_text, [
+                    ({"feed": feed, "stage": stage}, totals[field or "runs"])
+                    for (feed, stage), totals in stages if (field or "runs") in totals
+                ])
+            counter("gdelt_day_source_total", "Days by where their data came from, e.g. download or archive_cache.", [
+                ({"feed": feed, "source": source}, count) for (feed, source), count in sorted(self.sources.items())
+            ])
+            loads = sorted(self.loads.items())
+            for name, help_text, field in [
+                ("gdelt_loads_total", "Finished loads.", "loads"),
+                ("gdelt_load_seconds_total", "Wall time of the finished loads.", "seconds"),
+                ("gdelt_load_days_total", "Days in the finished loads.", "days"),
+                ("gdelt_load_errors_total", "Days that failed to load.", "errors"),
+            ]:
+                counter(name, help_text, [({"feed": feed}, totals[field]) for feed, totals in loads])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="0.0.0.0"):
+        """
+        Serves the metrics page at /metrics from a background thread. Calling it again with
+        the same port (e.g. on every Streamlit rerun) keeps the running server.
+
+        Parameters:
+            port (int): Port to listen on.
+            host (str): Address to listen on.
+
+        Returns:
+            http.server.ThreadingHTTPServer: The server.
+        """
+        registry = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        with self._lock:
+            server = self.servers.get((host, port))
+            if server is None:
+                server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                self.servers[(host, port)] = server
+        return server
@@ -0,0 +1,304 @@
+import contextlib
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+class ParquetStore:
+    """
+    Date-partitioned Parquet copy of the parsed GDELT days.
+
+    Each parsed (unfiltered) day is written once to '<root>/<feed>/date=<YYYYMMDD>/part-0.parquet'.
+    Later loads of the same day read only the columns they need and push the filter
+    predicates into the Parquet reader instead of re-parsing the tab-separated archive.
+    Partitions are written in small row groups, so that take() can read just the row
+    groups holding the rows found through a day's PostingIndex ('index.npz' next to it).
+
+    With a byte budget, the store is pruned after every write like the ArchiveCache: the
+    modification time of a partition file doubles as its last access time, and the least
+    recently used days (with their indexes) are removed until the store fits again.
+    """
+
+    # Rows per Parquet row group, the unit take() reads.
+    ROW_GROUP_SIZE = 16384
+
+    # Arrow types for the dtype names used in the loaders' column schemas.
+    ARROW_TYPES = {
+        "int64": pa.int64(),
+        "int32": pa.int32(),
+        "int8": pa.int8(),
+        "float32": pa.float32(),
+        "str": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+
+    def __init__(self, root, max_bytes=None):
+        """
+        Parameters:
+            root (str): Root directory of the store.
+            max_bytes (int, optional): Byte budget; the least recently used days are removed
+                beyond it. Unbounded if None.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def partition_path(self, feed, date):
+        """
+        Returns the file a day is stored in, whether it exists or not.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            str: Path of the partition file.
+        """
+        return os.path.join(self.root, feed, f"date={date}", "part-0.parquet")
+
+    def index_path(self, feed, date):
+        """
+        Returns the file the PostingIndex of a day is stored in, whether it exists or not.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            str: Path of the index file.
+        """
+        return os.path.join(self.root, feed, f"date={date}", "index.npz")
+
+    @classmethod
+    def arrow_schema(cls, dtypes, columns=None):
+        """
+        Builds a fixed Arrow schema from a loader's column schema, so that every chunk of
+        a day is written with the same types even when a chunk has an all-empty column.
+
+        Parameters:
+            dtypes (dict): Column name to dtype name, e.g. EVENT_SCHEMA.
+            columns (list, optional): Columns to include, in order; all of them if None.
+
+        Returns:
+            pyarrow.Schema: The Arrow schema.
+        """
+        columns = list(dtypes) if columns is None else columns
+        return pa.schema([(column, cls.ARROW_TYPES[dtypes[column]]) for column in columns])
+
+    @classmethod
+    def to_pandas(cls, table, dtypes=None, arrow_strings=False):
+        """
+        Converts a table read from the store (or handed over by a worker) to the frame a parse with the same column schema
+        gives: 'category' columns become sorted categoricals, and missing strings are NaN,
+        or pd.NA in Arrow-backed strings, instead of None.
+
+        Parameters:
+            table (pyarrow.Table): The table read.
+            dtypes (dict, optional): Column name to dtype name; columns not in it keep the
+                pandas type of their Arrow type.
+            arrow_strings (bool): Whether strings become the Arrow-backed 'string[pyarrow]'
+                dtype, as with the 'pyarrow' parse engine, instead of Python str objects.
+
+        Returns:
+            pd.DataFrame: The frame.
+        """
+        dtypes = dtypes or {}
+        for i, name in enumerate(table.column_names):
+            column = table.column(i)
+            if dtypes.get(name) in ("str", "category") and pa.types.is_null(column.type):
+                # A column without any value (or category) is written with Arrow's null type.
+                column = column.cast(pa.string())
+            if dtypes.get(name) == "category" and not pa.types.is_dictionary(column.type):
+                # Encoded by Arrow, the categories are Python strings whatever the string dtype.
+                column = pc.dictionary_encode(column)
+            if column is not table.column(i):
+                table = table.set_column(i, name, column)
+        types_mapper = None
+        if arrow_strings:
+            # Arrow-backed strings are written back as large_string.
+            types_mapper = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}.get
+        # The pandas metadata of the file would bring back the dtypes of the frame written instead;
+        # only its attrs (e.g. the stage records of a worker) are kept.
+        df = table.to_pandas(types_mapper=types_mapper, ignore_metadata=True)
+        df.attrs.update((table.schema.pandas_metadata or {}).get("attributes", {}))
+        for column in df.columns:
+            dtype = dtypes.get(column)
+            if dtype == "category":
+                # Arrow keeps the categories in order of appearance, read_csv sorts them.
+                df[column] = df[column].cat.reorder_categories(sorted(df[column].cat.categories))
+            elif dtype == "str" and not arrow_strings and df[column].hasnans:
+                df[column] = df[column].where(df[column].notna(), np.nan)
+        return df
+
+    def has(self, feed, date):
+        """
+        Checks whether a day has already been converted.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            bool: True if the partition exists.
+        """
+        return os.path.exists(self.partition_path(feed, date))
+
+    @contextlib.contextmanager
+    def writer(self, feed, date, schema):
+        """
+        Opens a partition for incremental writes. The context yields a function that
+        appends one DataFrame chunk; the partition only becomes visible when the block
+        exits without an error.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            schema (pyarrow.Schema): Schema every chunk is converted to.
+
+        Yields:
+            callable: Takes a DataFrame chunk and appends it to the partition.
+        """
+        path = self.partition_path(feed, date)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            with pq.ParquetWriter(tmp_path, schema) as parquet_writer:
+                yield lambda df: parquet_writer.write_table(
+                    pa.Table.from_pandas(df, schema=schema, preserve_index=False),
+                    row_group_size=self.ROW_GROUP_SIZE
+                )
+            os.replace(tmp_path, path)
+            # An index of an earlier copy of the day no longer matches its rows.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.index_path(feed, date))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # The day just written stays, even if it alone is over the budget: its index is saved next.
+        self.evict(keep=directory)
+
+    def write(self, feed, date, df, schema=None):
+        """
+        Atomically writes a parsed day as a Parquet partition.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            df (pd.DataFrame): The parsed, unfiltered day.
+            schema (pyarrow.Schema, optional): Schema to write; inferred from df if None.
+        """
+        if schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with self.writer(feed, date, schema) as write:
+            write(df)
+
+    def read(self, feed, date, columns=None, filter=None, dtypes=None, arrow_strings=False):
+        """
+        Reads a stored day, projecting columns and applying a predicate in the reader.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            columns (list, optional): Columns to read; all columns if None.
+            filter (pyarrow.dataset.Expression, optional): Row predicate.
+            dtypes (dict, optional): Column schema the frame is cast to, see to_pandas().
+            arrow_strings (bool): Whether strings are returned Arrow-backed, see to_pandas().
+
+        Returns:
+            pd.DataFrame: The matching rows.
+        """
+        self._touch(feed, date)
+        dataset = ds.dataset(self.partition_path(feed, date), format="parquet")
+        if columns is not None:
+            columns = [column for column in columns if column in dataset.schema.names]
+        return self.to_pandas(dataset.to_table(columns=columns, filter=filter), dtypes, arrow_strings)
+
+    def take(self, feed, date, rows, columns=None, dtypes=None, arrow_strings=False):
+        """
+        Reads the given rows of a stored day, opening only the row groups that hold them.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            date (str): Date in 'YYYYMMDD' format.
+            rows (np.ndarray): Sorted row offsets within the day.
+            columns (list, optional): Columns to read; all columns if None.
+            dtypes (dict, optional): Column schema the frame is cast to, see to_pandas().
+            arrow_strings (bool): Whether strings are returned Arrow-backed, see to_pandas().
+
+        Returns:
+            pd.DataFrame: The rows, in the given order.
+        """
+        self._touch(feed, date)
+        parquet_file = pq.ParquetFile(self.partition_path(feed, date))
+        if columns is not None:
+            columns = [column for column in columns if column in parquet_file.schema_arrow.names]
+        metadata = parquet_file.metadata
+        bounds = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+        groups = np.searchsorted(bounds, rows, side="right") - 1
+        wanted = np.unique(groups)
+        table = parquet_file.read_row_groups(wanted.tolist(), columns=columns)
+        # Position of each wanted row group within the table read.
+        offsets = np.cumsum(np.concatenate([[0], np.diff(bounds)[wanted][:-1]]))
+        local = rows - bounds[groups] + offsets[np.searchsorted(wanted, groups)]
+        return self.to_pandas(table.take(pa.array(local, type=pa.int64())), dtypes, arrow_strings)
+
+    def _touch(self, feed, date):
+        # Marks the day as recently used.
+        if self.max_bytes is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(self.partition_path(feed, date))
+
+    def _partitions(self):
+        partitions = []
+        if not os.path.isdir(self.root):
+            return partitions
+        for feed in os.scandir(self.root):
+            if not feed.is_dir():
+                continue
+            for partition in os.scandir(feed.path):
+                if not (partition.is_dir() and partition.name.startswith("date=")):
+                    continue
+                try:
+                    used = os.stat(os.path.join(partition.path, "part-0.parquet")).st_mtime
+                    size = sum(entry.stat().st_size for entry in os.scandir(partition.path) if entry.is_file())
+                except FileNotFoundError:
+                    continue
+                partitions.append((used, size, partition.path))
+        return partitions
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used days until the store fits in its byte budget; does
+        nothing without a budget.
+
+        Parameters:
+            keep (str, optional): Partition directory that is never removed.
+        """
+        if self.max_bytes is None:
+            return
+        partitions = sorted(self._partitions())
+        total = sum(size for _, size, _ in partitions)
+        for _, size, path in partitions:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def size(self):
+        """
+        Returns the bytes taken by the stored days and their indexes.
+
+        Returns:
+            int: The size of the store.
+        """
+        return sum(size for _, size, _ in self._partitions())
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+class PostingIndex:
+    """
+    Inverted index of a stored day: for every value of the indexed columns, the offsets of
+    the rows holding it (its posting list).
+
+    Per column, the distinct values are kept sorted next to one array of row offsets
+    grouped by value, plus the start of every value's group in it, so looking up a value
+    is a binary search and a slice. The index is saved as a compressed '.npz' next to
+    the day's Parquet partition, with the row offsets delta-encoded so they compress well. Missing values are not indexed, as they never match a
+    code filter.
+    """
+
+    def __init__(self, num_rows, postings):
+        """
+        Parameters:
+            num_rows (int): Number of rows of the indexed day.
+            postings (dict): Column name to a (values, starts, rows) tuple of arrays.
+        """
+        self.num_rows = num_rows
+        self.postings = postings
+
+    @classmethod
+    def build(cls, df, columns):
+        """
+        Indexes the given columns of a day.
+
+        Parameters:
+            df (pd.DataFrame): The stored day, in stored row order.
+            columns (list): Columns to index.
+
+        Returns:
+            PostingIndex: The index.
+        """
+        postings = {}
+        for column in columns:
+            codes, values = pd.factorize(df[column], sort=True)
+            present = codes >= 0
+            # A stable sort keeps the offsets of every value in ascending order.
+            order = np.argsort(codes[present], kind="stable")
+            rows = np.flatnonzero(present)[order].astype(np.int32)
+            counts = np.bincount(codes[present], minlength=len(values))
+            starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            postings[column] = (np.asarray(values, dtype=str), starts, rows)
+        return cls(len(df), postings)
+
+    @classmethod
+    def load(cls, path, columns=None):
+        """
+        Loads a saved index.
+
+        Parameters:
+            path (str): The '.npz' file.
+            columns (list, optional): Only load the posting lists of these columns; all if None.
+
+        Returns:
+            PostingIndex or None: The index, or None if it has not been built.
+        """
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                if columns is None:
+                    columns = [name[:-len(".values")] for name in arrays.files if name.endswith(".values")]
+                postings = {
+                    column: (
+                        arrays[f"{column}.values"], arrays[f"{column}.starts"],
+                        np.cumsum(arrays[f"{column}.rows"], dtype=np.int32)
+                    )
+                    for column in columns
+                }
+                return cls(int(arrays["num_rows"]), postings)
+        except FileNotFoundError:
+            return None
+
+    def save(self, path):
+        """
+        Atomically writes the index.
+
+        Parameters:
+            path (str): The '.npz' file.
+        """
+        arrays = {"num_rows": np.array(self.num_rows)}
+        for column, (values, starts, rows) in self.postings.items():
+            arrays[f"{column}.values"] = values
+            arrays[f"{column}.starts"] = starts
+            arrays[f"{column}.rows"] = np.diff(rows, prepend=0).astype(np.int32)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def lookup(self, column, values):
+        """
+        Returns the rows whose column holds any of the given values.
+
+        Parameters:
+            column (str): An indexed column.
+            values (list): Values to look up.
+
+        Returns:
+            np.ndarray: Sorted row offsets.
+        """
+        keys, starts, rows = self.postings[column]
+        wanted = np.unique(np.asarray(values, dtype=str))
+        positions = np.searchsorted(keys, wanted)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == wanted[found]
+        parts = [rows[starts[i]:starts[i + 1]] for i in positions[found]]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        # Every row holds a single value, so the posting lists are disjoint.
+        return np.sort(np.concatenate(parts))
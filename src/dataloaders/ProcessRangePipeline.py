@@ -0,0 +1,119 @@
+import collections
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+def _run_task(task, date, handoff_dir):
+    # Runs in a worker process. The result goes back as an Arrow IPC file on shared memory
+    # (or the temp directory); only its path is pickled.
+    try:
+        df = task(date)
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            # Some exceptions (e.g. urllib's HTTPError, which holds the response) cannot be
+            # sent back to the parent; keep their message.
+            raise RuntimeError(str(e)) from None
+        raise
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = os.path.join(handoff_dir, f"{date}.arrow")
+    with ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+class ProcessRangePipeline:
+    """
+    Runs the per-day work of a range load in a pool of worker processes.
+
+    Inflating an archive and parsing it with pandas holds the GIL, so the threaded
+    RangePipeline keeps only one core busy. Here each day is fetched, parsed and filtered
+    by a separate process. The resulting frame is written by the worker as an Arrow IPC
+    file in /dev/shm (a tmpfs, i.e. shared memory) when it exists, and memory-mapped by the
+    parent, so the data is never pickled. Results still come out in date order, and only
+    a bounded number of days are in flight at once.
+    """
+
+    def __init__(self, task, workers, queue_size=1, to_pandas=None):
+        """
+        Parameters:
+            task (callable): Takes a date ('YYYYMMDD') and returns the filtered DataFrame for
+                it. Runs in the workers, so it must be picklable, e.g. a module-level function
+                or a functools.partial of one.
+            workers (int): Number of worker processes.
+            queue_size (int): Number of finished days that may wait on top of the ones in work.
+            to_pandas (callable, optional): Converts the Arrow table of a day back to a DataFrame,
+                e.g. to restore the loader's dtypes; pyarrow.Table.to_pandas if None.
+        """
+        self.task = task
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.to_pandas = to_pandas or pa.Table.to_pandas
+
+    @staticmethod
+    def handoff_root():
+        """
+        Returns the directory used for the Arrow files handed from the workers to the parent.
+
+        Returns:
+            str: /dev/shm if available, otherwise the temp directory.
+        """
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            return "/dev/shm"
+        return tempfile.gettempdir()
+
+    def _read(self, path):
+        try:
+            with pa.memory_map(path) as source:
+                return self.to_pandas(ipc.open_file(source).read_all())
+        finally:
+            os.remove(path)
+
+    def run(self, dates):
+        """
+        Pushes the dates through the worker pool and yields the results in date order.
+
+        Errors raised while loading a day do not stop the pipeline; they are passed along
+        with the date that caused them so the caller can report them.
+
+        Parameters:
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Yields:
+            tuple: (date, DataFrame or None, Exception or None)
+        """
+        with contextlib.ExitStack() as stack:
+            handoff_dir = stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="gdelt-handoff-", dir=self.handoff_root())
+            )
+            # Spawned workers do not inherit the threads (e.g. Streamlit's) of this process.
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            stack.callback(executor.shutdown, wait=True, cancel_futures=True)
+
+            remaining = iter(dates)
+            pending = collections.deque()
+
+            def submit():
+                for date in remaining:
+                    pending.append((date, executor.submit(_run_task, self.task, date, handoff_dir)))
+                    return
+
+            for _ in range(self.workers + self.queue_size):
+                submit()
+            while pending:
+                date, future = pending.popleft()
+                submit()
+                try:
+                    df, error = self._read(future.result()), None
+                except Exception as e:
+                    df, error = None, e
+                yield date, df, error
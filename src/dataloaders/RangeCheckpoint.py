@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from src.dataloaders.ParquetStore import ParquetStore
+
+
+class RangeCheckpoint:
+    """
+    Checkpoint of a range load, so that a load that died half way can be resumed.
+
+    A checkpoint belongs to a query (the feed plus everything that decides which rows and
+    columns a day yields), not to a date range, so a longer or overlapping range with the
+    same filters reuses the days already loaded. It lives in '<root>/<feed>-<query hash>/':
+    every finished day is written there as a filtered Parquet partition, and
+    'manifest.json' records, per date, its row count and partition, plus the dates that
+    failed and their error. The manifest is rewritten atomically after every day.
+
+    A checkpoint is only kept while it may be resumed: the loaders remove it once a range
+    finished without a failed day, and prune() removes the checkpoints of loads that were
+    abandoned, i.e. whose manifest was not written for longer than a maximum age.
+    """
+
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(self, root, feed, query, dtypes=None, arrow_strings=False):
+        """
+        Parameters:
+            root (str): Directory holding all checkpoints.
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            query (dict): JSON-serializable settings that determine the loaded rows and columns.
+            dtypes (dict, optional): Column schema the read days are cast to, see
+                ParquetStore.to_pandas().
+            arrow_strings (bool): Whether the read days have Arrow-backed strings.
+        """
+        self.query = query
+        self.dtypes = dtypes
+        self.arrow_strings = arrow_strings
+        self.key = hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        self.directory = os.path.join(root, f"{feed}-{self.key}")
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self.store = ParquetStore(self.directory)
+        with self._locks_lock:
+            self._lock = self._locks.setdefault(os.path.abspath(self.directory), threading.Lock())
+        self.manifest = self._load()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        manifest.setdefault("query", self.query)
+        manifest.setdefault("completed", {})
+        manifest.setdefault("failed", {})
+        return manifest
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def remove(self):
+        """
+        Removes the checkpoint with all its days, e.g. once its range has finished loading.
+        """
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.manifest = self._load()
+
+    @staticmethod
+    def prune(root, max_age):
+        """
+        Removes the checkpoints whose manifest was last written more than max_age seconds
+        ago; does nothing without a maximum age.
+
+        Parameters:
+            root (str): Directory holding all checkpoints.
+            max_age (float or None): Maximum age in seconds.
+
+        Returns:
+            int: The number of removed checkpoints.
+        """
+        if max_age is None or not os.path.isdir(root):
+            return 0
+        removed = 0
+        oldest = time.time() - max_age
+        for entry in os.scandir(root):
+            if not entry.is_dir():
+                continue
+            try:
+                written = os.stat(os.path.join(entry.path, "manifest.json")).st_mtime
+            except FileNotFoundError:
+                # A checkpoint whose first day is still being written has no manifest yet.
+                written = entry.stat().st_mtime
+            if written < oldest:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def split(self, dates):
+        """
+        Splits the dates of a range into the ones already completed and the ones still to
+        load. Dates that failed before are in the second list, so they are retried.
+
+        Parameters:
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Returns:
+            tuple: (completed dates, pending dates), both in the given order.
+        """
+        completed = self.manifest["completed"]
+        done = [date for date in dates if date in completed and self.store.has("days", date)]
+        done_set = set(done)
+        return done, [date for date in dates if date not in done_set]
+
+    def failed(self, dates=None):
+        """
+        Returns the dates whose last attempt failed, with the error message.
+
+        Parameters:
+            dates (list, optional): Only report these dates; all failed dates if None.
+
+        Returns:
+            dict: Date to error message.
+        """
+        failed = self.manifest["failed"]
+        if dates is None:
+            return dict(failed)
+        return {date: failed[date] for date in dates if date in failed}
+
+    def record(self, date, df):
+        """
+        Stores the filtered frame of a completed day and marks the day as completed.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            df (pd.DataFrame): The filtered day.
+        """
+        self.store.write("days", date, df.reset_index(drop=True))
+        with self._lock:
+            # Reload first: another session may be loading the same query.
+            self.manifest = self._load()
+            self.manifest["completed"][date] = {
+                "rows": len(df),
+                "partition": os.path.relpath(self.store.partition_path("days", date), self.directory),
+            }
+            self.manifest["failed"].pop(date, None)
+            self._save()
+
+    def record_failure(self, date, error):
+        """
+        Marks a day as failed, so the next run retries it.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+            error (Exception or str): What went wrong.
+        """
+        with self._lock:
+            self.manifest = self._load()
+            self.manifest["failed"][date] = str(error)
+            self._save()
+
+    def rows(self, date):
+        """
+        Returns the number of rows recorded for a completed day.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            int: The row count.
+        """
+        return self.manifest["completed"][date]["rows"]
+
+    def read(self, date):
+        """
+        Reads the filtered frame of a completed day.
+
+        Parameters:
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            pd.DataFrame: The filtered day.
+        """
+        return self.store.read("days", date, dtypes=self.dtypes, arrow_strings=self.arrow_strings)
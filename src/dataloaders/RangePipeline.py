@@ -0,0 +1,110 @@
+import queue
+import threading
+
+
+class RangePipeline:
+    """
+    Runs the fetch -> parse -> filter stages of a range load concurrently.
+
+    Each stage runs in its own thread and hands its output to the next stage through a
+    bounded queue. When a downstream stage falls behind, the upstream stage blocks on the
+    full queue (backpressure), so only a handful of days are ever held in memory at once.
+    Because every stage processes the dates one by one in a single thread, results come
+    out in the same order as the input dates.
+    """
+
+    _DONE = object()
+
+    def __init__(self, fetch, parse, filter, queue_size=1, thread_hook=None):
+        """
+        Parameters:
+            fetch (callable): Takes a date ('YYYYMMDD') and returns the raw payload for it.
+            parse (callable): Takes the raw payload and its date and returns a DataFrame.
+            filter (callable): Takes the parsed DataFrame and its date and returns the filtered
+                DataFrame.
+            queue_size (int): Maximum number of items waiting between two stages.
+            thread_hook (callable, optional): Called with each worker thread before it starts,
+                e.g. to attach the Streamlit script context so stages can read session_state.
+        """
+        self.stages = [fetch, parse, filter]
+        self.queue_size = max(1, int(queue_size))
+        self.thread_hook = thread_hook
+
+    def _put(self, q, item, stop):
+        # Block while the queue is full, but give up as soon as the pipeline is stopped.
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, stop):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return self._DONE
+
+    def _source(self, dates, out_q, stop):
+        for date in dates:
+            if not self._put(out_q, (date, date, None), stop):
+                return
+        self._put(out_q, self._DONE, stop)
+
+    def _stage(self, func, in_q, out_q, stop, with_date=False):
+        while True:
+            item = self._get(in_q, stop)
+            if item is self._DONE:
+                self._put(out_q, self._DONE, stop)
+                return
+            date, payload, error = item
+            if error is None:
+                try:
+                    payload = func(payload, date) if with_date else func(payload)
+                except Exception as e:
+                    payload, error = None, e
+            else:
+                payload = None
+            if not self._put(out_q, (date, payload, error), stop):
+                return
+
+    def run(self, dates):
+        """
+        Pushes the dates through the pipeline and yields the results in date order.
+
+        Errors raised by a stage do not stop the pipeline; they are passed along with
+        the date that caused them so the caller can report them.
+
+        Parameters:
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Yields:
+            tuple: (date, DataFrame or None, Exception or None)
+        """
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._source, args=(dates, queues[0], stop), daemon=True)]
+        for i, func in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._stage, args=(func, queues[i], queues[i + 1], stop, i > 0),
+                daemon=True
+            ))
+        for thread in threads:
+            if self.thread_hook is not None:
+                self.thread_hook(thread)
+            thread.start()
+
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is self._DONE:
+                    break
+                yield item
+        finally:
+            # Unblocks any stage still waiting on a queue if the caller stops early.
+            stop.set()
+            for thread in threads:
+                thread.join()
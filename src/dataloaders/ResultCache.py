@@ -0,0 +1,154 @@
+import collections
+import hashlib
+import json
+import threading
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of filtered per-day results, shared by all loaders and Streamlit
+    sessions of the process.
+
+    An entry is the final frame of one day for one query, keyed by feed, query key and
+    date. A range load takes the days it finds here and only computes the others, so
+    rerunning a query, or widening its range by a few days, reuses the days already done
+    by any session. The cache holds at most max_bytes of frames (by their deep memory
+    usage); the least recently used days are dropped first. Cached frames are shared, so
+    callers must not modify them in place.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_bytes):
+        """
+        Parameters:
+            max_bytes (int): Memory budget of the cached frames in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, max_bytes):
+        """
+        Returns the process-wide result cache, applying the given budget to it.
+
+        Parameters:
+            max_bytes (int): Memory budget of the cached frames in bytes.
+
+        Returns:
+            ResultCache: The shared cache.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(max_bytes)
+            cache = cls._instance
+        if cache.max_bytes != max_bytes:
+            with cache._lock:
+                cache.max_bytes = max_bytes
+                cache._evict()
+        return cache
+
+    @staticmethod
+    def query_key(query):
+        """
+        Derives the key of a query.
+
+        Parameters:
+            query (dict): JSON-serializable settings that determine a day's rows and columns,
+                normalized by the loader so that equivalent queries are equal.
+
+        Returns:
+            str: The key.
+        """
+        return hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self.entries:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def get(self, feed, key, date):
+        """
+        Returns the cached frame of a day, or None on a miss.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            key (str): Query key, see query_key().
+            date (str): Date in 'YYYYMMDD' format.
+
+        Returns:
+            pd.DataFrame or None: The day's result.
+        """
+        with self._lock:
+            entry = self.entries.get((feed, key, date))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((feed, key, date))
+            self.hits += 1
+            return entry[0]
+
+    def split(self, feed, key, dates):
+        """
+        Splits the dates of a range into the days found in the cache and the others.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            key (str): Query key, see query_key().
+            dates (list): Dates in 'YYYYMMDD' format.
+
+        Returns:
+            tuple: (dict of date to cached frame, list of the dates not cached)
+        """
+        cached, missing = {}, []
+        for date in dates:
+            df = self.get(feed, key, date)
+            if df is None:
+                missing.append(date)
+            else:
+                cached[date] = df
+        return cached, missing
+
+    def put(self, feed, key, date, df):
+        """
+        Caches the frame of a day; frames larger than the whole budget are not cached.
+
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+            key (str): Query key, see query_key().
+            date (str): Date in 'YYYYMMDD' format.
+            df (pd.DataFrame): The day's result.
+        """
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self.entries.pop((feed, key, date), None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[(feed, key, date)] = (df, size)
+            self.bytes += size
+            self._evict()
+
+    def stats(self):
+        """
+        Returns the counters of the cache.
+
+        Returns:
+            dict: hits, misses, evictions, entries and bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+            }
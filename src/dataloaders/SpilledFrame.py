@@ -0,0 +1,155 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+class SpilledFrame:
+    """
+    A loaded dataset kept on disk instead of in memory: the concatenation of the frames
+    appended to it, each stored as an lz4-compressed Arrow IPC file in a temporary
+    directory, which is removed when the object is garbage collected.
+
+    It is read back a chunk at a time (iter_chunks), so exports and previews stream it
+    without ever holding the whole dataset in memory. Like a concatenated DataFrame, every
+    chunk has the same columns and dtypes, and categorical columns have the same categories
+    in every chunk: the union of the categories of all frames.
+    """
+
+    def __init__(self, spill_dir=None, batch_rows=65_536):
+        """
+        Parameters:
+            spill_dir (str, optional): Parent of the temporary directory; the system temp
+                directory if None.
+            batch_rows (int): Rows per record batch in the files, the largest chunk read at a time.
+        """
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="lazyloader-gdelt-spill-", dir=spill_dir)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        self.batch_rows = batch_rows
+        self.paths = []
+        self.rows = 0
+        self.bytes = 0
+        self.columns = None
+        self.dtypes = {}
+        self.categories = {}
+        self._digest = hashlib.sha256()
+
+    def append(self, df):
+        """
+        Writes a frame to disk as the next part of the dataset.
+
+        Parameters:
+            df (pd.DataFrame): Rows to add; the first frame determines the columns.
+        """
+        if self.columns is None:
+            self.columns = pd.Index(df.columns)
+            self.dtypes = {
+                column: dtype for column, dtype in df.dtypes.items() if not isinstance(dtype, pd.CategoricalDtype)
+            }
+            self._digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode("utf-8"))
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                known = self.categories.get(column)
+                categories = df[column].cat.categories
+                self.categories[column] = categories if known is None else known.union(categories)
+        self._digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = os.path.join(self.directory, f"part-{len(self.paths):05d}.arrow")
+        with ipc.new_file(path, table.schema, options=ipc.IpcWriteOptions(compression="lz4")) as writer:
+            writer.write_table(table, max_chunksize=self.batch_rows)
+        self.paths.append(path)
+        self.rows += len(df)
+        self.bytes += os.path.getsize(path)
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    @property
+    def shape(self):
+        return self.rows, 0 if self.columns is None else len(self.columns)
+
+    def fingerprint(self):
+        """
+        Returns a fingerprint of the rows appended so far, computed from their columns,
+        dtypes and row hashes while they were written.
+
+        Returns:
+            str: Hex digest identifying this version of the data.
+        """
+        return self._digest.copy().hexdigest()[:32]
+
+    def _conform(self, df):
+        if not df.columns.equals(self.columns):
+            df = df.reindex(columns=self.columns)
+        for column, categories in self.categories.items():
+            df[column] = df[column].astype(pd.CategoricalDtype(categories))
+        # Arrow gives None for missing strings where the frames held NaN, and Python-backed
+        # strings for string[pyarrow] columns.
+        for column, dtype in self.dtypes.items():
+            if dtype == object:
+                if df[column].hasnans:
+                    df[column] = df[column].where(df[column].notna(), np.nan)
+            elif df[column].dtype != dtype:
+                df[column] = df[column].astype(dtype)
+        return df
+
+    def iter_chunks(self, rows=None):
+        """
+        Yields the dataset as consecutive frames, reading one record batch at a time.
+
+        Parameters:
+            rows (int, optional): Maximum rows per chunk; the batch size if None.
+
+        Yields:
+            pd.DataFrame: The next rows, indexed from 0.
+        """
+        rows = rows or self.batch_rows
+        for path in self.paths:
+            reader = ipc.open_file(path)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for start in range(0, batch.num_rows, rows):
+                    yield self._conform(batch.slice(start, rows).to_pandas())
+
+    def head(self, n=5):
+        """
+        Returns the first rows, for previews.
+
+        Parameters:
+            n (int): Number of rows.
+
+        Returns:
+            pd.DataFrame: At most n rows.
+        """
+        chunks, count = [], 0
+        for chunk in self.iter_chunks(max(n, 1)):
+            chunks.append(chunk.iloc[:n - count])
+            count += len(chunks[-1])
+            if count >= n:
+                break
+        if not chunks:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(chunks, ignore_index=True)
+
+    def to_pandas(self):
+        """
+        Reads the whole dataset into memory.
+
+        Returns:
+            pd.DataFrame: The concatenated rows.
+        """
+        if not self.paths:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(list(self.iter_chunks()), ignore_index=True)
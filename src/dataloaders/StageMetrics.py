@@ -0,0 +1,195 @@
+import contextlib
+import json
+import logging
+import sys
+import threading
+import time
+import pandas as pd
+from src.dataloaders.MetricsRegistry import MetricsRegistry
+
+logger = logging.getLogger("lazyloader.metrics")
+
+# Stages in the order a day goes through them, for sorting the records.
+STAGE_ORDER = [
+    "result_cache", "checkpoint", "fetch", "store_read", "unzip", "parse", "fix_event_codes",
+    "store_write", "cube", "chunk_filter", "chunk_tone", "filter", "tone", "transform", "collect", "concat",
+]
+VOLUMES = ["bytes_in", "bytes_out", "rows_in", "rows_out"]
+
+
+class StageMetrics:
+    """
+    Durations and volumes of the stages of one load, per day.
+
+    Each stage a day goes through (fetch, unzip, parse, fix_event_codes, filter, ...) adds a
+    record with its duration and the bytes and rows it took in and put out. The stage that
+    provides a day also notes its source: 'download', 'archive_cache', 'revalidated' or
+    'store' for fetch, 'result_cache' or 'checkpoint' for days that were not loaded again.
+    Records of the same day and stage, e.g. of every chunk of a chunked parse, are summed;
+    the filtering done chunk by chunk inside a chunked parse is recorded as chunk_filter
+    (and chunk_tone) instead of filter (and tone).
+    Stages of the whole range, such as concat, have no date.
+
+    When the load ends, publish() writes every record as a JSON line to the
+    'lazyloader.metrics' logger and adds it to the process-wide MetricsRegistry.
+    """
+
+    def __init__(self, feed):
+        """
+        Parameters:
+            feed (str): Feed name, e.g. 'events' or 'gkg'.
+        """
+        self.feed = feed
+        self.records = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, date, stage, seconds=0.0, source=None, **volumes):
+        """
+        Adds the duration and volumes of a stage to the record of the day.
+
+        Parameters:
+            date (str or None): Date in 'YYYYMMDD' format; None for stages of the whole range.
+            stage (str): Stage name, see STAGE_ORDER.
+            seconds (float): Time spent in the stage.
+            source (str, optional): Where the data of the day came from.
+            **volumes: Any of bytes_in, bytes_out, rows_in and rows_out.
+        """
+        with self._lock:
+            entry = self.records.get((date, stage))
+            if entry is None:
+                entry = {"feed": self.feed, "date": date, "stage": stage, "seconds": 0.0, "source": None}
+                entry.update(dict.fromkeys(VOLUMES))
+                self.records[(date, stage)] = entry
+            entry["seconds"] += seconds
+            if source is not None:
+                entry["source"] = source
+            for field, value in volumes.items():
+                if value is not None:
+                    entry[field] = (entry[field] or 0) + int(value)
+
+    @contextlib.contextmanager
+    def measure(self, date, stage, parent=None, **volumes):
+        """
+        Times the with block as a stage of the day. The block can add the volumes it only
+        knows at the end, and the source, to the yielded dict; time it spent on something
+        recorded as another stage can be subtracted from its 'seconds'. Nothing is recorded
+        if the block raises.
+
+        Parameters:
+            date (str or None): Date in 'YYYYMMDD' format; None for stages of the whole range.
+            stage (str): Stage name, see STAGE_ORDER.
+            parent (dict, optional): Fields of an enclosing measure() block; the time of this
+                stage is taken out of it.
+            **volumes: Volumes already known, e.g. rows_in.
+
+        Yields:
+            dict: The fields of the record.
+        """
+        fields = dict(volumes, seconds=0.0)
+        started = time.perf_counter()
+        yield fields
+        fields["seconds"] += time.perf_counter() - started
+        if parent is not None:
+            parent["seconds"] -= fields["seconds"]
+        self.record(date, stage, **fields)
+
+    def merge(self, records):
+        """
+        Adds records collected elsewhere, e.g. by a worker process.
+
+        Parameters:
+            records (list): Records as in the records attribute.
+        """
+        for record in records:
+            self.record(
+                record["date"], record["stage"], record["seconds"], record["source"],
+                **{field: record[field] for field in VOLUMES}
+            )
+
+    def sorted_records(self):
+        """
+        Returns the records by date (stages of the whole range last) and in stage order.
+
+        Returns:
+            list: Copies of the records.
+        """
+        def key(record):
+            stage = STAGE_ORDER.index(record["stage"]) if record["stage"] in STAGE_ORDER else len(STAGE_ORDER)
+            return record["date"] is None, record["date"] or "", stage
+
+        with self._lock:
+            return sorted((dict(record) for record in self.records.values()), key=key)
+
+    def to_frame(self):
+        """
+        Returns the records as a table, see sorted_records().
+
+        Returns:
+            pd.DataFrame: One row per day and stage.
+        """
+        df = pd.DataFrame(self.sorted_records(), columns=["feed", "date", "stage", "seconds", "source"] + VOLUMES)
+        return df.astype({field: "Int64" for field in VOLUMES})
+
+    def summary(self):
+        """
+        Returns the totals of every stage over the days of the load.
+
+        Returns:
+            pd.DataFrame: Per stage: days, seconds, MB and rows in and out, MB/s of the
+                input and the number of days per source.
+        """
+        df = self.to_frame()
+        if df.empty:
+            return pd.DataFrame(columns=["stage", "days", "seconds", "mb_in", "mb_out", "rows_in", "rows_out", "mb_per_s", "sources"])
+        rows = []
+        for stage, group in df.groupby('stage', sort=False):
+            bytes_in = group['bytes_in'].sum(min_count=1)
+            sources = group['source'].value_counts()
+            rows.append({
+                "stage": stage,
+                "days": group['date'].notna().sum(),
+                "seconds": group['seconds'].sum(),
+                "mb_in": bytes_in / 1e6,
+                "mb_out": group['bytes_out'].sum(min_count=1) / 1e6,
+                "rows_in": group['rows_in'].sum(min_count=1),
+                "rows_out": group['rows_out'].sum(min_count=1),
+                "mb_per_s": bytes_in / 1e6 / group['seconds'].sum() if group['seconds'].sum() > 0 else None,
+                "sources": ", ".join(f"{source} {count}" for source, count in sources.items()),
+            })
+        return pd.DataFrame(rows)
+
+    def publish(self, days=None, errors=0):
+        """
+        Ends the load: logs every record as JSON and adds the records and the load to the
+        process-wide MetricsRegistry.
+
+        Parameters:
+            days (int, optional): Number of days in the load; None if the records are not
+                those of a load, e.g. of an export.
+            errors (int): Number of days that failed.
+        """
+        registry = MetricsRegistry.shared()
+        logged_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        for record in self.sorted_records():
+            registry.observe(record)
+            logger.info(json.dumps(dict(record, time=logged_at)))
+        if days is not None:
+            registry.observe_load(self.feed, time.perf_counter() - self.started, days, errors)
+
+    @staticmethod
+    def log_to(path):
+        """
+        Writes the JSON lines of published loads to a file, or to stderr if path is '-'.
+        Calling it again with the same path (e.g. on every Streamlit rerun) adds no handler.
+
+        Parameters:
+            path (str): File to append to, or '-'.
+        """
+        if any(getattr(handler, "metrics_path", None) == path for handler in logger.handlers):
+            return
+        handler = logging.StreamHandler(sys.stderr) if path == "-" else logging.FileHandler(path)
+        handler.metrics_path = path
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
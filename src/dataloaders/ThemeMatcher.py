@@ -0,0 +1,248 @@
+import collections
+import functools
+import re
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class ThemeMatcher:
+    """
+    Matches the ';'-separated THEMES column of GKG data against a boolean keyword query.
+
+    A query is made of terms combined with AND, OR, NOT and parentheses, e.g.
+    'WAR AND NOT TAX_FNCACT_*'. Passing a list of keywords ORs the items together, so the
+    old comma-separated keyword input keeps working. Matching is case-insensitive.
+
+    A term matches a theme when its '_'-separated tokens appear as a run of whole tokens
+    in the theme: 'WAR' matches 'WAR' and 'ARMED_WAR_ZONE' but not 'SOFTWARE'. A term
+    ending in '*' is a prefix: 'TAX_FNCACT_*' matches 'TAX_FNCACT_PRESIDENT'.
+
+    The query is compiled once. Every distinct theme is then resolved to a bitmask of the
+    terms it matches (a hash lookup of its token n-grams), and the masks are cached, so a
+    row only costs one dictionary lookup per theme plus a bitwise OR. The boolean query is
+    finally evaluated on the per-row bitmasks with vectorized numpy operations.
+
+    The cache keeps the MAX_CACHED_THEMES most recently seen themes: matchers are shared
+    between loads through for_keywords(), so an unbounded cache would grow with every new
+    theme (e.g. the location and person themes) for the life of the process.
+    """
+
+    _TOKEN = re.compile(r"\(|\)|[^\s()]+")
+    _OPERATORS = {"AND", "OR", "NOT"}
+    MAX_TERMS = 62
+    # Distinct themes whose mask is cached (about 10 MB), more than a GKG day holds.
+    MAX_CACHED_THEMES = 50000
+
+    def __init__(self, query):
+        """
+        Parameters:
+            query (str or list): Boolean query, or a list of queries to OR together.
+        """
+        if isinstance(query, (list, tuple)):
+            query = " OR ".join(f"({item})" for item in query if item and item.strip())
+        self.query = query or ""
+        self.terms = []
+        self.exact_terms = {}
+        self.prefix_terms = []
+        self.max_exact_tokens = 0
+        self._theme_masks = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self._tokens = self._TOKEN.findall(self.query)
+        self._position = 0
+        self.expression = self._parse_or() if self._tokens else None
+        if self._position != len(self._tokens):
+            raise ValueError(f"Unexpected '{self._tokens[self._position]}' in keyword query: {self.query}")
+        if len(self.terms) > self.MAX_TERMS:
+            raise ValueError(f"Keyword queries support at most {self.MAX_TERMS} distinct terms.")
+
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _compiled(cls, query):
+        return cls(list(query))
+
+    @classmethod
+    def for_keywords(cls, keywords):
+        """
+        Returns a compiled matcher for the keywords, reusing the one compiled for an earlier
+        identical query so that its theme cache carries over between days and chunks.
+
+        Parameters:
+            keywords (list): Keyword queries to OR together.
+
+        Returns:
+            ThemeMatcher: The compiled matcher.
+        """
+        return cls._compiled(tuple(keywords))
+
+    # --- Query parsing -------------------------------------------------------------------
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Keyword query ends unexpectedly: {self.query}")
+        self._position += 1
+        return token
+
+    def _is_operator(self, token, operator):
+        return token is not None and token.upper() == operator
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._is_operator(self._peek(), "OR"):
+            self._next()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._is_operator(self._peek(), "AND"):
+            self._next()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._is_operator(self._peek(), "NOT"):
+            self._next()
+            return ("not", self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        token = self._next()
+        if token == "(":
+            node = self._parse_or()
+            if self._next() != ")":
+                raise ValueError(f"Missing ')' in keyword query: {self.query}")
+            return node
+        if token == ")" or token.upper() in self._OPERATORS:
+            raise ValueError(f"Unexpected '{token}' in keyword query: {self.query}")
+        return ("term", self._term_bit(token.upper()))
+
+    def _term_bit(self, term):
+        if term in self.terms:
+            return self.terms.index(term)
+        bit = len(self.terms)
+        self.terms.append(term)
+        if term.endswith("*"):
+            self.prefix_terms.append((term[:-1], bit))
+        else:
+            self.exact_terms[term] = bit
+            self.max_exact_tokens = max(self.max_exact_tokens, term.count("_") + 1)
+        return bit
+
+    # --- Matching ------------------------------------------------------------------------
+
+    def _theme_mask(self, theme):
+        tokens = theme.upper().split("_")
+        mask = 0
+        for start in range(len(tokens)):
+            for end in range(start + 1, min(start + self.max_exact_tokens, len(tokens)) + 1):
+                bit = self.exact_terms.get("_".join(tokens[start:end]))
+                if bit is not None:
+                    mask |= 1 << bit
+            if self.prefix_terms:
+                suffix = "_".join(tokens[start:])
+                for prefix, bit in self.prefix_terms:
+                    if suffix.startswith(prefix):
+                        mask |= 1 << bit
+        return mask
+
+    def _evaluate(self, node, bits):
+        kind = node[0]
+        if kind == "term":
+            return ((bits >> node[1]) & 1).astype(bool)
+        if kind == "not":
+            return ~self._evaluate(node[1], bits)
+        left, right = self._evaluate(node[1], bits), self._evaluate(node[2], bits)
+        return left & right if kind == "and" else left | right
+
+    def _term_sql(self, term, column):
+        # A run of whole tokens: preceded by the start of the value or a theme or token
+        # separator and, unless it is a prefix, followed by one or by the end. No theme
+        # contains ';', so a term with one never matches.
+        if ";" in term:
+            return "false"
+        if term.endswith("*"):
+            pattern = f"(?i)(^|[;_]){re.escape(term[:-1])}"
+        else:
+            pattern = f"(?i)(^|[;_]){re.escape(term)}([;_]|$)"
+        pattern = pattern.replace("'", "''")
+        return f"regexp_matches(coalesce({column}, ''), '{pattern}')"
+
+    def _node_sql(self, node, column):
+        kind = node[0]
+        if kind == "term":
+            return self._term_sql(self.terms[node[1]], column)
+        if kind == "not":
+            return f"(NOT {self._node_sql(node[1], column)})"
+        operator = " AND " if kind == "and" else " OR "
+        return f"({self._node_sql(node[1], column)}{operator}{self._node_sql(node[2], column)})"
+
+    def to_sql(self, column='"THEMES"'):
+        """
+        Compiles the query into a SQL condition with the same matches, for the DuckDB engine:
+        every term becomes a case-insensitive regular expression over the whole THEMES value.
+
+        Parameters:
+            column (str): SQL expression of the THEMES column.
+
+        Returns:
+            str or None: The condition, or None for an empty query (every row matches).
+        """
+        if self.expression is None:
+            return None
+        return self._node_sql(self.expression, column)
+
+    def match(self, themes):
+        """
+        Evaluates the query against a THEMES column.
+
+        Parameters:
+            themes (pd.Series): The ';'-separated THEMES values.
+
+        Returns:
+            np.ndarray: Boolean mask, one entry per row.
+        """
+        if self.expression is None:
+            return np.ones(len(themes), dtype=bool)
+        if len(themes) == 0:
+            return np.zeros(0, dtype=bool)
+
+        # Splitting, flattening and deduplicating the themes runs in Arrow, so no Python string
+        # is created per theme; only distinct themes not seen before are matched in Python.
+        if isinstance(themes.dtype, pd.StringDtype) and themes.dtype.storage == "pyarrow":
+            # Themes parsed by the pyarrow engine are already in Arrow memory.
+            values = pa.array(themes.array)
+            if isinstance(values, pa.ChunkedArray):
+                values = values.combine_chunks()
+            values = pc.fill_null(values, "")
+        else:
+            values = pa.array(themes.fillna("").astype(str), type=pa.string())
+        lists = pc.split_pattern(values, ";")
+        encoded = pc.dictionary_encode(pc.list_flatten(lists))
+        theme_masks = self._theme_masks
+        distinct_masks = np.empty(len(encoded.dictionary), dtype=np.int64)
+        # The matcher may be shared by the threads of a range load.
+        with self._lock:
+            for i, theme in enumerate(encoded.dictionary.to_pylist()):
+                mask = theme_masks.get(theme)
+                if mask is None:
+                    mask = theme_masks[theme] = self._theme_mask(theme)
+                else:
+                    theme_masks.move_to_end(theme)
+                distinct_masks[i] = mask
+            while len(theme_masks) > self.MAX_CACHED_THEMES:
+                theme_masks.popitem(last=False)
+
+        # Every THEMES string yields at least one (possibly empty) theme, so the offsets are valid.
+        offsets = lists.offsets.to_numpy()[:-1]
+        flat_masks = distinct_masks[encoded.indices.to_numpy(zero_copy_only=False)]
+        return self._evaluate(self.expression, np.bitwise_or.reduceat(flat_masks, offsets))
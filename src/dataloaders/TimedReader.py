@@ -0,0 +1,59 @@
+import io
+import time
+import zipfile
+
+
+class TimedReader(io.BufferedIOBase):
+    """
+    A read-only file wrapper that counts the bytes read through it and the time spent
+    reading them.
+
+    Wrapped around the member of a zipped archive, the time is the decompression time and
+    the bytes are the uncompressed size, so a parse that reads from it can report unzipping
+    and parsing as separate stages.
+    """
+
+    def __init__(self, raw):
+        """
+        Parameters:
+            raw (file): Binary file object to read from.
+        """
+        super().__init__()
+        self.raw = raw
+        self.seconds = 0.0
+        self.bytes = 0
+
+    @classmethod
+    def open_zip(cls, data):
+        """
+        Opens the only member of a zipped archive for timed reading, like read_csv's
+        compression='zip' does.
+
+        Parameters:
+            data (bytes): The zipped archive.
+
+        Returns:
+            TimedReader: Reader of the uncompressed member.
+        """
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        names = archive.namelist()
+        if len(names) != 1:
+            raise ValueError(f"Expected one file in the ZIP archive, found {len(names)}: {names}")
+        return cls(archive.open(names[0]))
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        started = time.perf_counter()
+        data = self.raw.read(size)
+        self.seconds += time.perf_counter() - started
+        self.bytes += len(data)
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def close(self):
+        self.raw.close()
+        super().close()
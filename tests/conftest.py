@@ -0,0 +1,96 @@
+import functools
+import http.server
+import threading
+import pytest
+from benchmarks.feed_server import FeedRequestHandler, serve
+from benchmarks.synthetic_gdelt import SyntheticGdelt
+from src.dataloaders.EventDataLoader import EventDataLoader
+from src.dataloaders.GraphDataLoader import GraphDataLoader
+from src.dataloaders.LoadReporter import LoadReporter
+
+DATES = ["20240101", "20240102"]
+# Settings that turn off every shortcut; tests turn on the ones they check.
+NO_SHORTCUTS = {
+    "cache_dir": None, "store_dir": None, "checkpoint_dir": None, "result_cache_bytes": None, "spill_bytes": None,
+}
+
+
+class RecordingFeedHandler(FeedRequestHandler):
+    def send_response(self, code, message=None):
+        self.server.log.append((self.path, code))
+        super().send_response(code, message)
+
+
+@pytest.fixture(scope="session")
+def feed_dir(tmp_path_factory):
+    """
+    Writes two small synthetic days of events and GKG records.
+
+    Returns:
+        str: Directory holding the 'events' and 'gkg' archives.
+    """
+    data_dir = tmp_path_factory.mktemp("feed")
+    SyntheticGdelt().write(str(data_dir), DATES, event_rows=4000, gkg_rows=1500)
+    return str(data_dir)
+
+
+@pytest.fixture(scope="session")
+def feed_url(feed_dir):
+    """
+    Serves the synthetic days over HTTP.
+
+    Yields:
+        str: Base URL of the server, e.g. 'http://127.0.0.1:8765'.
+    """
+    with serve(feed_dir) as url:
+        yield url
+
+
+@pytest.fixture
+def recorded_feed(feed_dir):
+    """
+    Serves the synthetic days from a server of its own that records every response.
+
+    Yields:
+        http.server.ThreadingHTTPServer: The server; 'url' is its base URL and 'log' the
+            (path, status) of every response so far.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(RecordingFeedHandler, directory=feed_dir))
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.log = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def reporter():
+    """
+    Returns a reporter that prints nothing.
+    """
+    return LoadReporter(on_progress=lambda *args: None, on_message=lambda *args: None)
+
+
+@pytest.fixture
+def event_loader(feed_url, reporter):
+    """
+    Returns a factory of event loaders reading the synthetic feed, with all columns and
+    without shortcuts unless the given settings turn them on.
+    """
+    def make(**state):
+        return EventDataLoader(dict(
+            dict(NO_SHORTCUTS, root_url=f"{feed_url}/events/{{DATE}}.export.CSV.zip", selected_columns=[]), **state
+        ), reporter)
+    return make
+
+
+@pytest.fixture
+def gkg_loader(feed_url, reporter):
+    """
+    Returns a factory of GKG loaders reading the synthetic feed, without shortcuts unless
+    the given settings turn them on.
+    """
+    def make(**state):
+        return GraphDataLoader(dict(dict(NO_SHORTCUTS, gkg_url=f"{feed_url}/gkg/{{DATE}}.gkg.csv.zip"), **state), reporter)
+    return make
@@ -0,0 +1,101 @@
+"""
+The archive cache against a local server that records every response: cached days are not
+downloaded again, the least recently used archives go first once the budget is reached, and
+a revalidated archive answered with 304 is taken from the cache. Readers racing a writer or
+an eviction get a whole archive and its validators, or nothing.
+"""
+import os
+import pandas as pd
+import pytest
+from src.dataloaders.ArchiveCache import ArchiveCache
+
+
+def fetch_sources(loader):
+    return {record["date"]: record["source"] for record in loader.metrics.sorted_records() if record["stage"] == "fetch"}
+
+
+def cached_files(cache_dir):
+    return sorted(
+        f"{feed}/{name}" for feed in os.listdir(cache_dir)
+        for name in os.listdir(os.path.join(cache_dir, feed)) if name.endswith(".zip")
+    )
+
+
+def test_second_range_load_downloads_only_the_missing_day(event_loader, recorded_feed, tmp_path):
+    root_url = f"{recorded_feed.url}/events/{{DATE}}.export.CSV.zip"
+    cache_dir = str(tmp_path / "cache")
+    event_loader(root_url=root_url, cache_dir=cache_dir).load_data_range("2024-01-01", "2024-01-01")
+    assert recorded_feed.log == [("/events/20240101.export.CSV.zip", 200)]
+
+    recorded_feed.log.clear()
+    loader = event_loader(root_url=root_url, cache_dir=cache_dir)
+    df = loader.load_data_range("2024-01-01", "2024-01-02")
+    assert recorded_feed.log == [("/events/20240102.export.CSV.zip", 200)]
+    assert fetch_sources(loader) == {"20240101": "archive_cache", "20240102": "download"}
+    pd.testing.assert_frame_equal(df, event_loader().load_data_range("2024-01-01", "2024-01-02"))
+
+
+def test_least_recently_used_archives_are_evicted_beyond_the_budget(event_loader, gkg_loader, feed_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    sizes = {
+        "events/20240101.zip": os.path.getsize(os.path.join(feed_dir, "events/20240101.export.CSV.zip")),
+        "events/20240102.zip": os.path.getsize(os.path.join(feed_dir, "events/20240102.export.CSV.zip")),
+    }
+    # Room for both event days, not for the GKG day as well.
+    budget = sum(sizes.values())
+    event_loader(cache_dir=cache_dir, cache_max_bytes=budget).load_data_range("2024-01-01", "2024-01-02")
+    assert cached_files(cache_dir) == ["events/20240101.zip", "events/20240102.zip"]
+
+    # Reading 2024-01-01 again makes 2024-01-02 the least recently used archive.
+    event_loader(cache_dir=cache_dir, cache_max_bytes=budget).load_data_range("2024-01-01", "2024-01-01")
+    gkg_loader(cache_dir=cache_dir, cache_max_bytes=budget).data_pipeline("2024-01-01", "2024-01-01", [])
+    assert cached_files(cache_dir) == ["events/20240101.zip", "gkg/20240101.zip"]
+    assert sum(os.path.getsize(os.path.join(cache_dir, name)) for name in cached_files(cache_dir)) <= budget
+
+
+def test_revalidation_answered_with_304_reuses_the_cached_archive(event_loader, recorded_feed, tmp_path):
+    root_url = f"{recorded_feed.url}/events/{{DATE}}.export.CSV.zip"
+    settings = {"root_url": root_url, "cache_dir": str(tmp_path / "cache"), "cache_revalidate": True}
+    expected = event_loader(**settings).load_data_range("2024-01-01", "2024-01-01")
+
+    recorded_feed.log.clear()
+    loader = event_loader(**settings)
+    df = loader.load_data_range("2024-01-01", "2024-01-01")
+    assert recorded_feed.log == [("/events/20240101.export.CSV.zip", 304)]
+    assert fetch_sources(loader) == {"20240101": "revalidated"}
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_validators_are_replaced_whole_and_ignored_when_unreadable(tmp_path):
+    cache = ArchiveCache(str(tmp_path), 1024 ** 2)
+    cache.put("events", "20240101", b"archive", {"etag": '"a"'})
+    cache.put("events", "20240101", b"archive", {"etag": '"b"'})
+    assert cache.validators("events", "20240101") == {"etag": '"b"'}
+    # A write that fails half way leaves the previous validators in place.
+    with pytest.raises(TypeError):
+        cache.put("events", "20240101", b"archive", {"etag": '"c"', "last_modified": object()})
+    assert cache.validators("events", "20240101") == {"etag": '"b"'}
+    assert sorted(os.listdir(tmp_path / "events")) == ["20240101.zip", "20240101.zip.json"]
+
+    # A sidecar cut short, e.g. by a crash of an older version, means no validators.
+    with open(tmp_path / "events" / "20240101.zip.json", "w") as f:
+        f.write('{"etag": ')
+    assert cache.validators("events", "20240101") == {}
+    cache.put("events", "20240101", b"archive")
+    assert os.listdir(tmp_path / "events") == ["20240101.zip"]
+
+
+def test_archive_evicted_after_it_was_read_is_still_a_hit(tmp_path, monkeypatch):
+    cache = ArchiveCache(str(tmp_path), 1024 ** 2)
+    cache.put("events", "20240101", b"archive")
+
+    def evicted(path, *args, **kwargs):
+        # Another process evicts the entry between the read and the access time update.
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get("events", "20240101") == b"archive"
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get("events", "20240101") is None
+    assert (cache.hits, cache.misses) == (1, 1)
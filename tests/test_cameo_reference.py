@@ -0,0 +1,36 @@
+"""
+Prefix lookups return the first values in insertion order whether they come from the values
+kept on a node or from a walk of its subtree, and search() ranks label matches above word
+and code matches.
+"""
+import random
+import pytest
+from src.cameo.CameoReference import CameoReference
+from src.cameo.PrefixTrie import PrefixTrie
+
+
+@pytest.mark.parametrize("first_values", [2, PrefixTrie.FIRST_VALUES])
+def test_find_returns_the_first_values_of_the_prefix(monkeypatch, first_values):
+    monkeypatch.setattr(PrefixTrie, "FIRST_VALUES", first_values)
+    rng = random.Random(0)
+    trie, entries = PrefixTrie(), []
+    for _ in range(2000):
+        key, value = "".join(rng.choice("abc") for _ in range(rng.randint(0, 5))), rng.randint(0, 200)
+        trie.insert(key, value)
+        entries.append((key, value))
+
+    for prefix in ["", "a", "ab", "cab", "ccccc", "d"]:
+        expected = list(dict.fromkeys(value for key, value in entries if key.startswith(prefix)))
+        for limit in [None, 0, 1, 2, 50, 1000]:
+            assert trie.find(prefix, limit) == expected[:limit]
+
+
+def test_search_ranks_label_matches_first():
+    reference = CameoReference.shared()
+    # 'Guinea' and 'Guinea-Bissau' start with the query, 'Equatorial Guinea' and 'Papua New
+    # Guinea' have a later word starting with it.
+    assert reference.search("country", "guinea") == ["GIN", "GNB", "GNQ", "PNG"]
+    assert reference.search("country", "guinea", limit=3) == ["GIN", "GNB", "GNQ"]
+    # Labels before codes: 'North Korea' and 'South Korea' match by word, KOR also by code.
+    assert reference.search("country", "kor") == ["PRK", "KOR"]
+    assert reference.search("country", "gnq") == ["GNQ"]
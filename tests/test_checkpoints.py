@@ -0,0 +1,44 @@
+"""
+Range checkpoints are kept only while there is something to resume: they are removed once
+their range loaded without a failed day, and pruned after being abandoned for too long.
+"""
+import os
+import time
+from src.dataloaders.RangeCheckpoint import RangeCheckpoint
+
+
+def checkpoints(root):
+    return sorted(os.listdir(root)) if os.path.isdir(root) else []
+
+
+def test_checkpoint_is_removed_after_a_complete_load(event_loader, tmp_path):
+    root = str(tmp_path / "checkpoints")
+    event_loader(checkpoint_dir=root).load_data_range("2024-01-01", "2024-01-02")
+    assert checkpoints(root) == []
+
+
+def test_checkpoint_is_kept_until_its_failed_days_load(event_loader, tmp_path):
+    root = str(tmp_path / "checkpoints")
+    loader = event_loader(checkpoint_dir=root)
+    # The feed has no 2024-01-03.
+    loader.load_data_range("2024-01-01", "2024-01-03")
+    checkpoint = loader.get_checkpoint()
+    assert checkpoints(root) == [os.path.basename(checkpoint.directory)]
+    assert checkpoint.split(["20240101", "20240102", "20240103"]) == (["20240101", "20240102"], ["20240103"])
+    assert list(checkpoint.failed()) == ["20240103"]
+
+    loader.load_data_range("2024-01-01", "2024-01-02")
+    assert checkpoints(root) == []
+
+
+def test_abandoned_checkpoints_are_pruned(event_loader, gkg_loader, tmp_path):
+    root = str(tmp_path / "checkpoints")
+    event_loader(checkpoint_dir=root).load_data_range("2024-01-01", "2024-01-03")
+    gkg_loader(checkpoint_dir=root).data_pipeline("2024-01-01", "2024-01-03", [])
+    old, recent = checkpoints(root)
+    week_ago = time.time() - 8 * 24 * 3600
+    os.utime(os.path.join(root, old, "manifest.json"), (week_ago, week_ago))
+
+    assert RangeCheckpoint.prune(root, None) == 0
+    assert RangeCheckpoint.prune(root, 7 * 24 * 3600) == 1
+    assert checkpoints(root) == [recent]
@@ -0,0 +1,70 @@
+"""
+A chunked parse filters every chunk as it is read; the day it returns must not be filtered
+(or have its tone split) a second time, and its chunks are joined without changing their types.
+"""
+import warnings
+import pandas as pd
+import pytest
+
+
+def stages(loader):
+    return {record["stage"]: record for record in loader.metrics.sorted_records() if record["date"] == "20240101"}
+
+
+@pytest.mark.parametrize("workers", [None, 2], ids=["threads", "workers"])
+def test_chunked_event_day_is_filtered_once(event_loader, workers):
+    filters = {"actor_1_code_list": ["USA"], "quad_class_list": [1, 4]}
+    expected = event_loader(**filters).load_data_range("2024-01-01", "2024-01-01")
+    loader = event_loader(chunk_size=500, workers=workers, **filters)
+    df = loader.load_data_range("2024-01-01", "2024-01-01")
+
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected)
+    assert not df.attrs
+    records = stages(loader)
+    assert "filter" not in records
+    assert records["chunk_filter"]["rows_in"] == records["parse"]["rows_out"]
+    assert records["chunk_filter"]["rows_out"] == len(df)
+
+
+@pytest.mark.parametrize("workers", [None, 2], ids=["threads", "workers"])
+def test_chunked_gkg_day_is_filtered_once(gkg_loader, workers):
+    expected = gkg_loader().data_pipeline("2024-01-01", "2024-01-01", ["WAR"])
+    loader = gkg_loader(chunk_size=500, workers=workers)
+    df = loader.data_pipeline("2024-01-01", "2024-01-01", ["WAR"])
+
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected)
+    records = stages(loader)
+    assert "filter" not in records and "tone" not in records
+    assert records["chunk_filter"]["rows_in"] == records["parse"]["rows_out"]
+    assert records["chunk_tone"]["rows_in"] == len(df)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_chunked_gkg_load_data_matches_plain_parse(gkg_loader, engine):
+    expected = gkg_loader(parse_engine=engine).load_data("20240101")
+    df = gkg_loader(parse_engine=engine, chunk_size=500).load_data("20240101")
+
+    assert not df.attrs and not expected.attrs
+    assert list(df.columns) == list(expected.columns)
+    assert df.dtypes.equals(expected.dtypes)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_chunks_with_all_missing_codes_stay_categorical(event_loader, engine):
+    loader = event_loader(parse_engine=engine)
+    df = loader.parse_data(loader.fetch_data("20240101"))
+    columns = list(df.columns)
+    # Chunks in which a code column has no value at all, or other categories than the rest.
+    assert df['Actor1CountryCode'].notna().any()
+    chunks = [df.iloc[:300].assign(Actor1CountryCode=pd.Series(dtype="category")), df.iloc[300:0], df.iloc[300:]]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        joined = loader.concat_frames(chunks, columns)
+
+    assert (joined.dtypes == "category").equals(df.dtypes == "category")
+    expected = pd.concat([chunk.astype({column: object for column in columns if chunk[column].dtype == "category"})
+                          for chunk in chunks], ignore_index=True)
+    pd.testing.assert_frame_equal(joined.astype(expected.dtypes.to_dict()), expected)
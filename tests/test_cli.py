@@ -0,0 +1,18 @@
+"""
+Commands that print their result write nothing else to stdout, so the output can be piped.
+"""
+from src import cli
+
+
+def test_events_cube_prints_only_the_result(event_loader, tmp_path, capsys):
+    cube_dir = str(tmp_path / "cube")
+    loader = event_loader(cube_dir=cube_dir, build_cube=True)
+    loader.load_data_range("2024-01-01", "2024-01-02")
+    expected = loader.query_cube("2024-01-01", "2024-01-02", ["QuadClass"], {})
+    capsys.readouterr()
+
+    status = cli.main([
+        "events-cube", "--start", "2024-01-01", "--end", "2024-01-02", "--by", "QuadClass", "--cube-dir", cube_dir
+    ])
+    assert status == 0
+    assert capsys.readouterr().out == expected.to_string(index=False) + "\n"
@@ -0,0 +1,43 @@
+"""
+Only the selected columns and those the filters need are parsed; the filter-only columns
+are dropped from the result, and a day converted into the Parquet store keeps all columns.
+"""
+import pandas as pd
+from src.dataloaders.EventDataLoader import EVENT_SCHEMA
+from src.dataloaders.GraphDataLoader import GKG_SCHEMA, TONE_COLUMNS
+
+EVENT_COLUMNS = ['SQLDATE', 'Actor1Name', 'EventCode']
+
+
+def test_event_load_parses_only_the_needed_columns(event_loader, tmp_path):
+    filters = {"actor_1_code_list": ["USA"], "quad_class_list": [1, 4]}
+    loader = event_loader(selected_columns=EVENT_COLUMNS, **filters)
+    parsed = loader.parse_data(loader.fetch_data("20240101"))
+    # Actor lists are matched against both actors; EventRootCode is needed to fix the event codes.
+    assert list(parsed.columns) == [
+        'SQLDATE', 'Actor1Code', 'Actor1Name', 'Actor2Code', 'EventCode', 'EventRootCode', 'QuadClass'
+    ]
+
+    df = loader.load_data_range("2024-01-01", "2024-01-02")
+    full = event_loader(**filters).load_data_range("2024-01-01", "2024-01-02")
+    assert list(df.columns) == EVENT_COLUMNS
+    pd.testing.assert_frame_equal(df, full[EVENT_COLUMNS])
+
+    store_dir = str(tmp_path / "store")
+    stored = event_loader(selected_columns=EVENT_COLUMNS, store_dir=store_dir, **filters)
+    pd.testing.assert_frame_equal(stored.load_data_range("2024-01-01", "2024-01-02"), df)
+    assert list(stored.get_store().read("events", "20240101").columns) == list(EVENT_SCHEMA)
+
+
+def test_gkg_load_drops_the_themes_read_for_keywords(gkg_loader, tmp_path):
+    loader = gkg_loader(gkg_selected_columns=['DATE', 'TONE'])
+    assert loader.required_columns(["WAR"]) == ['DATE', 'THEMES', 'TONE']
+    df = loader.data_pipeline("2024-01-01", "2024-01-02", ["WAR"])
+    assert list(df.columns) == ['DATE', 'TONE'] + TONE_COLUMNS
+
+    full = gkg_loader().data_pipeline("2024-01-01", "2024-01-02", ["WAR"])
+    pd.testing.assert_frame_equal(df, full[list(df.columns)])
+
+    stored = gkg_loader(gkg_selected_columns=['DATE', 'TONE'], store_dir=str(tmp_path / "store"))
+    pd.testing.assert_frame_equal(stored.data_pipeline("2024-01-01", "2024-01-02", ["WAR"]), df)
+    assert list(stored.get_store().read("gkg", "20240101").columns) == list(GKG_SCHEMA)
@@ -0,0 +1,76 @@
+"""
+Every export format holds the loaded rows, written a chunk at a time; the binary formats
+keep the column types, and an export already built for a dataset version is reused.
+"""
+import io
+import os
+import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+from src.apps.data_export import EXPORT_FORMATS, DataExporter
+
+
+@pytest.fixture
+def data(event_loader):
+    return event_loader(actor_1_code_list=["USA"]).load_data_range("2024-01-01", "2024-01-02")
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    # Small chunks, so every export is written in several of them.
+    return DataExporter(export_dir=str(tmp_path / "exports"), chunk_rows=150)
+
+
+def read_export(path, fmt):
+    if fmt == "zip":
+        with zipfile.ZipFile(path) as archive:
+            return archive.read("data.csv").decode("utf-8")
+    if fmt == "parquet":
+        return pq.read_table(path).to_pandas()
+    if fmt == "arrow":
+        with ipc.open_file(path) as reader:
+            return reader.read_all().to_pandas()
+    with pa.CompressedInputStream(pa.OSFile(path), "zstd") as stream:
+        return pd.read_csv(io.BytesIO(stream.read()))
+
+
+def missing_as_none(df):
+    # Arrow reads missing strings back as None where the loaded frame may hold NaN.
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].where(df[column].notna(), None)
+    return df
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_export_holds_the_loaded_rows(data, exporter, fmt):
+    assert len(data) > exporter.chunk_rows
+    exported = read_export(exporter.build(data, DataExporter.fingerprint(data), fmt), fmt)
+    if fmt == "zip":
+        assert exported == data.to_csv(index=False)
+    elif fmt == "csv.zst":
+        expected = pd.read_csv(io.StringIO(data.to_csv(index=False)))
+        assert list(exported.columns) == list(data.columns)
+        pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+    else:
+        # Categoricals without any category (no actor had a third type) stay categorical too.
+        assert data['Actor1Type3Code'].cat.categories.empty
+        assert exported.dtypes.equals(data.dtypes)
+        pd.testing.assert_frame_equal(missing_as_none(exported), missing_as_none(data.reset_index(drop=True)))
+
+
+def test_export_is_built_once_per_dataset_version(data, exporter):
+    fingerprint = DataExporter.fingerprint(data)
+    path = exporter.build(data, fingerprint, "parquet")
+    modified = os.path.getmtime(path)
+    assert exporter.build(data, fingerprint, "parquet") == path
+    assert os.path.getmtime(path) == modified
+    assert list(exporter.export_stats(fingerprint)) == ["parquet"]
+    assert exporter.export_stats(fingerprint)["parquet"]["bytes"] == os.path.getsize(path)
+
+    changed = data.iloc[1:]
+    assert DataExporter.fingerprint(changed) != fingerprint
+    assert exporter.build(changed, DataExporter.fingerprint(changed), "parquet") != path
@@ -0,0 +1,92 @@
+"""
+SQL run with DuckDB on the days in the Parquet store gives the rows of a range load with
+the same filters, and the days that are not stored yet are left out and reported.
+"""
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def messages(reporter):
+    received = []
+    reporter.on_message = lambda level, message: received.append((level, message))
+    return received
+
+
+def as_values(df, by):
+    # DuckDB gives categoricals and string columns back as plain objects.
+    df = df.astype({column: object for column in df.columns if df[column].dtype != "float32"})
+    df = df.astype({column: "float64" for column in df.columns if df[column].dtype == "float32"})
+    return df.sort_values(by, ignore_index=True).where(lambda frame: frame.notna(), None)
+
+
+def test_event_sql_matches_a_range_load(event_loader, messages, tmp_path):
+    filters = dict(actor_1_code_list=["USA", "CHN"], quad_class_list=[1, 4])
+    loader = event_loader(store_dir=str(tmp_path), **filters)
+    expected = loader.load_data_range("2024-01-01", "2024-01-02")
+    assert 0 < len(expected) < 8000
+
+    # The default query has the filters of the load as its WHERE clause.
+    df = loader.query_sql("2024-01-01", "2024-01-02")
+    assert list(df.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        as_values(df, 'GLOBALEVENTID'), as_values(expected, 'GLOBALEVENTID'), check_dtype=False
+    )
+    assert [level for level, _ in messages if level == "warning"] == []
+
+    sql = """
+        SELECT EventRootCode, count(*) AS events, sum(NumMentions) AS mentions
+        FROM events WHERE QuadClass = 4 GROUP BY EventRootCode ORDER BY EventRootCode
+    """
+    all_events = event_loader(store_dir=str(tmp_path)).load_data_range("2024-01-01", "2024-01-02")
+    conflict = all_events[all_events['QuadClass'] == 4].astype({'EventRootCode': object})
+    grouped = conflict.groupby('EventRootCode').agg(events=('GLOBALEVENTID', 'size'), mentions=('NumMentions', 'sum'))
+    assert len(grouped) > 1
+    df = loader.query_sql("2024-01-01", "2024-01-03", sql)
+    pd.testing.assert_frame_equal(df, grouped.reset_index(), check_dtype=False)
+    # The third day is not in the store (nor in the feed): it is reported, not queried.
+    assert [level for level, message in messages if "not in the Parquet store" in message] == ["warning"]
+    assert "20240103" in messages[-1][1]
+
+
+def test_gkg_sql_matches_a_range_load(gkg_loader, tmp_path):
+    keywords = ["WAR", "TAX_FNCACT_*"]
+    loader = gkg_loader(store_dir=str(tmp_path), gkg_selected_columns=['DATE', 'NUMARTS', 'THEMES', 'SOURCEURLS'])
+    loader.load_data_range("2024-01-01", "2024-01-02", keywords)
+    expected = loader.data
+    assert 0 < len(expected) < 3000
+
+    df = loader.query_sql("2024-01-01", "2024-01-02", keywords=keywords)
+    by = ['DATE', 'SOURCEURLS', 'THEMES']
+    pd.testing.assert_frame_equal(as_values(df, by), as_values(expected, by), check_dtype=False)
+
+
+def test_sql_needs_the_store(event_loader):
+    with pytest.raises(ValueError, match="store_dir"):
+        event_loader().query_sql("2024-01-01", "2024-01-02")
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM read_csv('{secret}')",
+    "SELECT * FROM read_text('{secret}')",
+    "SELECT * FROM '{partition}'",
+    "COPY (SELECT 1 AS GLOBALEVENTID) TO '{partition}' (FORMAT parquet, USE_TMP_FILE false)",
+    "COPY (SELECT 1) TO '{secret}.out'",
+    "SET enable_external_access = true",
+])
+def test_sql_cannot_touch_other_files(event_loader, tmp_path, sql):
+    secret = tmp_path / "secret.csv"
+    secret.write_text("password\nhunter2\n")
+    loader = event_loader(store_dir=str(tmp_path / "store"))
+    loader.load_data_range("2024-01-01", "2024-01-01")
+    partition = loader.get_store().partition_path("events", "20240101")
+    stored = open(partition, "rb").read()
+
+    with pytest.raises(duckdb.Error):
+        loader.query_sql("2024-01-01", "2024-01-01", sql.format(secret=secret, partition=partition))
+    assert open(partition, "rb").read() == stored
+    assert not (tmp_path / "secret.csv.out").exists()
+    # The stored days are still queried as usual.
+    assert len(loader.query_sql("2024-01-01", "2024-01-01")) == 4000
@@ -0,0 +1,78 @@
+"""
+Aggregates read from the event cube, from daily or from monthly rollups, equal those
+computed from the loaded events with a pandas groupby.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.dataloaders.EventCube import CUBE_COLUMNS, EventCube
+
+
+@pytest.fixture
+def events(event_loader):
+    return event_loader().load_data_range("2024-01-01", "2024-01-02")
+
+
+def aggregate(events, by):
+    # The cube's numbers, computed from the events themselves.
+    df = events.assign(**{column: events[column].astype(object) for column in by if events[column].dtype == "category"})
+    df = df.assign(
+        events=1, GoldsteinScale=df['GoldsteinScale'].astype("float64"), AvgTone=df['AvgTone'].astype("float64"),
+        NumMentions=df['NumMentions'].astype("int64"), NumArticles=df['NumArticles'].astype("int64"),
+    )
+    grouped = df.groupby(by, dropna=False, sort=True).agg(
+        events=('events', 'sum'), NumMentions=('NumMentions', 'sum'), NumArticles=('NumArticles', 'sum'),
+        GoldsteinScale=('GoldsteinScale', 'mean'), AvgTone=('AvgTone', 'mean'),
+    )
+    return grouped.reset_index()
+
+
+def assert_same_aggregates(df, expected):
+    assert list(df.columns) == list(expected.columns)
+    for column in expected.columns:
+        if column in ('GoldsteinScale', 'AvgTone'):
+            np.testing.assert_allclose(df[column], expected[column], rtol=1e-6)
+        else:
+            # Missing country codes are a group of their own.
+            assert [None if pd.isna(value) else value for value in df[column]] == \
+                [None if pd.isna(value) else value for value in expected[column]]
+
+
+@pytest.mark.parametrize("chunk_size", [None, 700], ids=["whole", "chunked"])
+def test_daily_cube_matches_groupby(event_loader, events, tmp_path, chunk_size):
+    cube_dir = str(tmp_path / "cube")
+    # The cube holds every event of the day, whatever the filters of the load.
+    loader = event_loader(cube_dir=cube_dir, build_cube=True, chunk_size=chunk_size, quad_class_list=[1])
+    loader.load_data_range("2024-01-01", "2024-01-02")
+
+    by = ['Actor1CountryCode', 'QuadClass']
+    df = loader.query_cube("2024-01-01", "2024-01-02", by, {'QuadClass': [1, 4]})
+    assert_same_aggregates(df, aggregate(events[events['QuadClass'].isin([1, 4])], by))
+
+    total = loader.query_cube("2024-01-01", "2024-01-02")
+    assert_same_aggregates(total, aggregate(events.assign(key=0), ['key']).drop(columns='key'))
+
+
+@pytest.mark.parametrize("period", ["MonthYear", "Year"])
+def test_monthly_rollup_matches_groupby(events, tmp_path, period):
+    # A whole month of days, each holding the synthetic events of one loaded day. The days keep
+    # the SQLDATEs of the loader, so they also report events of earlier months and years.
+    days = {f"202401{day:02d}": events[events['SQLDATE'] > 20240101] if day % 2 else events for day in range(1, 32)}
+    cube = EventCube(str(tmp_path / "cube"))
+    for date, day in days.items():
+        cube.write(date, EventCube.rollup(day[CUBE_COLUMNS]))
+    month = pd.concat(days.values(), ignore_index=True)
+    month = month.assign(MonthYear=month['SQLDATE'] // 100, Year=month['SQLDATE'] // 10000)
+    assert month['MonthYear'].nunique() > 1
+
+    dates = list(days) + ["20240201"]
+    by = [period, 'EventRootCode']
+    df, missing = cube.query(dates, by, {'Actor1CountryCode': ['USA', 'CHN']})
+    assert missing == ["20240201"]
+    assert cube.store.has("months", "202401")
+    expected = aggregate(month[month['Actor1CountryCode'].isin(['USA', 'CHN'])], by)
+    assert_same_aggregates(df, expected)
+
+    # The same counts as the daily partitions give, read as two parts of the month.
+    daily = pd.concat([cube.query(part, by, {'Actor1CountryCode': ['USA', 'CHN']})[0] for part in (dates[:30], dates[30:31])])
+    assert daily.groupby(by)['events'].sum().to_dict() == df.set_index(by)['events'].to_dict()
@@ -0,0 +1,161 @@
+"""
+HttpTransport against a local server that fails on purpose: 5xx answers (with and without
+Retry-After), responses slower than the read timeout and bodies cut short.
+"""
+import collections
+import http.server
+import threading
+import time
+import types
+import pytest
+from src.dataloaders import HttpTransport as transport_module
+from src.dataloaders.HttpTransport import HttpTransport, TransportError
+
+BODY = b"GDELT archive bytes" * 100
+
+
+class ScriptedHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests[self.path] += 1
+        script = self.server.scripts[self.path]
+        action = script.popleft() if script else ("ok",)
+        kind = action[0]
+        if kind == "status":
+            _, status, headers = action
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif kind == "slow":
+            # Answer after the client's read timeout.
+            time.sleep(action[1])
+            self._send_body(BODY)
+        elif kind == "truncated":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY[:len(BODY) // 3])
+            self.close_connection = True
+        else:
+            self._send_body(BODY)
+
+    def _send_body(self, body):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScriptedServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.scripts = collections.defaultdict(collections.deque)
+        self.requests = collections.Counter()
+
+    def handle_error(self, request, client_address):
+        # The client hangs up on slow answers; that is the point of those tests.
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ScriptedServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+    Records the backoff delays of HttpTransport instead of sleeping them.
+    """
+    slept = []
+    monkeypatch.setattr(transport_module, "time", types.SimpleNamespace(sleep=slept.append, monotonic=time.monotonic))
+    return slept
+
+
+def make_transport(**settings):
+    return HttpTransport(**dict(dict(timeout=0.3, connect_timeout=1, retries=3, backoff=0.5, max_backoff=4), **settings))
+
+
+@pytest.mark.parametrize("failure", [
+    ("status", 503, {}), ("status", 500, {}), ("status", 429, {}), ("slow", 1.0), ("truncated",),
+], ids=["503", "500", "429", "timeout", "truncated"])
+def test_transient_failures_are_retried(server, delays, failure):
+    server.scripts["/day.zip"].extend([failure, failure])
+    transport = make_transport()
+
+    assert transport.get(f"{server.url}/day.zip") == BODY
+    assert server.requests["/day.zip"] == 3
+    assert transport.requests == 3 and transport.retried == 2
+    assert len(delays) == 2
+
+
+def test_not_found_is_not_retried(server, delays):
+    server.scripts["/missing.zip"].append(("status", 404, {}))
+    transport = make_transport()
+
+    with pytest.raises(TransportError) as raised:
+        transport.get(f"{server.url}/missing.zip")
+    assert raised.value.status == 404
+    assert server.requests["/missing.zip"] == 1
+    assert delays == []
+
+
+def test_exhausted_retries_raise_with_the_last_status(server, delays):
+    server.scripts["/down.zip"].extend([("status", 503, {})] * 10)
+    transport = make_transport(retries=3)
+
+    with pytest.raises(TransportError) as raised:
+        transport.get(f"{server.url}/down.zip")
+    assert raised.value.status == 503
+    assert server.requests["/down.zip"] == 4
+    assert transport.retried == 3 and len(delays) == 3
+
+
+def test_exhausted_retries_after_timeouts_raise_without_status(server, delays):
+    server.scripts["/slow.zip"].extend([("slow", 1.0)] * 10)
+    transport = make_transport(retries=2)
+
+    with pytest.raises(TransportError) as raised:
+        transport.get(f"{server.url}/slow.zip")
+    assert raised.value.status is None
+    assert server.requests["/slow.zip"] == 3
+
+
+def test_backoff_has_full_jitter_within_the_exponential_bound(server, delays):
+    server.scripts["/flaky.zip"].extend([("status", 502, {})] * 6)
+    transport = make_transport(retries=6, backoff=0.5, max_backoff=4)
+
+    assert transport.get(f"{server.url}/flaky.zip") == BODY
+    bounds = [min(4, 0.5 * 2 ** attempt) for attempt in range(6)]
+    assert all(0 <= delay <= bound for delay, bound in zip(delays, bounds))
+    # Many draws of the same attempt spread over the whole interval, not just its top.
+    draws = [transport._delay(3) for _ in range(2000)]
+    assert 0 <= min(draws) < 0.5 and 3.5 < max(draws) <= 4
+
+
+def test_retry_after_sets_a_lower_bound_capped_by_max_backoff(server, delays):
+    server.scripts["/busy.zip"].extend([
+        ("status", 503, {"Retry-After": "3"}), ("status", 429, {"Retry-After": "120"}),
+        ("status", 503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}),
+    ])
+    transport = make_transport(retries=3, backoff=0.1, max_backoff=10)
+
+    assert transport.get(f"{server.url}/busy.zip") == BODY
+    assert 3 <= delays[0] <= 10
+    assert delays[1] == 10
+    # An HTTP date is not understood; the jittered backoff is used.
+    assert 0 <= delays[2] <= 0.4
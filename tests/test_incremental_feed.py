@@ -0,0 +1,138 @@
+"""
+Polling the GDELT 2.0 15-minute feed: a local server publishes lastupdate.txt twice, and
+each poll must fetch only the slices published since the previous one, each slice once.
+"""
+import functools
+import hashlib
+import http.server
+import io
+import os
+import threading
+import zipfile
+import pytest
+from benchmarks.feed_server import FeedRequestHandler
+from benchmarks.synthetic_gdelt import SyntheticGdelt
+from src.dataloaders.EventDataLoader import EVENT_SCHEMA
+from src.dataloaders.GraphDataLoader import TONE_COLUMNS
+
+SUFFIX = ".export.CSV.zip"
+# 12:30 is never published, like the slices GDELT sometimes skips.
+PUBLISHED = ["20240105120000", "20240105121500", "20240105124500", "20240105130000"]
+
+
+class RecordingHandler(FeedRequestHandler):
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        super().do_GET()
+
+
+def v2_slice(timestamp, rows=20):
+    """
+    Returns a zipped GDELT 2.0 event slice: synthetic GDELT 1.0 events with the ADM2Code
+    columns added and event ids unique to the slice.
+    """
+    lines = []
+    for i, line in enumerate(SyntheticGdelt().events(timestamp[:8], rows).splitlines()):
+        fields = []
+        for column, value in zip(EVENT_SCHEMA, line.split("\t")):
+            if column == "GLOBALEVENTID":
+                value = f"{timestamp[8:12]}{i:03d}"
+            elif column == "DATEADDED":
+                value = timestamp
+            fields.append(value)
+            if column.endswith("Geo_ADM1Code"):
+                fields.append("")
+        lines.append("\t".join(fields))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(timestamp + SUFFIX[:-4], "\n".join(lines) + "\n")
+    return buffer.getvalue()
+
+
+class SliceServer:
+    def __init__(self, directory):
+        self.directory = directory
+        self.checksums = {}
+        for timestamp in PUBLISHED:
+            data = v2_slice(timestamp)
+            with open(os.path.join(directory, timestamp + SUFFIX), "wb") as f:
+                f.write(data)
+            self.checksums[timestamp] = (len(data), hashlib.md5(data).hexdigest())
+        handler = functools.partial(RecordingHandler, directory=directory)
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.paths = []
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def line(self, timestamp, suffix=SUFFIX):
+        size, md5 = self.checksums[timestamp]
+        return f"{size} {md5} http://data.gdeltproject.org/gdeltv2/{timestamp}{suffix}"
+
+    def publish(self, name, timestamps):
+        # The index lists the other feeds too; their lines must be ignored.
+        lines = [self.line(timestamp) for timestamp in timestamps]
+        lines.append(self.line(timestamps[-1], ".gkg.csv.zip"))
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def fetched(self):
+        # The slices requested since the last call.
+        paths, self.server.paths[:] = list(self.server.paths), []
+        return [path.strip("/")[:-len(SUFFIX)] for path in paths if path.endswith(SUFFIX)]
+
+
+@pytest.fixture
+def slices(tmp_path):
+    server = SliceServer(str(tmp_path))
+    thread = threading.Thread(target=server.server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def event_ids(df):
+    return sorted(df["GLOBALEVENTID"].astype(str))
+
+
+def test_polls_fetch_only_the_new_slices(event_loader, slices):
+    loader = event_loader(v2_base_url=slices.url)
+
+    slices.publish("lastupdate.txt", ["20240105121500"])
+    first = loader.load_updates(since="20240105120000")
+    assert slices.fetched() == ["20240105120000", "20240105121500"]
+    assert len(first) == 40
+    assert loader.state["events_v2_last_seen"] == "20240105121500"
+
+    # The second version of the index lists the newest slice twice.
+    slices.publish("lastupdate.txt", ["20240105124500", "20240105124500"])
+    second = loader.load_updates()
+    # 12:30 was never published: it is asked for once and skipped.
+    assert slices.fetched() == ["20240105123000", "20240105124500"]
+    assert event_ids(second) == sorted(f"1245{i:03d}" for i in range(20))
+    assert loader.state["events_v2_last_seen"] == "20240105124500"
+
+    # Nothing new was published.
+    assert loader.load_updates().empty
+    assert slices.fetched() == []
+
+
+def test_master_list_duplicates_are_fetched_once(event_loader, slices):
+    loader = event_loader(v2_base_url=slices.url, v2_use_master_list=True)
+    slices.publish("lastupdate.txt", ["20240105130000"])
+    slices.publish("masterfilelist.txt", PUBLISHED[:3] + PUBLISHED)
+
+    df = loader.load_updates(since="20240105120000")
+    assert slices.fetched() == PUBLISHED
+    assert len(df) == len(set(df["GLOBALEVENTID"])) == 80
+
+
+@pytest.mark.parametrize("since", ["20240105130000", "20240105121500"], ids=["nothing_pending", "slice_missing"])
+def test_gkg_updates_without_new_rows_set_an_empty_dataset(gkg_loader, slices, since):
+    # The server has no GKG slices: the pending one, if any, is skipped as never published.
+    loader = gkg_loader(v2_base_url=slices.url, gkg_selected_columns=['DATE', 'THEMES', 'TONE'])
+    slices.publish("lastupdate.txt", ["20240105121500"])
+    updates = loader.load_updates(["WAR"], since=since)
+
+    assert updates.empty and loader.get_data() is not None and loader.get_data().empty
+    assert list(loader.get_data().columns) == ['DATE', 'THEMES', 'TONE'] + TONE_COLUMNS
+    assert slices.fetched() == []
@@ -0,0 +1,89 @@
+"""
+A day must come out of every load path with the dtypes of a plain parse: read back from the
+Parquet store, picked through its PostingIndex, resumed from a range checkpoint or handed
+over by a worker process.
+"""
+import os
+import shutil
+import pandas as pd
+import pytest
+
+# Event filters that take the different store read paths: the whole day, a predicate pushed
+# into the Parquet reader, rows found through the index, and an index without a match.
+EVENT_FILTERS = {
+    "none": {},
+    "predicate": {"quad_class_list": [1, 4]},
+    "index": {"actor_1_code_list": ["USA"], "quad_class_list": [1, 4]},
+    "no match": {"actor_1_code_list": ["XXX"]},
+}
+
+
+def assert_same_frame(expected, df):
+    assert df.dtypes.equals(expected.dtypes)
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True))
+    # assert_frame_equal does not tell None from NaN in object columns.
+    for column in expected.columns[expected.dtypes == object]:
+        assert [type(value) for value in df[column][df[column].isna()]] == \
+            [type(value) for value in expected[column][expected[column].isna()]]
+
+
+@pytest.fixture(params=["c", "pyarrow"])
+def engine(request):
+    return request.param
+
+
+@pytest.mark.parametrize("filters", list(EVENT_FILTERS.values()), ids=list(EVENT_FILTERS))
+def test_event_paths_match_plain_parse(event_loader, tmp_path, engine, filters):
+    def load(end_date="2024-01-02", **state):
+        return event_loader(parse_engine=engine, **filters, **state).load_data_range("2024-01-01", end_date)
+
+    expected = load()
+    assert_same_frame(expected, load(chunk_size=777))
+    # The first load converts the days into the store, the second reads them back.
+    assert_same_frame(expected, load(store_dir=str(tmp_path / "store")))
+    assert_same_frame(expected, load(store_dir=str(tmp_path / "store")))
+    assert_same_frame(expected, load(store_dir=str(tmp_path / "store"), workers=2))
+    # The feed has no 2024-01-03, so the checkpoint is kept for the days before it.
+    load(end_date="2024-01-03", checkpoint_dir=str(tmp_path / "checkpoints"))
+    assert_same_frame(expected, load(checkpoint_dir=str(tmp_path / "checkpoints")))
+
+
+@pytest.mark.parametrize("keywords", [[], ["WAR"]], ids=["none", "keywords"])
+def test_gkg_paths_match_plain_parse(gkg_loader, tmp_path, engine, keywords):
+    def load(end_date="2024-01-02", **state):
+        return gkg_loader(parse_engine=engine, **state).data_pipeline("2024-01-01", end_date, keywords)
+
+    expected = load()
+    assert_same_frame(expected, load(chunk_size=777))
+    load(store_dir=str(tmp_path / "store"))
+    assert_same_frame(expected, load(store_dir=str(tmp_path / "store")))
+    # The feed has no 2024-01-03, so the checkpoint is kept for the days before it.
+    load(end_date="2024-01-03", checkpoint_dir=str(tmp_path / "checkpoints"))
+    assert_same_frame(expected, load(checkpoint_dir=str(tmp_path / "checkpoints")))
+
+
+@pytest.mark.parametrize("feed", ["events", "gkg"])
+def test_day_pruned_after_fetch_is_downloaded_again(event_loader, gkg_loader, tmp_path, feed):
+    def make(**state):
+        if feed == "events":
+            loader = event_loader(actor_1_code_list=["USA"], **state)
+            return loader, lambda: loader.load_data_range("2024-01-01", "2024-01-02")
+        loader = gkg_loader(**state)
+        return loader, lambda: loader.data_pipeline("2024-01-01", "2024-01-02", ["WAR"])
+
+    expected = make()[1]()
+    store_dir = str(tmp_path / "store")
+    make(store_dir=store_dir)[1]()
+    loader, load = make(store_dir=store_dir)
+    fetch_data = loader.fetch_data
+
+    def fetch_and_prune(date):
+        # Another session's pruning removes the day between fetch_data and parse_data.
+        raw = fetch_data(date)
+        shutil.rmtree(os.path.dirname(loader.get_store().partition_path(feed, date)))
+        return raw
+
+    loader.fetch_data = fetch_and_prune
+    assert_same_frame(expected, load())
+    assert [record["source"] for record in loader.metrics.sorted_records() if record["stage"] == "fetch"] == ["download"] * 2
+    assert loader.get_store().has(feed, "20240101")
@@ -0,0 +1,68 @@
+"""
+The range pipeline overlaps its stages but hands the days back in date order, passes a
+failed day along with its error instead of stopping, and does not run ahead of a caller
+that stops reading.
+"""
+import threading
+import time
+import pandas as pd
+from src.dataloaders.RangePipeline import RangePipeline
+
+DATES = [f"202401{day:02d}" for day in range(1, 11)]
+
+
+def test_results_come_in_date_order_with_their_errors():
+    def fetch(date):
+        # Later days are fetched faster, so only the pipeline keeps them in order.
+        time.sleep((len(DATES) - DATES.index(date)) * 0.002)
+        return int(date)
+
+    def parse(raw, date):
+        if date == "20240104":
+            raise ValueError("bad archive")
+        return raw * 10
+
+    filtered = []
+
+    def filter(parsed, date):
+        filtered.append(date)
+        return parsed + 1
+
+    results = list(RangePipeline(fetch, parse, filter, queue_size=2).run(DATES))
+    assert [date for date, _, _ in results] == DATES
+    for date, payload, error in results:
+        if date == "20240104":
+            assert payload is None and isinstance(error, ValueError)
+        else:
+            assert payload == int(date) * 10 + 1 and error is None
+    assert "20240104" not in filtered
+
+
+def test_stopped_pipeline_fetches_no_further():
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(date):
+        with lock:
+            fetched.append(date)
+        return date
+
+    results = RangePipeline(fetch, lambda raw, date: raw, lambda df, date: df, queue_size=1).run(DATES)
+    assert next(results)[0] == DATES[0]
+    time.sleep(0.2)
+    # One day per queue and per stage at most can be ahead of the caller.
+    assert len(fetched) <= 1 + 4 + 3
+    results.close()
+    count = len(fetched)
+    time.sleep(0.2)
+    assert len(fetched) == count < len(DATES)
+
+
+def test_range_load_reports_a_missing_day_and_keeps_the_others(event_loader, reporter):
+    loader = event_loader()
+    # The feed has no 2024-01-03.
+    df = loader.load_data_range("2024-01-01", "2024-01-03")
+    assert len(reporter.errors) == 1 and "20240103" in reporter.errors[0]
+
+    days = [event_loader().load_data(date) for date in ["20240101", "20240102"]]
+    pd.testing.assert_frame_equal(df, loader.concat_frames(days, list(days[0].columns)))
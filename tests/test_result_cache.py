@@ -0,0 +1,38 @@
+"""
+The result cache is shared by every loader of the process, so a day cached by a session
+must come back to another one only if it has the dtypes that session would parse.
+"""
+import pytest
+from src.dataloaders.ResultCache import ResultCache
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    # A fresh process-wide cache, so days cached by other tests are not reused.
+    monkeypatch.setattr(ResultCache, "_instance", None)
+
+
+def test_event_days_are_cached_per_parse_engine(event_loader, shared_cache):
+    def load(engine):
+        loader = event_loader(parse_engine=engine, result_cache_bytes=256 * 1024 ** 2)
+        return loader, loader.load_data_range("2024-01-01", "2024-01-02")
+
+    expected = {engine: load(engine)[1].dtypes for engine in ["c", "pyarrow"]}
+    assert not expected["c"].equals(expected["pyarrow"])
+    for engine in ["c", "pyarrow"]:
+        loader, df = load(engine)
+        assert df.dtypes.equals(expected[engine])
+        assert [record["source"] for record in loader.metrics.sorted_records() if record["stage"] == "fetch"] == []
+
+
+def test_gkg_days_are_cached_per_parse_engine(gkg_loader, shared_cache):
+    def load(engine):
+        loader = gkg_loader(parse_engine=engine, result_cache_bytes=256 * 1024 ** 2)
+        return loader, loader.data_pipeline("2024-01-01", "2024-01-02", ["WAR"])
+
+    expected = {engine: load(engine)[1].dtypes for engine in ["c", "pyarrow"]}
+    assert not expected["c"].equals(expected["pyarrow"])
+    for engine in ["c", "pyarrow"]:
+        loader, df = load(engine)
+        assert df.dtypes.equals(expected[engine])
+        assert [record["source"] for record in loader.metrics.sorted_records() if record["stage"] == "fetch"] == []
@@ -0,0 +1,54 @@
+"""
+Days spilled to disk read back as the frame they would have made in memory, chunk by
+chunk or whole, and their files are removed with the dataset.
+"""
+import gc
+import os
+import pandas as pd
+import pytest
+from src.apps.data_export import DataExporter
+from src.dataloaders.FrameAccumulator import FrameAccumulator
+from src.dataloaders.SpilledFrame import SpilledFrame
+from tests.test_load_paths import assert_same_frame
+
+
+def test_accumulator_spills_beyond_its_budget(event_loader, tmp_path):
+    loader = event_loader()
+    days = [loader.load_data(date) for date in ["20240101", "20240102"]]
+    expected = loader.concat_frames(days, list(days[0].columns))
+
+    kept = FrameAccumulator(max_bytes=None)
+    for day in days:
+        kept.append(day)
+    pd.testing.assert_frame_equal(kept.result(), pd.concat(days, ignore_index=True))
+
+    accumulator = FrameAccumulator(max_bytes=1, spill_dir=str(tmp_path), concat=lambda frames: None)
+    for day in days + [days[0].iloc[:0]]:
+        accumulator.append(day)
+    spilled = accumulator.result()
+    assert isinstance(spilled, SpilledFrame)
+    assert len(spilled) == len(expected) and len(spilled.paths) == 2
+
+    # Every chunk has the categories of all days, like the concatenated frame.
+    chunks = list(spilled.iter_chunks(1000))
+    assert max(len(chunk) for chunk in chunks) == 1000
+    for chunk in chunks:
+        assert chunk.dtypes.equals(expected.dtypes)
+    assert_same_frame(expected, spilled.to_pandas())
+    assert_same_frame(expected.head(3), spilled.head(3))
+    assert spilled.fingerprint() == DataExporter.fingerprint(expected)
+
+    directory = spilled.directory
+    del spilled, accumulator
+    gc.collect()
+    assert not os.path.exists(directory)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_long_range_load_spills_to_disk(event_loader, tmp_path, engine):
+    expected = event_loader(parse_engine=engine).load_data_range("2024-01-01", "2024-01-02")
+    loader = event_loader(parse_engine=engine, spill_bytes=1, spill_dir=str(tmp_path))
+    df = loader.load_data_range("2024-01-01", "2024-01-02")
+    assert isinstance(df, SpilledFrame)
+    assert os.listdir(tmp_path) == [os.path.basename(df.directory)]
+    assert_same_frame(expected, df.to_pandas())
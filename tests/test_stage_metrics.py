@@ -0,0 +1,74 @@
+"""
+A range load records the stages of every day with the bytes and rows they took in and put
+out, and publishes them to the process-wide registry as Prometheus counters.
+"""
+import json
+import os
+import pytest
+from src.dataloaders.MetricsRegistry import MetricsRegistry
+
+DATES = ["20240101", "20240102"]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # A registry of its own, so the counters hold only the loads of the test.
+    monkeypatch.setattr(MetricsRegistry, "_instance", None)
+    return MetricsRegistry.shared()
+
+
+def stages_of(metrics, date):
+    return {record["stage"]: record for record in metrics.sorted_records() if record["date"] == date}
+
+
+@pytest.mark.parametrize("chunk_size", [None, 700], ids=["whole", "chunked"])
+def test_range_load_records_every_stage(event_loader, feed_dir, registry, chunk_size):
+    loader = event_loader(quad_class_list=[1], chunk_size=chunk_size)
+    df = loader.load_data_range("2024-01-01", "2024-01-02")
+    with open(os.path.join(feed_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    # Chunks filtered while they are parsed are recorded as chunk_filter.
+    filter_stage = "chunk_filter" if chunk_size else "filter"
+    kept = 0
+    for date in DATES:
+        stages = stages_of(loader.metrics, date)
+        assert list(stages) == ["fetch", "unzip", "parse", "fix_event_codes", filter_stage, "collect"]
+        archive = os.path.getsize(os.path.join(feed_dir, "events", f"{date}.export.CSV.zip"))
+        assert stages["fetch"]["source"] == "download" and stages["fetch"]["bytes_out"] == archive
+        assert stages["unzip"]["bytes_in"] == archive
+        assert stages["unzip"]["bytes_out"] == manifest["bytes"][f"events/{date}.export.CSV.zip"]
+        assert stages["parse"]["bytes_in"] == stages["unzip"]["bytes_out"]
+        assert stages["parse"]["rows_out"] == stages[filter_stage]["rows_in"] == manifest["event_rows"]
+        assert stages[filter_stage]["rows_out"] == stages["collect"]["rows_in"]
+        assert all(record["seconds"] >= 0 for record in stages.values())
+        kept += stages[filter_stage]["rows_out"]
+    assert kept == len(df) == (df['QuadClass'] == 1).sum()
+    assert stages_of(loader.metrics, None)["concat"]["rows_out"] == len(df)
+
+    summary = loader.metrics.summary().set_index("stage")
+    assert summary.loc["fetch", "days"] == 2 and summary.loc["fetch", "sources"] == "download 2"
+    assert summary.loc[filter_stage, "rows_out"] == len(df)
+
+    metrics = registry.render()
+    assert f'gdelt_stage_rows_out_total{{feed="events",stage="{filter_stage}"}} {len(df)}' in metrics
+    assert f'gdelt_stage_runs_total{{feed="events",stage="parse"}} 2' in metrics
+    assert 'gdelt_day_source_total{feed="events",source="download"} 2' in metrics
+    assert 'gdelt_load_days_total{feed="events"} 2' in metrics
+    assert 'gdelt_load_errors_total{feed="events"} 0' in metrics
+
+
+def test_stored_days_are_read_from_the_store(event_loader, registry, tmp_path):
+    event_loader(store_dir=str(tmp_path)).load_data_range("2024-01-01", "2024-01-02")
+    loader = event_loader(store_dir=str(tmp_path))
+    df = loader.load_data_range("2024-01-01", "2024-01-02")
+
+    for date in DATES:
+        stages = stages_of(loader.metrics, date)
+        assert list(stages) == ["fetch", "store_read", "filter", "collect"]
+        assert stages["fetch"]["source"] == "store"
+    assert loader.metrics.summary().set_index("stage").loc["store_read", "rows_out"] == len(df)
+
+    metrics = registry.render()
+    assert 'gdelt_day_source_total{feed="events",source="store"} 2' in metrics
+    assert 'gdelt_loads_total{feed="events"} 2' in metrics
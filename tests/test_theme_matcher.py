@@ -0,0 +1,18 @@
+import pandas as pd
+from src.dataloaders.ThemeMatcher import ThemeMatcher
+
+
+def test_theme_cache_keeps_the_most_recent_themes():
+    matcher = ThemeMatcher(["WAR", "TAX_FNCACT_*"])
+    matcher.MAX_CACHED_THEMES = 3
+    themes = pd.Series([f"WAR_{i};TAX_FNCACT_{i};SOFTWARE_{i}" for i in range(10)])
+
+    expected = ThemeMatcher(["WAR", "TAX_FNCACT_*"]).match(themes)
+    assert (matcher.match(themes) == expected).all()
+    assert list(matcher._theme_masks) == ["WAR_9", "TAX_FNCACT_9", "SOFTWARE_9"]
+
+    # A theme seen again moves to the end; evicted themes are matched again.
+    matcher.match(pd.Series(["WAR_9;WAR_0"]))
+    assert list(matcher._theme_masks) == ["SOFTWARE_9", "WAR_9", "WAR_0"]
+    assert (matcher.match(themes) == expected).all()
+    assert len(matcher._theme_masks) == 3
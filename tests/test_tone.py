@@ -0,0 +1,51 @@
+"""
+The vectorized TONE split gives the same components as splitting every value on its own,
+with NaN for missing and malformed parts, whatever the string dtype of the column.
+"""
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.dataloaders.GraphDataLoader import TONE_COLUMNS
+
+TONES = [
+    "-1.5,2.25,3.75,6,10.5,0.5,120",
+    "3,1,2",
+    "1e-2,+4,.5,7.,abc,,9",
+    "1.5,2,3,4,5,6,7,8,9",
+    "",
+    None,
+]
+
+
+def split_tone(value):
+    # One value at a time, the way the row-wise split of the TONE column did it.
+    parts = value.split(",")[:len(TONE_COLUMNS)] if isinstance(value, str) else []
+    numbers = []
+    for part in parts:
+        try:
+            numbers.append(float(part))
+        except ValueError:
+            numbers.append(math.nan)
+    return numbers + [math.nan] * (len(TONE_COLUMNS) - len(numbers))
+
+
+def expected_tone(tones):
+    return pd.DataFrame([split_tone(value) for value in tones], columns=TONE_COLUMNS, dtype="float32")
+
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]"])
+def test_decompose_tone_matches_a_split_per_value(gkg_loader, dtype):
+    df = pd.DataFrame({"TONE": pd.Series(TONES, dtype=dtype)})
+    decomposed = gkg_loader().decompose_tone(df)
+    pd.testing.assert_frame_equal(decomposed[TONE_COLUMNS], expected_tone(TONES))
+    # A decomposed frame is returned as is, so chunks can be split on their own.
+    assert gkg_loader().decompose_tone(decomposed) is decomposed
+
+
+def test_decompose_tone_of_a_loaded_day(gkg_loader):
+    loader = gkg_loader(gkg_selected_columns=['TONE'])
+    df = loader.decompose_tone(loader.parse_data(loader.fetch_data("20240101")))
+    expected = expected_tone(df['TONE'])
+    pd.testing.assert_frame_equal(df[TONE_COLUMNS].reset_index(drop=True), expected)
+    assert not np.isnan(df['parsed_tone']).all()